@@ -0,0 +1,58 @@
+import argparse
+import subprocess
+import sys
+
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed for the headless entry point, measured at ~200 ms (numpy is ~120 ms of it)
+IMPORT_BUDGET_MS = 300.0
+# Top-level packages that only rendering may pull in
+GUI_MODULES = ("wx", "OpenGL", "main", "gui")
+
+def measure(module: str) -> tuple[float, list[str]]:
+    """
+    Imports module in a fresh interpreter, returns its cumulative import time (ms) and every module loaded
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total_us = 0
+    loaded = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        loaded.append(name.strip())
+        if name.strip() == module:
+            total_us = int(cumulative)
+    return total_us / 1000.0, loaded
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check headless import time and that no GUI/GL module is loaded")
+    parser.add_argument("--module", default="core.simulation")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="Budget in milliseconds")
+    parser.add_argument("--repeats", type=int, default=5, help="Best of this many fresh interpreters")
+    args = parser.parse_args()
+    
+    timings = []
+    for _ in range(args.repeats):
+        elapsed, loaded = measure(args.module)
+        timings.append(elapsed)
+    best = min(timings)
+    gui = sorted({ name for name in loaded if name.split(".")[0] in GUI_MODULES })
+    
+    print(f"{args.module}: {best:.1f} ms (best of {args.repeats}, budget {args.budget:.0f} ms)")
+    failed = False
+    if gui:
+        print(f"FAIL: headless import loaded {', '.join(gui)}")
+        failed = True
+    if best > args.budget:
+        print(f"FAIL: import time over budget by {best - args.budget:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
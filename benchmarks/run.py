@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from core.render.base import set_render_backend, NullRenderBackend
+from benchmarks.scenarios import SCENARIOS, DEFAULTS
+
+def _case_key(case: dict) -> tuple:
+    return (case["scenario"], case["agents"], case["objects"], case["hidden"], case["timesteps"])
+
+def _build(scenario: str, agents: int, objects: int, hidden: int, timesteps: int, generations: int, seed: int):
+    # Seed before construction, members draw their brains and colours when they are built
+    np.random.seed(seed)
+    random.seed(seed)
+    simulation = SCENARIOS[scenario](agents, objects, hidden)
+    simulation.log.setLevel(logging.WARNING)
+    simulation.runs = 1
+    simulation.generations = generations
+    simulation.timesteps = timesteps
+    simulation.sleep_betwen_logs = 0.0
+    simulation.seed = seed
+    return simulation
+
+def _run(simulation) -> list[float]:
+    """
+    Runs the simulation to completion, returns the wall time of every generation
+    """
+    simulation.initialise()
+    simulation.begin_simulation()
+    generation_times = []
+    start = time.perf_counter()
+    generation = simulation._generation
+    complete = False
+    while not complete:
+        complete = simulation.update()
+        if complete or simulation._generation != generation:
+            now = time.perf_counter()
+            generation_times.append(now - start)
+            start, generation = now, simulation._generation
+    return generation_times
+
+def run_case(
+    scenario: str,
+    agents: int = None,
+    objects: int = None,
+    hidden: int = None,
+    timesteps: int = 200,
+    generations: int = 2,
+    seed: int = 0,
+    memory: bool = True
+) -> dict:
+    """
+    One timed run and (optionally) one run under tracemalloc of the same seeded scenario
+    """
+    default_agents, default_objects, default_hidden = DEFAULTS[scenario]
+    agents = default_agents if agents is None else agents
+    objects = default_objects if objects is None or default_objects is None else objects
+    hidden = default_hidden if hidden is None or default_hidden is None else hidden
+    
+    simulation = _build(scenario, agents, objects, hidden, timesteps, generations, seed)
+    simulation.enable_timing()
+    generation_times = _run(simulation)
+    steps = sum(timer.steps for timer in simulation.timing_record)
+    phases = {}
+    for timer in simulation.timing_record:
+        for phase, seconds in timer.totals.items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+    
+    case = {
+        "scenario": scenario,
+        "agents": agents,
+        "objects": objects,
+        "hidden": hidden,
+        "timesteps": timesteps,
+        "generations": generations,
+        "seed": seed,
+        "steps": steps,
+        "steps_per_second": steps / sum(generation_times),
+        "generation_seconds": generation_times,
+        "phase_seconds": phases,
+        "peak_memory_mb": None
+    }
+    
+    if memory:
+        # Separate run, tracemalloc slows allocation heavy code too much to time alongside it
+        simulation = _build(scenario, agents, objects, hidden, timesteps, 1, seed)
+        tracemalloc.start()
+        try:
+            _run(simulation)
+            case["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return case
+
+def compare(cases: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """
+    Slowdowns beyond tolerance (a fraction of the baseline steps/second) for every case in both sets
+    """
+    reference = { _case_key(case): case for case in baseline }
+    regressions = []
+    for case in cases:
+        base = reference.get(_case_key(case))
+        if base is None:
+            continue
+        ratio = case["steps_per_second"] / base["steps_per_second"]
+        case["baseline_ratio"] = ratio
+        if ratio < 1.0 - tolerance:
+            regressions.append(f"{case['scenario']} agents={case['agents']} objects={case['objects']}: "
+                               f"{ratio:.2f}x baseline steps/s")
+    return regressions
+
+def _print_case(case: dict) -> None:
+    memory = f"{case['peak_memory_mb']:8.1f} MB" if case["peak_memory_mb"] is not None else "       - MB"
+    ratio = f" {case['baseline_ratio']:5.2f}x" if "baseline_ratio" in case else ""
+    print(f"{case['scenario']:<12} {case['agents']:>6} {str(case['objects']):>7} {str(case['hidden']):>6} "
+          f"{case['steps_per_second']:10.1f} {np.mean(case['generation_seconds']):9.3f} s {memory}{ratio}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless, seeded benchmarks of the bundled demos")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"Any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--agents", type=int, nargs="+", default=[None],
+                        help="Agent counts, several values give a scaling curve (e.g. 10 100 1000 5000)")
+    parser.add_argument("--objects", type=int, nargs="+", default=[None])
+    parser.add_argument("--hidden", type=int, default=None, help="Hidden nodes of evolved brains")
+    parser.add_argument("--timesteps", type=int, default=200)
+    parser.add_argument("--generations", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed steps/s slowdown vs the baseline")
+    args = parser.parse_args()
+    for scenario in args.scenarios:
+        if scenario not in SCENARIOS:
+            parser.error(f"unknown scenario {scenario}")
+    
+    set_render_backend(NullRenderBackend())
+    print(f"{'scenario':<12} {'agents':>6} {'objects':>7} {'hidden':>6} {'steps/s':>10} {'gen time':>11} {'peak mem':>11}")
+    cases = []
+    for scenario in args.scenarios:
+        for agents in args.agents:
+            for objects in args.objects:
+                case = run_case(scenario, agents, objects, args.hidden, args.timesteps,
+                                args.generations, args.seed, not args.no_memory)
+                cases.append(case)
+                _print_case(case)
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(cases, json.load(f)["cases"], args.tolerance)
+        print("\nAgainst baseline:")
+        for case in cases:
+            _print_case(case)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "machine": platform.machine(),
+                "cases": cases
+            }, f, indent=4)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
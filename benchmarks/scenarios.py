@@ -0,0 +1,85 @@
+from core.simulation import Simulation
+from core.evolve.base import Group
+from core.evolve.population import Population
+from core.evolve.genetic_algorithm import GeneticAlgorithm
+from core.utils import GA_SELECTION_TYPE
+from demos import mouse, evo_mouse, chase, braitenberg
+
+# Scenario name: defaults for (agents, objects, hidden nodes), None where the demo has no such knob
+DEFAULTS = {
+    "mouse": (30, 30, None),
+    "evo_mouse": (30, 30, 10),
+    "chase": (20, None, 4),
+    "braitenberg": (2, 37, None)
+}
+
+def _resized(agent_type: type, hidden: int) -> type:
+    """
+    Subclass of a demo agent whose brain has the given number of hidden nodes
+    """
+    def __init__(self):
+        agent_type.__init__(self)
+        self.add_brain(hidden)
+    return type(agent_type.__name__, (agent_type,), {"__init__": __init__})
+
+def _even(n: int) -> int:
+    # The genetic algorithm breeds in pairs, so evolved populations are rounded up to an even size
+    return max(2, n + n % 2)
+
+def _genetic_algorithm() -> GeneticAlgorithm:
+    return GeneticAlgorithm(0.25, 0.1, selection=GA_SELECTION_TYPE.ROULETTE)
+
+def build_mouse(agents: int, objects: int, hidden: int) -> Simulation:
+    simulation = mouse.MouseSimulation()
+    simulation.contents.clear()
+    simulation.add("mice", Group(agents, mouse.Mouse))
+    simulation.add("cheeses", Group(objects, mouse.Cheese))
+    return simulation
+
+def build_evo_mouse(agents: int, objects: int, hidden: int) -> Simulation:
+    simulation = evo_mouse.EvoMouseSimulation()
+    simulation.contents.clear()
+    simulation.add("mice", Population(_even(agents), _resized(evo_mouse.EvoMouse, hidden), _genetic_algorithm()))
+    simulation.add("cheese", Group(objects, evo_mouse.Cheese))
+    return simulation
+
+def build_chase(agents: int, objects: int, hidden: int) -> Simulation:
+    # Half prey, half predators, every member takes part in the single assessment
+    simulation = chase.ChaseSimulation()
+    simulation.contents.clear()
+    simulation.assessments = 1
+    prey = predators = _even(agents // 2)
+    simulation.add("prey", Population(prey, _resized(chase.Prey, hidden), _genetic_algorithm(), team_size=prey))
+    simulation.add("predator", Population(predators, _resized(chase.Predator, hidden), _genetic_algorithm(), team_size=predators))
+    return simulation
+
+class BraitenbergBenchmark(braitenberg.BraitenbergSimulation):
+    """
+    The Braitenberg track with any number of vehicles and dots, dots beyond the track are placed at random
+    """
+    def __init__(self, agents: int, objects: int):
+        super().__init__()
+        self.agents = agents
+        self.objects = objects
+    
+    def begin_assessment(self):
+        for i in range(self.agents):
+            self.world.add_object(braitenberg.Braitenberg2a() if i % 2 == 0 else braitenberg.Braitenberg2b())
+        
+        for i in range(self.objects):
+            if i < len(braitenberg.DOT_POSITIONS):
+                self.world.add_object(braitenberg.Dot(braitenberg.DOT_POSITIONS[i]))
+            else:
+                self.world.add_object(braitenberg.Dot(self.world.random_location()))
+        
+        Simulation.begin_assessment(self)
+
+def build_braitenberg(agents: int, objects: int, hidden: int) -> Simulation:
+    return BraitenbergBenchmark(agents, objects)
+
+SCENARIOS = {
+    "mouse": build_mouse,
+    "evo_mouse": build_evo_mouse,
+    "chase": build_chase,
+    "braitenberg": build_braitenberg
+}
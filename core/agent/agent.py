@@ -1,19 +1,30 @@
 import numpy as np
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from core.render.lazy import gl, glu
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
 from core.world.drawable import Drawable
 from core.sensor.base import Sensor
 from core.world.world_object import WorldObject
 from core.world.trail import Trail
+from core.world.kinematics import KinematicField
+from core.world.geometry import displacement
 from core.utils import Vec2, AgentSettings as AS, AGENT_COLOURS, AgentPart, length_angle_to_vector, random_colour, normalise_vector, get_reciprocal
 
 class Agent(WorldObject):
     __metaclass__ = ABCMeta
     _count = 0
     
+    # Kept in the world's KinematicStore once the agent has been added to a world
+    location = KinematicField("location")
+    velocity = KinematicField("velocity")
+    orientation = KinematicField("orientation")
+    _min_speed = KinematicField("min_speed")
+    _max_speed = KinematicField("max_speed")
+    _max_rotate = KinematicField("max_rotate")
+    _timestep = KinematicField("timestep")
+    distance_travelled = KinematicField("distance_travelled")
+    power_used = KinematicField("power_used")
+    
     def __init__(
         self,
         location: Vec2 = None,
@@ -42,7 +53,7 @@ class Agent(WorldObject):
         self._timestep = timestep
         self._random_colour = random_colour
         self._interaction_range = interaction_range
-        self._colours = AGENT_COLOURS
+        self._colours = AGENT_COLOURS.copy()
         self._colours[AgentPart.BODY] = self.colour
         
         self._collision_point: Vec2 = None
@@ -113,62 +124,52 @@ class Agent(WorldObject):
         self.sensors[name] = s
         s.owner = self
     
-    def update(self) -> None:
+    def _control_value(self, name: str) -> float:
+        control = self.controls[name]
+        if callable(control):
+            return control()
+        assert isinstance(control, (float, int, np.number))
+        return control
+    
+    def begin_update(self) -> None:
+        """
+        Runs the controller and hands the chosen controls to the kinematic store
+        """
         self.control()
-        dt = self._timestep
-        if callable(self.controls["left"]):
-            control_left = self.controls["left"]()
-        elif isinstance(self.controls["left"], float):
-            control_left = self.controls["left"]
-        else:
-            assert False
-        if callable(self.controls["right"]):
-            control_right = self.controls["right"]()
-        elif isinstance(self.controls["right"], float):
-            control_right = self.controls["right"]
-        else:
-            assert False
-        
-        self.offset_orientation(self._max_rotate * (control_left - control_right) * dt)
-        self.velocity += length_angle_to_vector(
-            (self._max_speed - self._min_speed) * 0.5 * (control_left + control_right) + self._min_speed,
-            self.orientation
+        self._kinematic_store.controls[self._kinematic_slot] = (
+            self._control_value("left"),
+            self._control_value("right")
         )
-        
-        # 150 * 0.5 * (co)
-        
-        if self._max_speed > 0.0:
-            self.velocity -= self.velocity * (1.0 / self._max_speed) * AS.DRAG
-        
-        if np.linalg.norm(self.velocity)**2 > self._max_speed**2:
-            self.velocity = normalise_vector(self.velocity) * self._max_speed
-        self.location += self.velocity * dt
-        
-        # Clear trails whilst agent transported during update
-        while self.location[0] < 0:
-            self.location[0] = self.location[0] + self.world._display_params.width
-            self.trail.clear()
-        while self.location[0] >= self.world._display_params.width:
-            self.location[0] = self.location[0] - self.world._display_params.width
-            self.trail.clear()
-        while self.location[1] < 0:
-            self.location[1] = self.location[1] + self.world._display_params.height
-            self.trail.clear()
-        while self.location[1] >= self.world._display_params.height:
-            self.location[1] = self.location[1] - self.world._display_params.height
+    
+    def end_update(self, wrapped: bool) -> None:
+        # Trails are only recorded while they can be seen
+        if self.world._record_trails:
+            # Clear trails whilst agent transported during update
+            if wrapped:
+                self.trail.clear()
+            self.trail.append(self.location)
+            self.trail.update()
+        elif len(self.trail):
             self.trail.clear()
-        
+        super().update()
+    
+    def update_sensors(self) -> None:
+        """
+        Moves the sensors to the agent's new pose, after end_update
+        """
         for sensor in self.sensors.values():
             sensor.update()
-        
-        self.distance_travelled += np.linalg.norm(self.velocity) * dt
-
-        for control in self.controls.values():
-            self.power_used += ((self._max_speed - self._min_speed) * abs(control) + self._min_speed)
-        
-        self.trail.append(deepcopy(self.location))
-        self.trail.update()
-        super().update()
+    
+    def update(self) -> None:
+        self.begin_update()
+        slot = self._kinematic_slot
+        wrapped = self._kinematic_store.integrate(
+            self.world._display_params.width,
+            self.world._display_params.height,
+            slice(slot, slot + 1)
+        )
+        self.end_update(bool(wrapped[0]))
+        self.update_sensors()
     
     def reset(self):
         super().reset()
@@ -184,63 +185,76 @@ class Agent(WorldObject):
         pass
     
     def interact(self, other: WorldObject) -> None:
-        if np.linalg.norm(self.location - other.location) <= self._interaction_range:
+        # The shortest way to other, which may cross the world's edge
+        vec_to_other = displacement(self.location, other.location, self.world.size)
+        if vec_to_other @ vec_to_other <= self._interaction_range**2:
             if isinstance(other, Agent):
                 self.sensor_interact(other)
             
-            if self.is_touching(other):
+            if self.is_touching(other, vec_to_other):
                 if self.solid and other.solid:
                     if hasattr(other, "velocity"):
                         ov = other.velocity
                     else:
                         ov = 0.0
                     average_velocity = (self.velocity + ov) * 0.5
-                    vec_to_other = other.location - self.location
                     min_distance = self.radius + other.radius
                     self.velocity = average_velocity
                     if hasattr(other, "velocity"):
                         other.velocity = average_velocity
                     
-                    self.location += normalise_vector(get_reciprocal(vec_to_other)) * (min_distance - np.linalg.norm(vec_to_other))
+                    self.location = self.location + normalise_vector(get_reciprocal(vec_to_other)) * (min_distance - np.linalg.norm(vec_to_other))
                     if hasattr(other, "velocity"):
-                        other.location += normalise_vector(vec_to_other) * (min_distance - np.linalg.norm(vec_to_other))
+                        other.location = other.location + normalise_vector(vec_to_other) * (min_distance - np.linalg.norm(vec_to_other))
                 self.on_collision(other)
                 other.on_collision(self)
                 self.world.add_collision(self._collision_point)
             else:
                 self.sensor_interact(other)
-                if self.is_touching(other):
+                if self.is_touching(other, vec_to_other):
                     self.locaton += self._collision_normal * (self.radius - np.linalg.norm(self.location - self._collision_point))
                     self.on_collision(other)
                     other.on_collision(self)
                     self.world.add_collision(self._collision_point)
         super().interact(other) # WorldObject does not implement interact
     
-    def is_touching(self, other: WorldObject) -> bool:
-        vec_to_other = other.location - self.location
+    def is_touching(self, other: WorldObject, vec_to_other: Vec2 = None) -> bool:
+        if vec_to_other is None:
+            vec_to_other = displacement(self.location, other.location, self.world.size)
         min_distance = self.radius + other.radius
-        if np.linalg.norm(vec_to_other)**2 > min_distance**2:
+        if vec_to_other @ vec_to_other > min_distance**2:
             return False
-        self._collision_point, self._collision_normal = other.nearest_point(self.location)
+        # Whole world sizes between other and the copy of it touching this agent
+        shift = other.location - self.location - vec_to_other
+        self._collision_point, self._collision_normal = other.nearest_point(self.location + shift)
+        self._collision_point = self._collision_point - shift
         return other.circular or self.is_inside(self._collision_point)
     
     
     def sensor_interact(self, other: WorldObject) -> None:
         for s in self.sensors.values():
-            s.interact(other)
+            if not s.batched:
+                s.interact(other)
     
-    def display(self) -> None:
+    def state_objects(self) -> list:
+        parts = [self, self.trail]
+        for sensor in self.sensors.values():
+            parts.extend(sensor.state_objects())
+        return parts
+    
+    def display_sensors(self) -> None:
         if self.world._display_params.config & self.world._display_type.DISPLAY_SENSORS != 0:
             for s in self.sensors.values():
                 s.display()
-        if self.world._display_params.config & self.world._display_type.DISPLAY_TRAILS != 0:
-            try:
-                self.trail.display()
-            except:
-                pass
+    
+    def display(self) -> None:
+        self.display_sensors()
         if self.world._display_params.config:
             super().display()
     
+    def display_state(self) -> tuple:
+        return super().display_state() + (np.asarray(self._colours, np.float64).tobytes(),)
+    
     def draw(self) -> None:
         # TODO: Weird extra code skipped
         temp_color = self.colour
@@ -248,35 +262,72 @@ class Agent(WorldObject):
         self.colour = temp_color
         
         # Centre
-        glColor4fv(self._colours[AgentPart.CENTRE])
-        disk = gluNewQuadric()
-        gluQuadricDrawStyle(disk, GLU_FILL)
-        gluDisk(disk, 0, (self.radius / 0.85) - 4.0, 20, 1)
-        gluDeleteQuadric(disk)
+        gl.glColor4fv(self._colours[AgentPart.CENTRE])
+        disk = glu.gluNewQuadric()
+        glu.gluQuadricDrawStyle(disk, glu.GLU_FILL)
+        glu.gluDisk(disk, 0, (self.radius / 0.85) - 4.0, 20, 1)
+        glu.gluDeleteQuadric(disk)
         
         # Arrow
-        glColor4fv(self._colours[AgentPart.ARROW])
-        glLineWidth(1.0)
-        glBegin(GL_LINE_STRIP)
-        glVertex2d(0.0, self.radius / 2.0)
-        glVertex2d(self.radius / 1.5, 0.0)
-        glVertex2d(0.0, self.radius / -2.0)
-        glEnd()
+        gl.glColor4fv(self._colours[AgentPart.ARROW])
+        gl.glLineWidth(1.0)
+        gl.glBegin(gl.GL_LINE_STRIP)
+        gl.glVertex2d(0.0, self.radius / 2.0)
+        gl.glVertex2d(self.radius / 1.5, 0.0)
+        gl.glVertex2d(0.0, self.radius / -2.0)
+        gl.glEnd()
         
         # Right Wheel
-        glColor4fv(self._colours[AgentPart.WHEEL])
-        glLineWidth(4.0)
-        glBegin(GL_LINE_STRIP)
-        glVertex2d(self.radius / -2.0, 2.0 - self.radius)
-        glVertex2d(self.radius / 2.0, 2.0 - self.radius)
-        glEnd()
+        gl.glColor4fv(self._colours[AgentPart.WHEEL])
+        gl.glLineWidth(4.0)
+        gl.glBegin(gl.GL_LINE_STRIP)
+        gl.glVertex2d(self.radius / -2.0, 2.0 - self.radius)
+        gl.glVertex2d(self.radius / 2.0, 2.0 - self.radius)
+        gl.glEnd()
         
         # Left Wheel
-        glColor4fv(self._colours[AgentPart.WHEEL])
-        glLineWidth(4.0)
-        glBegin(GL_LINE_STRIP)
-        glVertex2d(self.radius / -2.0, self.radius - 2.0)
-        glVertex2d(self.radius / 2.0, self.radius - 2.0)
-        glEnd()
+        gl.glColor4fv(self._colours[AgentPart.WHEEL])
+        gl.glLineWidth(4.0)
+        gl.glBegin(gl.GL_LINE_STRIP)
+        gl.glVertex2d(self.radius / -2.0, self.radius - 2.0)
+        gl.glVertex2d(self.radius / 2.0, self.radius - 2.0)
+        gl.glEnd()
+    
+    @classmethod
+    def batch_geometry(cls, agents: list["Agent"]) -> list[tuple[int, float, np.ndarray, np.ndarray]]:
+        parts = super().batch_geometry(agents)
+        radius = np.array([ agt.radius for agt in agents ], np.float32)[:, None, None]
+        colours = np.array([ agt._colours for agt in agents ], np.float32)
+        
+        def part_colours(part: int, vertices: int) -> np.ndarray:
+            return np.repeat(colours[:, part][:, None], vertices, axis=1)
+        
+        # Centre, as the triangles of a 20 slice disk
+        angles = np.arange(21) * 2 * np.pi / 20
+        ring = np.stack((np.sin(angles), np.cos(angles)), axis=1)
+        triangles = np.stack((np.zeros((20, 2)), ring[:-1], ring[1:]), axis=1).reshape(-1, 2)
+        centre = ((radius / 0.85) - 4.0) * triangles
+        parts.append((gl.GL_TRIANGLES, 1.0, centre, part_colours(AgentPart.CENTRE, 60)))
+        
+        # Arrow, as two line segments
+        arrow = np.array([[0.0, 0.5], [1 / 1.5, 0.0], [1 / 1.5, 0.0], [0.0, -0.5]]) * radius
+        parts.append((gl.GL_LINES, 1.0, arrow, part_colours(AgentPart.ARROW, 4)))
+        
+        # Wheels, right then left
+        offset = np.array([[0.0, 2.0], [0.0, 2.0], [0.0, -2.0], [0.0, -2.0]])
+        wheels = np.array([[-0.5, -1.0], [0.5, -1.0], [-0.5, 1.0], [0.5, 1.0]]) * radius + offset
+        parts.append((gl.GL_LINES, 4.0, wheels, part_colours(AgentPart.WHEEL, 4)))
+        return parts
+    
+    def serialise(self) -> dict[str, np.ndarray]:
+        data = super().serialise()
+        # Kept at full precision, it is computed outside the float32 kinematic store
+        velocity = self._start_velocity
+        data["start_velocity"] = np.full(2, np.nan) if velocity is None else np.array(velocity, dtype=np.float64)
+        return data
     
-    # TODO: Serialise/Unserialise?
\ No newline at end of file
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        super().unserialise(data)
+        if "start_velocity" in data:
+            velocity = data["start_velocity"]
+            self._start_velocity = None if np.isnan(velocity).any() else velocity.copy()
\ No newline at end of file
@@ -1,4 +1,4 @@
-from OpenGL.GL import *
+from core.render.lazy import gl
 
 from core.agent.agent import Agent
 from core.utils import ColourPalette, ColourType as CT
@@ -7,6 +7,8 @@ from core.evolve.evolver import Evolver
 class FFNAgent(NeuralAgent):
     def __init__(self):
         super().__init__()
+        # Set by BrainBatch when this step's outputs were computed with the rest of the world
+        self._brain_ready: bool = False
         
     def add_brain(
         self,
@@ -26,10 +28,15 @@ class FFNAgent(NeuralAgent):
         self.brain.randomise()
         self._has_brain = True
     
-    def brain_output(self):
+    def brain_input(self) -> None:
         for i, sensor in enumerate(self.sensors.values()):
             self.brain.input_values[i] = sensor.output()
-            i += 1
+    
+    def brain_output(self):
+        if self._brain_ready:
+            self._brain_ready = False
+            return self.brain.output_values
+        self.brain_input()
         self.brain.fire()
         return self.brain.output_values
     
@@ -37,6 +44,9 @@ class FFNAgent(NeuralAgent):
         outputs = self.brain_output()
         for control, output in zip(self.controls.keys(), outputs):
             self.controls[control] = output
+    
+    def state_objects(self) -> list:
+        return super().state_objects() + ([self.brain] if self._has_brain else [])
 
     # TODO: Serialise/deserialise?
 
@@ -47,20 +57,7 @@ class EvolvableFFNAgent(FFNAgent, Evolver):
     
     def set_genotype(self, genome: list[float]):
         assert len(genome) == self.brain.number_weights, "Genome parameters must equal network weight quantity"
-        input_to_hidden = genome[:self.brain._input_to_hidden].reshape(
-            (self.brain._hiddden_nodes, self.brain._inputs + (1 if self.brain._bias else 0))
-        )
-        hidden_to_output = genome[self.brain._input_to_hidden:].reshape(
-            (self.brain._outputs, self.brain._hiddden_nodes + (1 if self.brain._bias else 0))
-        )
-        self.brain.set_configuration({
-            "hidden": input_to_hidden,
-            "output": hidden_to_output
-        })
+        self.brain.set_weights(genome)
 
     def get_genotype(self) -> list[float]:
-        config = self.brain.get_configuration()
-        return np.concatenate((
-            np.array(config["hidden"]).flatten(),
-            np.array(config["output"]).flatten()
-        ))
\ No newline at end of file
+        return self.brain.get_weights()
\ No newline at end of file
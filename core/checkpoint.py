@@ -0,0 +1,52 @@
+import os
+import random
+import numpy as np
+
+def _rng_arrays() -> dict[str, np.ndarray]:
+    name, keys, position, has_gauss, cached_gauss = np.random.get_state()
+    version, state, gauss_next = random.getstate()
+    return {
+        "rng/numpy_keys": keys,
+        "rng/numpy_position": np.array([position, has_gauss], dtype=np.int64),
+        "rng/numpy_gauss": np.array(cached_gauss, dtype=np.float64),
+        "rng/random_state": np.array(state, dtype=np.int64),
+        "rng/random_version": np.array(version, dtype=np.int64),
+        "rng/random_gauss": np.array(np.nan if gauss_next is None else gauss_next, dtype=np.float64)
+    }
+
+def _set_rng(data: dict[str, np.ndarray]) -> None:
+    position, has_gauss = data["rng/numpy_position"].tolist()
+    np.random.set_state(("MT19937", data["rng/numpy_keys"], position, has_gauss, float(data["rng/numpy_gauss"])))
+    gauss = float(data["rng/random_gauss"])
+    random.setstate((
+        int(data["rng/random_version"]),
+        tuple(data["rng/random_state"].tolist()),
+        None if np.isnan(gauss) else gauss
+    ))
+
+def save_checkpoint(simulation, path: str) -> None:
+    """
+    Writes counters, RNG states and every simulation object's serialise() arrays to one npz file
+    
+    The file is written beside the target and then renamed, so a crash never leaves a torn checkpoint.
+    """
+    arrays = _rng_arrays()
+    arrays["counters"] = np.array([simulation._run, simulation._generation, simulation._assessment], dtype=np.int64)
+    for name, obj in simulation.contents.items():
+        for key, value in obj.serialise().items():
+            arrays[f"{name}/{key}"] = value
+    
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(temporary, path)
+
+def load_checkpoint(simulation, path: str) -> None:
+    with np.load(path, allow_pickle=False) as checkpoint:
+        data = { key: checkpoint[key] for key in checkpoint.files }
+    
+    simulation._run, simulation._generation, simulation._assessment = data["counters"].tolist()
+    for name, obj in simulation.contents.items():
+        prefix = f"{name}/"
+        obj.unserialise({ k[len(prefix):]: v for k, v in data.items() if k.startswith(prefix) })
+    _set_rng(data)
@@ -7,21 +7,28 @@ from core.world.world import World
 from core.world.world_object import WorldObject
 
 class MutationOperator(ABC):
+    """
+    Returns a mutated copy of one gene, or of every gene in an array at once when vectorised
+    """
+    vectorised: bool = False
+    
     @abstractmethod
-    def __call__(self):
+    def __call__(self, t: float) -> float:
         pass
 
 class UniformMutator(MutationOperator):
+    vectorised = True
     def __init__(self, minimum: float = -0.2, maximum: float = 0.2):
         self.minimum, self.maximum = minimum, maximum
-    def __call__(self, t: float) -> float:
-        return t + np.random.uniform(self.minimum, self.maximum)
+    def __call__(self, t: float | np.ndarray) -> float | np.ndarray:
+        return t + np.random.uniform(self.minimum, self.maximum, np.shape(t))
 
 class NormalMutator(MutationOperator):
+    vectorised = True
     def __init__(self, mu: float = 0.0, sigma: float = 0.1):
         self.mu, self.sigma = mu, sigma
-    def __call__(self, t: float):
-        return t + np.random.normal(self.mu, self.sigma)
+    def __call__(self, t: float | np.ndarray) -> float | np.ndarray:
+        return t + np.random.normal(self.mu, self.sigma, np.shape(t))
 
 
 class SimulationObject(ABC):
@@ -44,7 +51,21 @@ class SimulationObject(ABC):
     def add_to_world(self) -> None:
         pass
     
-    # TODO: Serialise/unserialise? Save/load?
+    def state_objects(self) -> list:
+        """
+        Every object whose attributes make up this one's simulation state, for snapshots
+        """
+        return [self]
+    
+    def serialise(self) -> dict[str, np.ndarray]:
+        """
+        State worth keeping across a checkpoint, as named arrays
+        """
+        return {}
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        pass
+    
     
 class Group(SimulationObject):
     def __init__(
@@ -73,7 +94,24 @@ class Group(SimulationObject):
         for m in self.members:
             m.reset()
     
-    # TODO: Serialise/unserialise?
+    def state_objects(self) -> list:
+        return [self] + [ part for m in self.members for part in m.state_objects() ]
+    
+    def serialise(self) -> dict[str, np.ndarray]:
+        """
+        Member drawable state stacked per attribute, members[i] is row i
+        """
+        if not self.members or not hasattr(self.members[0], "serialise"):
+            return {}
+        states = [ m.serialise() for m in self.members ]
+        return { f"members.{key}": np.stack([ s[key] for s in states ]) for key in states[0] }
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        for i, member in enumerate(self.members):
+            state = { k[len("members."):]: v[i] for k, v in data.items() if k.startswith("members.") }
+            if state:
+                member.unserialise(state)
+    
     
 Genotype = list[float]
 EVO = TypeVar("evo", bound=Evolver)
\ No newline at end of file
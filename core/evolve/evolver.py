@@ -22,8 +22,20 @@ class Evolver(ABC):
         else:
             return 0.0
     
-    def store_fitness(self):
-        self._fitness_scores.append(self.get_fitness())
+    def clear_fitness(self) -> None:
+        """
+        Forgets every assessment, for a member reused with a new genotype
+        """
+        self._fitness_scores.clear()
+        self._probability = 0.0
+        self._fitness = 0.0
+        self._fixed_fitness = 0.0
+    
+    def store_fitness(self, fitness: float = None):
+        """
+        Records this assessment's fitness, or one computed elsewhere (e.g. by a worker process)
+        """
+        self._fitness_scores.append(self.get_fitness() if fitness is None else fitness)
     
     @abstractmethod
     def set_genotype(self, genotype: Genotype):
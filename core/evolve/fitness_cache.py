@@ -0,0 +1,87 @@
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from core.evolve.base import Genotype
+from core.utils import FITNESS_CACHE_POLICY
+
+class FitnessCache:
+    """
+    Least recently used memo of fitness by genotype and assessment context
+    
+    A context (see context()) is everything else that decides a member's fitness: the seed the
+    assessment was run from and the genotypes of all members assessed with it, teammates and
+    opponents alike, so fitness is only reused against the same company. Assessments without one
+    (None) share entries, which only suits single member assessments whose fitness doesn't depend
+    on the scenario, or the AVERAGE policy.
+    """
+    def __init__(
+        self,
+        max_size: int = 4096,
+        policy: int = FITNESS_CACHE_POLICY.REUSE,
+        samples: int = 5
+    ):
+        self.max_size = max_size
+        self.policy = policy
+        # AVERAGE policy only, how many samples are taken before the mean is reused
+        self.samples = samples
+        
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: OrderedDict[bytes, list[float]] = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @staticmethod
+    def context(scenario: int | None, genotypes: list[Genotype]) -> bytes:
+        """
+        Context of an assessment run from the scenario seed with these genotypes, in team order
+        """
+        key = hashlib.blake2b(str(scenario).encode(), digest_size=16)
+        for genotype in genotypes:
+            genotype = np.asarray(genotype, dtype=np.float64)
+            key.update(np.int64(genotype.size).tobytes())
+            key.update(genotype.tobytes())
+        return key.digest()
+    
+    def _key(self, genotype: Genotype, context: bytes | None) -> bytes:
+        key = hashlib.blake2b(np.asarray(genotype, dtype=np.float64).tobytes(), digest_size=16)
+        key.update(b"-" if context is None else context)
+        return key.digest()
+    
+    def lookup(self, genotype: Genotype, context: bytes = None) -> float | None:
+        """
+        Fitness to use instead of assessing this genotype in this context, or None if it needs assessing
+        """
+        if self.policy == FITNESS_CACHE_POLICY.BYPASS:
+            return None
+        key = self._key(genotype, context)
+        scores = self._entries.get(key)
+        if scores is None or (self.policy == FITNESS_CACHE_POLICY.AVERAGE and len(scores) < self.samples):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return sum(scores) / len(scores)
+    
+    def store(self, genotype: Genotype, fitness: float, context: bytes = None) -> float:
+        """
+        Records a fitness assessed in a context, returns the fitness the genotype should be given for it
+        """
+        if self.policy == FITNESS_CACHE_POLICY.BYPASS:
+            return fitness
+        key = self._key(genotype, context)
+        scores = self._entries.get(key)
+        if scores is None or self.policy == FITNESS_CACHE_POLICY.REUSE:
+            scores = self._entries[key] = [fitness]
+        else:
+            scores.append(fitness)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return sum(scores) / len(scores)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
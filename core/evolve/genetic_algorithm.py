@@ -1,4 +1,3 @@
-import random
 import numpy as np
 
 from abc import ABC
@@ -71,32 +70,135 @@ class GeneticAlgorithm(ABC):
         self._calculate_stats()
         self._setup()
         
+        culled = []
         if self.culling > 0:
             for _ in range(self.culling):
-                self.population.members.pop()
-        if self.elitism > 0:
-            for evo in self.population.members[:self.elitism]:
-                new_evo = self.add_member()
-                new_evo.initialise()
-                new_evo.set_genotype(evo.get_genotype())
-                self.output_population.append(new_evo)
+                culled.append(self.population.members.pop())
         
-        for _ in range((self.output_population_size - self.elitism) // 2):
-            mother = self.select_parent_genotype()
-            father = self.select_parent_genotype()
-            for _ in range(self.crossover_points):
-                if random.random() < self.crossover:
-                    mother, father = self.crossover_genotypes(mother, father)
-            self.mutate_genotype(mother)
-            self.mutate_genotype(father)
-            
-            evo1 = self.add_member()
-            evo2 = self.add_member()
-            evo1.set_genotype(mother)
-            evo2.set_genotype(father)
-            self.output_population.append(evo1)
-            self.output_population.append(evo2)
-                
+        # Whole population as one (members, chromosome length) array
+        genomes = np.array([ evo.get_genotype() for evo in self.population.members ], dtype=np.float64)
+        assert genomes.shape[1] == self.chromosome_length, "All genotypes must share one length"
+        
+        pairs = (self.output_population_size - self.elitism) // 2
+        mothers = genomes[self.select_parents(pairs)]
+        fathers = genomes[self.select_parents(pairs)]
+        mothers, fathers = self.crossover_population(mothers, fathers)
+        children = np.stack((mothers, fathers), axis=1).reshape(-1, self.chromosome_length)
+        children = self.mutate_population(children)
+        
+        # The input members are reused for the output, only their genotypes and fitness change
+        reusable = self.population.members + culled
+        for i, genome in enumerate(np.concatenate((genomes[:self.elitism], children))):
+            evo = reusable[i] if i < len(reusable) else self.add_member()
+            evo.set_genotype(genome)
+            evo.clear_fitness()
+            self.output_population.append(evo)
+    
+    def breed(self, members: list[EVO], n: int) -> np.ndarray:
+        """
+        n mutated children of the given assessed members, for steady-state evolution
+        """
+        self.worst_fitness = min(self.get_fitness(evo) for evo in members)
+        self.fix_fitness(members)
+        members = sorted(members, key=lambda x: x._fixed_fitness, reverse=True)
+        self._assign_probabilities(members)
+        
+        genomes = np.array([ evo.get_genotype() for evo in members ], dtype=np.float64)
+        pairs = (n + 1) // 2
+        mothers = genomes[self.select_parents(pairs, members)]
+        fathers = genomes[self.select_parents(pairs, members)]
+        mothers, fathers = self.crossover_population(mothers, fathers)
+        children = np.stack((mothers, fathers), axis=1).reshape(-1, genomes.shape[1])[:n]
+        return self.mutate_population(children)
+    
+    def record_window(self, fitness: list[float], genomes: list[Genotype]) -> None:
+        """
+        Adds one record of the average and best fitness over a sliding window of steady-state assessments
+        """
+        best = int(np.argmax(fitness))
+        self.generations += 1
+        self._average_fitness_record.append(float(np.mean(fitness)))
+        self._best_fitness_record.append(fitness[best])
+        self.best_fitness = fitness[best]
+        self._best_current_genome = genomes[best]
+        if self.best_fitness > self._best_ever_fitness:
+            self._best_ever_fitness = self.best_fitness
+            self._best_ever_genome = self._best_current_genome
+    
+    def select_parents(self, n: int, members: list[EVO] = None) -> np.ndarray:
+        """
+        Indices of n parents drawn from the (fitness sorted) population in one go
+        """
+        members = self.population.members if members is None else members
+        if self.selection in [GA_SELECTION_TYPE.ROULETTE, GA_SELECTION_TYPE.RANK]:
+            return self._select_probability(n, members)
+        elif self.selection == GA_SELECTION_TYPE.TOURNAMENT:
+            return self._select_tournament(n, members)
+        raise ValueError(f"Unknown selection type {self.selection}")
+    
+    def _select_probability(self, n: int, members: list[EVO]) -> np.ndarray:
+        probabilities = np.clip([ evo._probability for evo in members ], 0.0, None)
+        total = probabilities.sum()
+        if total > 0:
+            return np.random.choice(len(members), n, p=probabilities / total)
+        return np.random.randint(len(members), size=n)
+    
+    def _select_tournament(self, n: int, members: list[EVO]) -> np.ndarray:
+        size = min(self._int_params.TOURNAMENT_SIZE, len(members))
+        fitness = np.array([ evo._fixed_fitness for evo in members ], dtype=np.float64)
+        rows = np.arange(n)
+        entrants = np.argsort(np.random.rand(n, len(members)), axis=1)[:, :size]
+        best = entrants[rows, np.argmax(fitness[entrants], axis=1)]
+        anyone = entrants[rows, np.random.randint(size, size=n)]
+        return np.where(np.random.rand(n) < self._float_params.TOURNAMENT, best, anyone)
+    
+    def select_parent_genotype(self) -> Genotype:
+        return self.population.members[int(self.select_parents(1)[0])].get_genotype()
+    
+    def select_probability(self) -> Genotype:
+        members = self.population.members
+        return members[int(self._select_probability(1, members)[0])].get_genotype()
+    
+    def select_tournament(self) -> Genotype:
+        members = self.population.members
+        return members[int(self._select_tournament(1, members)[0])].get_genotype()
+    
+    def crossover_population(self, mothers: np.ndarray, fathers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Single point crossover of every (mother, father) row pair, repeated crossover_points times
+        """
+        pairs, length = mothers.shape
+        for _ in range(self.crossover_points):
+            swap = np.random.rand(pairs) < self.crossover
+            points = np.random.randint(0, length, size=pairs)
+            mothers, fathers = self._swap_tails(mothers, fathers, swap, points)
+        return mothers, fathers
+    
+    def _swap_tails(self, mothers: np.ndarray, fathers: np.ndarray, swap: np.ndarray, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        tails = swap[:, None] & (np.arange(mothers.shape[1])[None, :] >= points[:, None])
+        return np.where(tails, fathers, mothers), np.where(tails, mothers, fathers)
+    
+    def crossover_genotypes(self, mother: Genotype, father: Genotype) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Both children of one single point crossover, which always happens
+        """
+        mothers, fathers = np.atleast_2d(np.asarray(mother)), np.atleast_2d(np.asarray(father))
+        point = np.random.randint(0, mothers.shape[1], size=1)
+        children = self._swap_tails(mothers, fathers, np.ones(1, bool), point)
+        return children[0][0], children[1][0]
+    
+    def mutate_population(self, genomes: np.ndarray) -> np.ndarray:
+        """
+        Mutates each gene with probability self.mutation, in one call when the mutator is vectorised
+        and gene by gene otherwise
+        """
+        mask = np.random.rand(*genomes.shape) < self.mutation
+        if getattr(self.mutator, "vectorised", False):
+            return np.where(mask, self.mutator(genomes), genomes)
+        mutated = np.array(genomes, dtype=np.float64)
+        mutated[mask] = [ self.mutator(float(t)) for t in genomes[mask] ]
+        return mutated
+    
     def _calculate_stats(self) -> None:
         self.input_population_size = len(self.population.members)
         assert self.input_population_size % 2 == 0
@@ -136,24 +238,30 @@ class GeneticAlgorithm(ABC):
         
         self.fix_fitness()
         self.population.members.sort(key=lambda x: x._fixed_fitness, reverse=True)
+        self._assign_probabilities(self.population.members)
+    
+    def _assign_probabilities(self, members: list[EVO]) -> None:
+        """
+        Selection probabilities of members already sorted best first
+        """
         self.total_probability = 0
         
         if self.selection == GA_SELECTION_TYPE.ROULETTE:
-            for evo in self.population.members:
+            for evo in members:
                 if evo._fitness is None:
                     evo._probability = 0.0
                 else:
                     evo._probability = (evo._fixed_fitness / self.total_fixed_fitness) ** self._float_params.EXPONENT
                     self.total_probability += evo._probability
         if self.selection == GA_SELECTION_TYPE.RANK:
-            for rank, evo in enumerate(self.population.members):
+            for rank, evo in enumerate(members):
                 if evo._fitness is None:
                     evo._probability = 0.0
                 else:
-                    evo._probability = (1.0 - rank / (self.input_population_size - 1)) ** self._float_params.EXPONENT
+                    evo._probability = (1.0 - rank / (len(members) - 1)) ** self._float_params.EXPONENT
                     self.total_probability += evo._probability
         elif self.selection in [GA_SELECTION_TYPE.ROULETTE, GA_SELECTION_TYPE.RANK]:
-            for evo in self.population.members:
+            for evo in members:
                 evo._probability /= self.total_probability
         
     def clean(self) -> None:
@@ -167,12 +275,12 @@ class GeneticAlgorithm(ABC):
     def add_member(self) -> EVO:
         return self.population.typing(*self.population.args, **self.population.kwargs)
     
-    def fix_fitness(self) -> None:
+    def fix_fitness(self, members: list[EVO] = None) -> None:
         """
         Normalise according to self.fitness_fix
         """
         total_fixed_fitness = 0
-        for evo in self.population.members:
+        for evo in self.population.members if members is None else members:
             f = evo._fitness
             if f is None:
                 continue
@@ -186,36 +294,8 @@ class GeneticAlgorithm(ABC):
             total_fixed_fitness += f
         self.total_fixed_fitness = total_fixed_fitness
     
-    def select_parent_genotype(self) -> Genotype:
-        if self.selection in [GA_SELECTION_TYPE.ROULETTE, GA_SELECTION_TYPE.RANK]:
-            chromo = self.select_probability()
-        elif self.selection == GA_SELECTION_TYPE.TOURNAMENT:
-            chromo = self.select_tournament()
-        return chromo
-    
-    def select_probability(self) -> Genotype:
-        probabilities = [ evo._probability for evo in self.population.members ]
-        evo = random.choices(self.population.members, weights=probabilities, k=1)[0]
-        return evo.get_genotype()
-    
-    def select_tournament(self) -> Genotype:
-        tournament = random.sample(self.population.members, self._int_params.TOURNAMENT_SIZE)
-        if random.random() < self._float_params.TOURNAMENT_PARAM:
-            winner = max(tournament, key=lambda evo: evo._fixed_fitness)
-        else:
-            winner = random.choice(tournament)
-        return winner.get_genotype()
-    
-    def crossover_genotypes(self, mother: Genotype, father: Genotype):
-        crossover_point = random.randint(0, self.chromosome_length - 1)
-        child1 = np.concatenate((mother[:crossover_point], father[crossover_point:]))
-        child2 = np.concatenate((father[:crossover_point], mother[crossover_point:]))
-        return child1, child2
-    
     def mutate_genotype(self, genome: Genotype):
-        for i in range(len(genome)):
-            if random.random() < self.mutation:
-                genome[i] = self.mutator(genome[i])
+        genome[:] = self.mutate_population(np.asarray(genome, dtype=np.float64)[None, :])[0]
     
     def get_fitness(self, evo: EVO) -> float:
         if not evo._fitness_scores:
@@ -271,4 +351,20 @@ class GeneticAlgorithm(ABC):
         # TODO
         pass
     
-    # TODO: Serialise/unserialise?
\ No newline at end of file
+    def serialise(self) -> dict[str, np.ndarray]:
+        best_ever = self._best_ever_genome
+        return {
+            "generations": np.array(self.generations, dtype=np.int64),
+            "average_fitness_record": np.array(self._average_fitness_record, dtype=np.float64),
+            "best_fitness_record": np.array(self._best_fitness_record, dtype=np.float64),
+            "best_ever_fitness": np.array(self._best_ever_fitness, dtype=np.float64),
+            "best_ever_genome": np.array([] if best_ever is None else best_ever, dtype=np.float64),
+            "has_best_ever_genome": np.array(best_ever is not None)
+        }
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        self.generations = int(data["generations"])
+        self._average_fitness_record = data["average_fitness_record"].tolist()
+        self._best_fitness_record = data["best_fitness_record"].tolist()
+        self._best_ever_fitness = float(data["best_ever_fitness"])
+        self._best_ever_genome = data["best_ever_genome"].copy() if bool(data["has_best_ever_genome"]) else None
\ No newline at end of file
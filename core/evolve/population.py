@@ -1,7 +1,10 @@
+import numpy as np
+
 from copy import deepcopy
-from core.evolve.base import Group
+from core.evolve.base import Group, Genotype
 from core.evolve.evolver import Evolver
 from core.evolve.genetic_algorithm import GeneticAlgorithm
+from core.evolve.fitness_cache import FitnessCache
 from core.agent.agent import Agent
 
 class Population(Group):
@@ -12,6 +15,7 @@ class Population(Group):
         genetic_algorithm: GeneticAlgorithm,
         team_size: int = -1,
         *args,
+        fitness_cache: FitnessCache = None,
         **kwargs
     ):
         super().__init__(population_size, population_type, *args, **kwargs)
@@ -20,21 +24,48 @@ class Population(Group):
         
         self.team_size: int = team_size
         self.num_clones: int = 0
-        self.current = None
+        # Next member to join a team, members[_cursor:_cursor_end] (None for the end) are left this pass
+        self._cursor: int = 0
+        self._cursor_end: int = None
         self.team = []
+        # Clones made for earlier assessments, reused in order by clone()
+        self._clones = []
+        self._clone_cursor: int = 0
+        # Optional memo of fitness by genotype, _cached holds each pool member's cached fitness or None
+        self.fitness_cache = fitness_cache
+        self._cached: list[float | None] = []
+        # Fitness cache context of the current assessment, set by the simulation through lookup_cached
+        self.context: bytes = None
+        # Whether the current assessment's members were added to the world, skipped assessments aren't
+        self._placed: bool = False
         
         self.args = args
         self.kwargs = kwargs
     
+    def pool(self) -> list[type[Agent] | type[Evolver]]:
+        """
+        Members taking part in the current assessment
+        """
+        return self.team if self.team_size != -1 else self.members
+    
     def add_to_world(self) -> None:
         assert hasattr(self, "world")
-        pool = self.team if self.team_size != -1 else self.members
-        for m in pool:
+        for m in self.pool():
             self.world.add_object(m)
+        self._placed = True
 
     
     def clone(self, member: type[Agent] | type[Evolver]) -> type[Agent] | type[Evolver]:
-        return deepcopy(member)
+        """
+        Copy of a member for a team, only the first assessment to need a clone makes a new one
+        """
+        if self._clone_cursor == len(self._clones):
+            self._clones.append(deepcopy(member))
+        copy = self._clones[self._clone_cursor]
+        self._clone_cursor += 1
+        copy.set_genotype(member.get_genotype())
+        copy.clear_fitness()
+        return copy
     
     def merge(
         self,
@@ -45,6 +76,16 @@ class Population(Group):
         del two
         return one
     
+    def load_team(self, genotypes: list[Genotype]) -> None:
+        """
+        Gives the first members these genotypes and makes them the next team to be assessed
+        """
+        assert len(genotypes) <= len(self.members), "More genotypes than population members"
+        for member, genotype in zip(self.members, genotypes):
+            member.set_genotype(genotype)
+            member._fitness_scores.clear()
+        self._cursor, self._cursor_end = 0, len(genotypes)
+    
     def average_member_fitness(self) -> list[float]:
         return [ m.average_fitness for m in self.members ]
     
@@ -52,34 +93,144 @@ class Population(Group):
         self.members.clear()
         self.members = [ self.typing(*self.args, **self.kwargs) for _ in range(self.n) ]
     
+    def _next_member(self) -> type[Agent] | type[Evolver]:
+        end = len(self.members) if self._cursor_end is None else self._cursor_end
+        if self._cursor >= end:
+            self._cursor, self._cursor_end = 0, None
+        member = self.members[self._cursor]
+        self._cursor += 1
+        return member
+    
     def begin_generation(self) -> None:
-        self.current = iter(self.members)
+        self._cursor, self._cursor_end = 0, None
     
     def begin_assessment(self) -> None:
         if self.team_size != -1:
+            self._clone_cursor = 0
             self.team.clear()
-            if self.current is None:
-                self.current = iter(self.members)
-                
             for _ in range(self.team_size):
-                try:
-                    self.team.append(next(self.current))
-                except StopIteration:
-                    self.current = iter(self.members)
-                    self.team.append(next(self.current))
+                self.team.append(self._next_member())
             
             for _ in range(self.num_clones):
                 self.team.extend([ self.clone(m) for m in self.members ])
+        
+        self._cached = [None] * len(self.pool())
+        self.context = None
+        self._placed = False
+    
+    def lookup_cached(self, context: bytes) -> None:
+        """
+        Looks up the cached fitness of the current assessment's members, once every team is known
+        """
+        self.context = context
+        if self.fitness_cache is not None:
+            self._cached = [ self.fitness_cache.lookup(m.get_genotype(), context) for m in self.pool() ]
+    
+    @property
+    def fully_cached(self) -> bool:
+        """
+        Whether every member of the current assessment already has a cached fitness
+        """
+        return bool(self._cached) and all(fitness is not None for fitness in self._cached)
+    
+    def record_fitness(
+        self,
+        members: list,
+        cached: list[float | None],
+        scores: list[float | None],
+        context: bytes = None
+    ) -> None:
+        """
+        Stores each member's score assessed in the context, or its cached fitness when it had one
+        """
+        for member, hit, score in zip(members, cached, scores):
+            if hit is not None:
+                member.store_fitness(hit)
+            elif self.fitness_cache is not None:
+                member.store_fitness(self.fitness_cache.store(member.get_genotype(), score, context))
+            else:
+                member.store_fitness(score)
     
     def end_assessment(self) -> None:
-        pool = self.team if self.team_size != -1 else self.members
-        for m in pool:
-            m.store_fitness()
-            m.reset()
+        self.finish_assessment(self.pool(), self._cached, self.context, self._placed)
+    
+    def finish_assessment(
+        self,
+        members: list,
+        cached: list[float | None],
+        context: bytes = None,
+        placed: bool = True
+    ) -> None:
+        """
+        Records fitness and resets the members of one assessment, which need not be the current one
+        
+        Members with cached fitness aren't scored, and aren't reset either if the assessment was
+        skipped without placing them in the world.
+        """
+        scores = [ m.get_fitness() if hit is None else None for m, hit in zip(members, cached) ]
+        self.record_fitness(members, cached, scores, context)
+        for m, hit in zip(members, cached):
+            if placed or hit is None:
+                m.reset()
+    
+    def emigrants(self, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Genotypes and fitness of the n fittest assessed members, to migrate to another population
+        """
+        ga = self._genetic_algorithm
+        assessed = sorted(
+            (m for m in self.members if m._fitness_scores),
+            key=ga.get_fitness,
+            reverse=True
+        )[:n]
+        genotypes = np.array([ m.get_genotype() for m in assessed ], dtype=np.float64)
+        fitness = np.array([ ga.get_fitness(m) for m in assessed ], dtype=np.float64)
+        return genotypes, fitness
+    
+    def immigrate(self, genotypes: np.ndarray, fitness: np.ndarray) -> None:
+        """
+        Immigrants take the place of the least fit members, keeping the fitness they were given elsewhere
+        """
+        ga = self._genetic_algorithm
+        worst = sorted(self.members, key=lambda m: -np.inf if not m._fitness_scores else ga.get_fitness(m))
+        for member, genotype, f in zip(worst, genotypes, fitness):
+            member.set_genotype(genotype)
+            member._fitness_scores = [float(f)]
     
     def end_generation(self) -> None:
         self._genetic_algorithm.generate()
         self.members.clear()
         self.members.extend(self._genetic_algorithm.output_population)
+    
+    def state_objects(self) -> list:
+        return super().state_objects() + [self._genetic_algorithm]
+    
+    def serialise(self) -> dict[str, np.ndarray]:
+        scores = [ m._fitness_scores for m in self.members ]
+        # Members are reused across generations, so their drawable state is saved as well as their genotypes
+        data = super().serialise()
+        data.update({
+            "genotypes": np.array([ m.get_genotype() for m in self.members ], dtype=np.float64),
+            "fitness_counts": np.array([ len(s) for s in scores ], dtype=np.int64),
+            "fitness_scores": np.array([ f for s in scores for f in s ], dtype=np.float64),
+            "cursor": np.array([self._cursor, -1 if self._cursor_end is None else self._cursor_end], dtype=np.int64)
+        })
+        for key, value in self._genetic_algorithm.serialise().items():
+            data[f"ga.{key}"] = value
+        return data
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        genotypes = data["genotypes"]
+        if len(genotypes) != len(self.members):
+            self.members.clear()
+            self.members.extend(self.typing(*self.args, **self.kwargs) for _ in range(len(genotypes)))
+        
+        scores = np.split(data["fitness_scores"], np.cumsum(data["fitness_counts"])[:-1])
+        for member, genotype, fitness in zip(self.members, genotypes, scores):
+            member.set_genotype(genotype)
+            member._fitness_scores = fitness.tolist()
+        super().unserialise(data)
         
-    # TODO: Serialise/unserialise?
\ No newline at end of file
+        cursor, end = data["cursor"].tolist()
+        self._cursor, self._cursor_end = cursor, None if end == -1 else end
+        self._genetic_algorithm.unserialise({ k[3:]: v for k, v in data.items() if k.startswith("ga.") })
\ No newline at end of file
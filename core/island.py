@@ -0,0 +1,134 @@
+import multiprocessing
+import queue
+import random
+import numpy as np
+
+from core.evolve.population import Population
+from core.utils import MIGRATION_TOPOLOGY
+from core.parallel import RunResults, _records
+
+def destinations(topology: int, islands: int, seed: int, generation: int) -> list[list[int]]:
+    """
+    Islands each island sends its emigrants to, the same on every island for a given seed and generation
+    """
+    if islands < 2:
+        return [ [] for _ in range(islands) ]
+    if topology == MIGRATION_TOPOLOGY.RING:
+        return [ [(i + 1) % islands] for i in range(islands) ]
+    elif topology == MIGRATION_TOPOLOGY.FULL:
+        return [ [ j for j in range(islands) if j != i ] for i in range(islands) ]
+    elif topology == MIGRATION_TOPOLOGY.RANDOM:
+        rng = np.random.default_rng([seed, generation])
+        # An offset of 1 to islands - 1 never sends an island's emigrants to itself
+        offsets = rng.integers(1, islands, size=islands)
+        return [ [int((i + o) % islands)] for i, o in enumerate(offsets) ]
+    raise ValueError(f"Unknown migration topology {topology}")
+
+class Migration:
+    """
+    One island's link to the others, exchanging the best genotypes of every population each `every` generations
+    
+    Only (generation, population name, genotypes, fitness) messages cross between processes.
+    """
+    def __init__(
+        self,
+        island: int,
+        inboxes: list,
+        topology: int = MIGRATION_TOPOLOGY.RING,
+        every: int = 5,
+        migrants: int = 2,
+        seed: int = 0,
+        timeout: float = 600.0
+    ):
+        self.island = island
+        self.inboxes = inboxes
+        self.topology = topology
+        self.every = every
+        self.migrants = migrants
+        self.seed = seed
+        self.timeout = timeout
+        # Messages that arrived ahead of the migration they belong to
+        self._early: list[tuple] = []
+    
+    def due(self, generation: int) -> bool:
+        return self.every > 0 and (generation + 1) % self.every == 0
+    
+    def exchange(self, simulation, generation: int) -> None:
+        populations = { name: obj for name, obj in simulation.contents.items() if isinstance(obj, Population) }
+        routes = destinations(self.topology, len(self.inboxes), self.seed, generation)
+        sources = sum(self.island in targets for targets in routes)
+        
+        for name, population in populations.items():
+            genotypes, fitness = population.emigrants(self.migrants)
+            for target in routes[self.island]:
+                self.inboxes[target].put((generation, name, genotypes, fitness))
+        
+        for name, genotypes, fitness in self._receive(generation, sources * len(populations)):
+            populations[name].immigrate(genotypes, fitness)
+    
+    def _receive(self, generation: int, count: int) -> list[tuple]:
+        received = [ m[1:] for m in self._early if m[0] == generation ]
+        self._early = [ m for m in self._early if m[0] != generation ]
+        while len(received) < count:
+            try:
+                message = self.inboxes[self.island].get(timeout=self.timeout)
+            except queue.Empty:
+                raise RuntimeError(f"Island {self.island} timed out waiting for migrants")
+            if message[0] == generation:
+                received.append(message[1:])
+            else:
+                self._early.append(message)
+        # Arrival order depends on process timing, sorting keeps immigration deterministic
+        received.sort(key=lambda m: (m[0], m[2].tolist()))
+        return received
+
+def _run_island(simulation_type: type, settings: dict, island: int, inboxes: list, migration: dict, results) -> None:
+    # Seeded before construction so that each island starts from its own initial population
+    np.random.seed(settings["seed"])
+    random.seed(settings["seed"])
+    simulation = simulation_type()
+    for name, value in settings.items():
+        setattr(simulation, name, value)
+    simulation.migration = Migration(island, inboxes, **migration)
+    simulation.run_simulation()
+    results.put((island, _records(simulation, island)))
+
+def run_islands(
+    simulation_type: type,
+    settings: list[dict],
+    topology: int = MIGRATION_TOPOLOGY.RING,
+    every: int = 5,
+    migrants: int = 2,
+    seed: int = 0
+) -> RunResults:
+    """
+    One process per settings dict, each evolving its own populations and exchanging migrants with the others
+    """
+    islands = len(settings)
+    inboxes = [ multiprocessing.Queue() for _ in range(islands) ]
+    results = multiprocessing.Queue()
+    migration = { "topology": topology, "every": every, "migrants": migrants, "seed": seed }
+    processes = [
+        multiprocessing.Process(
+            target=_run_island,
+            args=(simulation_type, s, island, inboxes, migration, results),
+            daemon=True
+        )
+        for island, s in enumerate(settings)
+    ]
+    for process in processes:
+        process.start()
+    
+    runs = {}
+    while len(runs) < islands:
+        try:
+            island, records = results.get(timeout=1.0)
+            runs[island] = records
+        except queue.Empty:
+            if any(p.exitcode not in (None, 0) for p in processes):
+                for p in processes:
+                    p.terminate()
+                raise RuntimeError("An island process failed")
+    for process in processes:
+        process.join()
+    return RunResults([ runs[i] for i in range(islands) ])
@@ -0,0 +1,65 @@
+import numpy as np
+
+from core.agent.ffn_agent import FFNAgent
+from core.network.feed_forward_network import FeedForwardNetwork
+
+class BrainBatch:
+    """
+    Fires every same-shaped FeedForwardNetwork in the world with one batched matmul per layer
+    """
+    def __init__(self):
+        # Shape key: (brain versions the stack was built from, stacked layers)
+        self._stacks: dict[tuple, tuple[list, list[np.ndarray]]] = {}
+    
+    def _key(self, brain: FeedForwardNetwork) -> tuple | None:
+        # Custom activation functions are only known to work on a single network
+        if "activation_function" in brain.__dict__:
+            return None
+        return (brain._inputs, brain._outputs, brain._hidden_nodes, brain._bias, brain._sigmoid)
+    
+    def _group(self, agents: list) -> dict[tuple, list[FFNAgent]]:
+        groups = {}
+        for agt in agents:
+            if not isinstance(agt, FFNAgent) or not agt._has_brain:
+                continue
+            if type(agt).brain_output is not FFNAgent.brain_output:
+                continue
+            key = self._key(agt.brain)
+            if key is not None:
+                groups.setdefault(key, []).append(agt)
+        return groups
+    
+    def _stack(self, key: tuple, agents: list[FFNAgent]) -> list[np.ndarray]:
+        versions = [ (id(agt.brain), agt.brain.version) for agt in agents ]
+        cached = self._stacks.get(key)
+        if cached is None or cached[0] != versions:
+            layers = [ np.stack(layer) for layer in zip(*(agt.brain.layers for agt in agents)) ]
+            cached = self._stacks[key] = (versions, layers)
+        return cached[1]
+    
+    def fire(self, agents: list) -> None:
+        groups = self._group(agents)
+        for key in list(self._stacks):
+            if key not in groups:
+                del self._stacks[key]
+        
+        for key, members in groups.items():
+            bias = key[3]
+            for agt in members:
+                agt.brain_input()
+            values = np.stack([ agt.brain.input_values for agt in members ])
+            
+            activation = members[0].brain.activation_function
+            for weights in self._stack(key, members):
+                if bias:
+                    values = np.matmul(weights[:, :, :-1], values[:, :, None])[:, :, 0] + weights[:, :, -1]
+                else:
+                    values = np.matmul(weights, values[:, :, None])[:, :, 0]
+                values = activation(values)
+            
+            for agt, output in zip(members, values):
+                agt.brain.output_values = output
+                agt._brain_ready = True
+    
+    def clear(self) -> None:
+        self._stacks.clear()
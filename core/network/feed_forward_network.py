@@ -1,17 +1,10 @@
+import itertools
 import numpy as np
 
 from core.utils import FFN_ACTIVATION_RESPONSE
 
-class Neuron:
-    def __init__(self, size: int, bias: bool):
-        self.weights = np.zeros(size + (1 if bias else 0))
-        self._bias = bias
-    
-    def weighted_sum(self, values):
-        if self._bias:
-            return np.dot(self.weights[:-1], values) + self.weights[-1]
-        else:
-            return np.dot(self.weights, values)
+# Shared by every network so a version identifies one set of weights, even across snapshot restores
+_versions = itertools.count(1)
 
 class FeedForwardNetwork:
     def __init__(
@@ -34,11 +27,13 @@ class FeedForwardNetwork:
         self._hidden_to_output: int = 0
         self.number_weights: int = 0
         
-        self._hidden_layer = []
-        self._output_layer = []
-    
-        self.initialise(inputs, outputs, hidden_nodes, sigmoid, bias)
+        # One (neurons, inputs + bias) matrix per layer, bias weight in the last column
+        self._layers: list[np.ndarray] = []
+        # Renewed whenever the weights are replaced, lets BrainBatch reuse stacked weights
+        self.version: int = 0
         
+        self.initialise(inputs, outputs, hidden_nodes, sigmoid, bias)
+    
     def initialise(
         self,
         inputs: int,
@@ -50,78 +45,104 @@ class FeedForwardNetwork:
         # NOTE: Yes this is duplication, but allows for better intellisense
         self._inputs = inputs
         self._outputs = outputs
-        self._hiddden_nodes = hidden_nodes
+        self._hidden_nodes = hidden_nodes
         self._sigmoid = sigmoid
         self._bias = bias
         
+        extra = 1 if self._bias else 0
         self.input_values = np.zeros(self._inputs, dtype=np.float32)
         self.output_values = np.zeros(self._outputs, dtype=np.float32)
-        self._input_to_hidden: int = (self._inputs + (1 if self._bias else 0)) * self._hiddden_nodes
-        self._hidden_to_output: int = (self._hidden_nodes + (1 if self._bias else 0)) * self._outputs
-        self.number_weights: int = self._input_to_hidden + self._hidden_to_output
-        
-        self._hidden_layer: list[Neuron] = []
-        self._output_layer: list[Neuron] = []
-        
-        for _ in range(self._hiddden_nodes):
-            self._hidden_layer.append(Neuron(self._inputs, self._bias))
         
         # If no hidden nodes, map input layer to output layer
-        if self._hidden_nodes == 0:
-            self._hiddden_nodes = self._inputs
+        output_inputs = self._hidden_nodes if self._hidden_nodes > 0 else self._inputs
+        self._input_to_hidden: int = (self._inputs + extra) * self._hidden_nodes
+        self._hidden_to_output: int = (output_inputs + extra) * self._outputs
+        self.number_weights: int = self._input_to_hidden + self._hidden_to_output
         
-        for _ in range(outputs):
-            self._output_layer.append(Neuron(self._hiddden_nodes, self._bias))
+        self._layers = [
+            np.zeros((self._hidden_nodes, self._inputs + extra)),
+            np.zeros((self._outputs, output_inputs + extra))
+        ]
+        self.version = next(_versions)
+    
+    @property
+    def layers(self) -> list[np.ndarray]:
+        return self._layers if self._hidden_nodes > 0 else self._layers[1:]
+    
+    def _fire_layer(self, weights: np.ndarray, values: np.ndarray) -> np.ndarray:
+        if self._bias:
+            return self.activation_function(values @ weights[:, :-1].T + weights[:, -1])
+        return self.activation_function(values @ weights.T)
     
     def fire(self) -> None:
-        hidden_output = []
-        output_values = []
-        
-        if self._hiddden_nodes == 0:
-            hidden_output = self.input_values
-        
-        for neuron in self._hidden_layer:
-            output = neuron.weighted_sum(self.input_values)
-            output = self.activation_function(output)
-            hidden_output.append(output)
-        
-        for neuron in self._output_layer:
-            output = neuron.weighted_sum(hidden_output)
-            output = self.activation_function(output)
-            output_values.append(output)
-        
-        self.output_values = output_values
+        values = self.input_values
+        for weights in self.layers:
+            values = self._fire_layer(weights, values)
+        self.output_values = values
+    
+    def fire_batch(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Evaluates a (batch, inputs) matrix in one pass, returns (batch, outputs)
+        """
+        values = np.asarray(inputs).reshape(-1, self._inputs)
+        for weights in self.layers:
+            values = self._fire_layer(weights, values)
+        return values
     
     def randomise(self) -> None:
-        for neuron in self._hidden_layer:
-            neuron.weights = np.random.uniform(-1.0, 1.0, len(neuron.weights))
-        for neuron in self._output_layer:
-            neuron.weights = np.random.uniform(-1.0, 1.0, len(neuron.weights))
+        for i, weights in enumerate(self._layers):
+            self._layers[i] = np.random.uniform(-1.0, 1.0, weights.shape)
+        self.version = next(_versions)
     
-    def activation_function(self, x: float) -> float:
+    def activation_function(self, x: np.ndarray) -> np.ndarray:
         if self._sigmoid:
             return 2.0 / (1.0 + np.exp(-x / FFN_ACTIVATION_RESPONSE)) - 1.0
         else:
-            return 1.0 if x > 0.0 else 0.0
+            return np.where(x > 0.0, 1.0, 0.0)
     
-    def set_activation_function(self, function: callable):
+    def set_activation_function(self, function: callable, vectorised: bool = False):
+        """
+        Layers are activated as whole arrays, scalar functions are wrapped unless vectorised is set
+        """
+        if not vectorised:
+            function = np.vectorize(function, otypes=[np.float64])
         setattr(self, "activation_function", function)
     
     def set_configuration(self, config: dict):
-        assert len(config["hidden"]) == self._hiddden_nodes, "Inconsistent number of hidden neurons"
+        hidden, output = self._layers
+        assert len(config["hidden"]) == self._hidden_nodes, "Inconsistent number of hidden neurons"
         assert len(config["output"]) == self._outputs, "Inconsistent number of output neurons"
-        for neuron, weights in zip(self._hidden_layer, config["hidden"]):
-            assert len(weights) == len(neuron.weights), "Number of hidden neuron weights does not equal number of inputs"
-            neuron.weights[:] = weights
-        for neuron, weights in zip(self._output_layer, config["output"]):
-            assert len(weights) == len(neuron.weights), "Number of output neuron weights does not equal number of hidden neurons"
-            neuron.weights[:] = weights
+        if self._hidden_nodes > 0:
+            config_hidden = np.asarray(config["hidden"], dtype=np.float64)
+            assert config_hidden.shape == hidden.shape, "Number of hidden neuron weights does not equal number of inputs"
+            hidden[:] = config_hidden
+        config_output = np.asarray(config["output"], dtype=np.float64)
+        assert config_output.shape == output.shape, "Number of output neuron weights does not equal number of hidden neurons"
+        output[:] = config_output
+        self.version = next(_versions)
     
     def get_configuration(self) -> dict:
         return {
-            "hidden": [ neuron.weights for neuron in self._hidden_layer ],
-            "output": [ neuron.weights for neuron in self._output_layer ]
+            "hidden": self._layers[0],
+            "output": self._layers[1]
         }
-
-    # TODO: Set/Get Configuration?
-    # TODO: Serialise/deserialise?
\ No newline at end of file
+    
+    def set_weights(self, weights: np.ndarray) -> None:
+        assert len(weights) == self.number_weights, "Weight count must equal network weight quantity"
+        weights = np.asarray(weights, dtype=np.float64)
+        self.set_configuration({
+            "hidden": weights[:self._input_to_hidden].reshape(self._layers[0].shape),
+            "output": weights[self._input_to_hidden:].reshape(self._layers[1].shape)
+        })
+    
+    def get_weights(self) -> np.ndarray:
+        return np.concatenate([ weights.ravel() for weights in self._layers ])
+    
+    def serialise(self) -> dict[str, np.ndarray]:
+        return {
+            "hidden": self._layers[0].copy(),
+            "output": self._layers[1].copy()
+        }
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        self.set_configuration({ "hidden": data["hidden"], "output": data["output"] })
@@ -0,0 +1,220 @@
+import multiprocessing
+import queue
+import random
+import numpy as np
+
+from collections import deque
+
+from core.evolve.base import Genotype
+from core.render.base import set_render_backend, NullRenderBackend
+
+# Each worker process builds one simulation up front and reuses it for every task
+_simulation = None
+# Taken right after the worker's simulation is built, restored before each task so that results
+# depend only on the task and not on which tasks the worker happened to run before
+_snapshot = None
+
+def _build(simulation_type: type, settings: dict, args: tuple, kwargs: dict) -> tuple:
+    simulation = simulation_type(*args, **kwargs)
+    for name, value in settings.items():
+        setattr(simulation, name, value)
+    # Fitness caching happens in the parent, workers assess every member they are sent
+    for obj in simulation.contents.values():
+        if getattr(obj, "fitness_cache", None) is not None:
+            obj.fitness_cache = None
+    simulation.initialise()
+    return simulation, simulation.snapshot()
+
+def _initialise_worker(simulation_type: type, settings: dict, args: tuple, kwargs: dict) -> None:
+    global _simulation, _snapshot
+    set_render_backend(NullRenderBackend())
+    _simulation, _snapshot = _build(simulation_type, settings, args, kwargs)
+
+def _assess(task: tuple[int, dict[str, list[Genotype]]]) -> dict[str, list[float]]:
+    seed, genotypes = task
+    _simulation.restore(_snapshot)
+    return _simulation.assess(genotypes, seed)
+
+def _run_independent(task: tuple[type, dict, int]) -> dict[str, dict]:
+    simulation_type, settings, run = task
+    # Seeded before construction so that each run starts from its own initial population, forked
+    # workers would otherwise all carry on from the parent's state (no seed draws fresh entropy)
+    np.random.seed(settings.get("seed"))
+    random.seed(settings.get("seed"))
+    simulation = simulation_type()
+    for name, value in settings.items():
+        setattr(simulation, name, value)
+    simulation.run_simulation()
+    return _records(simulation, run)
+
+def _records(simulation, run: int) -> dict[str, dict]:
+    records = {}
+    for name, obj in simulation.contents.items():
+        ga = getattr(obj, "_genetic_algorithm", None)
+        if ga is None:
+            continue
+        records[name] = {
+            "run": run,
+            "seed": simulation.seed,
+            "average_fitness": list(ga._average_fitness_record),
+            "best_fitness": list(ga._best_fitness_record),
+            "best_ever_fitness": ga._best_ever_fitness,
+            "best_ever_genome": ga._best_ever_genome
+        }
+    return records
+
+def run_independent(
+    simulation_type: type,
+    settings: list[dict],
+    processes: int = None
+) -> "RunResults":
+    """
+    One whole simulation per settings dict, each in its own process
+    """
+    tasks = [ (simulation_type, s, run) for run, s in enumerate(settings) ]
+    with multiprocessing.Pool(processes) as pool:
+        return RunResults(pool.map(_run_independent, tasks, chunksize=1))
+
+class RunResults:
+    """
+    GA histories of every population, gathered from independent runs (in run order)
+    """
+    def __init__(self, runs: list[dict[str, dict]]):
+        self.runs = runs
+    
+    def __len__(self):
+        return len(self.runs)
+    
+    def average_fitness(self, name: str) -> np.ndarray:
+        return np.array([ run[name]["average_fitness"] for run in self.runs ], dtype=np.float64)
+    
+    def best_fitness(self, name: str) -> np.ndarray:
+        return np.array([ run[name]["best_fitness"] for run in self.runs ], dtype=np.float64)
+    
+    def best_genomes(self, name: str) -> list[Genotype]:
+        return [ run[name]["best_ever_genome"] for run in self.runs ]
+    
+    def best_ever(self, name: str) -> tuple[float, Genotype]:
+        best = max(self.runs, key=lambda run: run[name]["best_ever_fitness"])
+        return best[name]["best_ever_fitness"], best[name]["best_ever_genome"]
+
+class ParallelEvaluator:
+    """
+    Pool of worker processes that each hold a pre-built simulation and run headless assessments
+    
+    Only genotypes go to the workers and only fitness scores come back. Settings are simulation
+    attributes (e.g. timesteps) applied to each worker's simulation after construction.
+    """
+    def __init__(
+        self,
+        simulation_type: type,
+        processes: int = None,
+        settings: dict = None,
+        args: tuple = (),
+        kwargs: dict = None
+    ):
+        self.simulation_type = simulation_type
+        self.processes = processes if processes is not None else multiprocessing.cpu_count()
+        self._pool = multiprocessing.Pool(
+            self.processes,
+            initializer=_initialise_worker,
+            initargs=(simulation_type, settings or {}, args, kwargs or {})
+        )
+        # Results of submitted tasks as (key, fitness) in the order they finish
+        self._completed = queue.SimpleQueue()
+        self.pending: int = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def evaluate(self, tasks: list[tuple[int, dict[str, list[Genotype]]]]) -> list[dict[str, list[float]]]:
+        """
+        Each task is (seed, {population name: team genotypes}), results keep the task order
+        """
+        return self._pool.map(_assess, tasks, chunksize=1)
+    
+    def submit(self, key, task: tuple[int, dict[str, list[Genotype]]]) -> None:
+        """
+        Starts one task without waiting for it, its result is later returned by next_completed with key
+        """
+        self.pending += 1
+        self._pool.apply_async(
+            _assess,
+            (task,),
+            callback=lambda fitness: self._completed.put((key, fitness)),
+            error_callback=lambda error: self._completed.put((key, error))
+        )
+    
+    def next_completed(self) -> tuple[object, dict[str, list[float]]]:
+        """
+        Blocks until any submitted task finishes, returns its key and fitness
+        """
+        key, fitness = self._completed.get()
+        self.pending -= 1
+        if isinstance(fitness, BaseException):
+            raise fitness
+        return key, fitness
+    
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+class SerialEvaluator:
+    """
+    ParallelEvaluator's interface over one simulation in this process, each task runs as it is submitted
+    
+    The random generators are put back after building and after every task, so the caller's
+    stream carries on as if the work had happened in another process.
+    """
+    processes: int = 1
+    
+    def __init__(
+        self,
+        simulation_type: type,
+        settings: dict = None,
+        args: tuple = (),
+        kwargs: dict = None
+    ):
+        self.simulation_type = simulation_type
+        stream = (np.random.get_state(), random.getstate())
+        self._simulation, self._snapshot = _build(simulation_type, settings or {}, args, kwargs or {})
+        self._restore_stream(stream)
+        self._completed: deque = deque()
+        self.pending: int = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def _restore_stream(self, stream: tuple) -> None:
+        np.random.set_state(stream[0])
+        random.setstate(stream[1])
+    
+    def _assess(self, task: tuple[int, dict[str, list[Genotype]]]) -> dict[str, list[float]]:
+        stream = (np.random.get_state(), random.getstate())
+        seed, genotypes = task
+        self._simulation.restore(self._snapshot)
+        fitness = self._simulation.assess(genotypes, seed)
+        self._restore_stream(stream)
+        return fitness
+    
+    def evaluate(self, tasks: list[tuple[int, dict[str, list[Genotype]]]]) -> list[dict[str, list[float]]]:
+        return [ self._assess(task) for task in tasks ]
+    
+    def submit(self, key, task: tuple[int, dict[str, list[Genotype]]]) -> None:
+        self.pending += 1
+        self._completed.append((key, self._assess(task)))
+    
+    def next_completed(self) -> tuple[object, dict[str, list[float]]]:
+        self.pending -= 1
+        return self._completed.popleft()
+    
+    def close(self) -> None:
+        self._simulation = self._snapshot = None
@@ -0,0 +1,53 @@
+from abc import ABC, abstractmethod
+
+class RenderBackend(ABC):
+    """
+    Everything the simulation asks of a renderer, so headless runs can swap in a null one
+    """
+    enabled: bool = True
+    
+    @abstractmethod
+    def compile(self, draw: callable) -> int:
+        """
+        Records what draw() renders, returns a handle for call()/delete()
+        """
+        pass
+    
+    @abstractmethod
+    def call(self, handle: int) -> None:
+        pass
+    
+    @abstractmethod
+    def delete(self, handle: int) -> None:
+        pass
+    
+    def finish(self) -> None:
+        pass
+
+class NullRenderBackend(RenderBackend):
+    """
+    Does no GL work at all and never builds geometry, needs no display
+    """
+    enabled: bool = False
+    
+    def compile(self, draw: callable) -> int:
+        return 0
+    
+    def call(self, handle: int) -> None:
+        pass
+    
+    def delete(self, handle: int) -> None:
+        pass
+
+_backend: RenderBackend = None
+
+def render_backend() -> RenderBackend:
+    global _backend
+    if _backend is None:
+        from core.render.gl import GLRenderBackend
+        _backend = GLRenderBackend()
+    return _backend
+
+def set_render_backend(backend: RenderBackend) -> None:
+    global _backend
+    _backend = backend
@@ -0,0 +1,42 @@
+import numpy as np
+
+from core.render.lazy import gl
+from core.world.drawable import Drawable
+
+def display_batched(drawables: list[Drawable]) -> None:
+    """
+    Draws many drawables with one vertex array call per primitive and line width
+    
+    Geometry comes from each class's batch_geometry(), is moved to world coordinates for every
+    drawable at once and replaces the per-object push/translate/rotate/call list/pop sequence
+    """
+    shapes: dict[tuple, list[Drawable]] = {}
+    for d in drawables:
+        if d.visible and d.location is not None and d.orientation is not None:
+            key = (type(d), d.circular, 0 if d.circular else len(d.edges))
+            shapes.setdefault(key, []).append(d)
+    
+    batches: dict[tuple[int, float], list[tuple[np.ndarray, np.ndarray]]] = {}
+    for (typing, _, _), members in shapes.items():
+        location = np.array([ d.location for d in members ], np.float32)[:, None, :]
+        orientation = np.array([ d.orientation for d in members ], np.float32)[:, None]
+        cos, sin = np.cos(orientation), np.sin(orientation)
+        for primitive, width, vertices, colours in typing.batch_geometry(members):
+            x, y = vertices[:, :, 0], vertices[:, :, 1]
+            world = location + np.stack((cos * x - sin * y, sin * x + cos * y), axis=2)
+            batches.setdefault((primitive, width), []).append((world.reshape(-1, 2), colours.reshape(-1, 4)))
+    if not batches:
+        return
+    
+    gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+    gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+    for (primitive, width), parts in batches.items():
+        vertices = np.ascontiguousarray(np.concatenate([ p[0] for p in parts ]), np.float32)
+        colours = np.ascontiguousarray(np.concatenate([ p[1] for p in parts ]), np.float32)
+        gl.glLineWidth(width)
+        gl.glVertexPointer(2, gl.GL_FLOAT, 0, vertices)
+        gl.glColorPointer(4, gl.GL_FLOAT, 0, colours)
+        gl.glDrawArrays(primitive, 0, len(vertices))
+    gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+    gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+    gl.glLineWidth(1.0)
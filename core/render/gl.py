@@ -0,0 +1,26 @@
+from OpenGL.GL import *
+from core.render.base import RenderBackend
+
+class GLRenderBackend(RenderBackend):
+    """
+    Immediate mode OpenGL, geometry compiled into display lists
+    """
+    enabled: bool = True
+    
+    def compile(self, draw: callable) -> int:
+        handle = glGenLists(1)
+        glNewList(handle, GL_COMPILE)
+        draw()
+        glEndList()
+        return handle
+    
+    def call(self, handle: int) -> None:
+        if handle:
+            glCallList(handle)
+    
+    def delete(self, handle: int) -> None:
+        if handle:
+            glDeleteLists(handle, 1)
+    
+    def finish(self) -> None:
+        glFinish()
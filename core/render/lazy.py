@@ -0,0 +1,20 @@
+import importlib
+
+class LazyModule:
+    """
+    Stands in for a module and only imports it the first time one of its attributes is used
+    """
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+    
+    def __getattr__(self, attribute: str):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        value = getattr(self._module, attribute)
+        # Cache so later lookups never reach __getattr__
+        self.__dict__[attribute] = value
+        return value
+
+gl = LazyModule("OpenGL.GL")
+glu = LazyModule("OpenGL.GLU")
@@ -55,6 +55,10 @@ class Sensor(WorldObject):
         self.evaluate_function = evaluate_function
         self.scale_function = scale_function
         self.owner: WorldObject = None
+        # Measure targets across the world's edges, to the nearest copy of them
+        self.wrap: bool = False
+        # Set while the world's sensing pass fills this sensor, which then skips per-object interact
+        self.batched: bool = False
     
     def _calculate_orientation(self) -> float:
         orientation = self._relative_orientation + self.owner.orientation
@@ -69,6 +73,9 @@ class Sensor(WorldObject):
         if self.owner is not None:
             self._start_location = self.owner.location + self._relative_location
             self._start_orientation = self._calculate_orientation()
+        # Reused owners must not carry a reading over from their last assessment
+        if self.evaluate_function is not None:
+            self.evaluate_function.reset()
 
         super().initialise()
     
@@ -86,6 +93,10 @@ class Sensor(WorldObject):
     def display(self):
         pass
     
+    def state_objects(self) -> list:
+        functions = [self.match_function, self.evaluate_function, self.scale_function]
+        return [self] + [ f for f in functions if f is not None ]
+    
     def output(self) -> float:
         return self.scale_function(self.evaluate_function.evaluate())
     
\ No newline at end of file
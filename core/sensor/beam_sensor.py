@@ -1,8 +1,10 @@
 import numpy as np
 
-from OpenGL.GL import *
+from core.render.lazy import gl
 from core.sensor.base import Sensor, MatchFunction, EvaluateFunction, ScaleFunction
 from core.utils import Vec2, BeamSettings as BS, get_vector_angle
+from core.world.geometry import image_offsets
+from core.render.base import render_backend
 
 class BeamSensor(Sensor):
     def __init__(
@@ -52,62 +54,50 @@ class BeamSensor(Sensor):
         )
     
     def update(self) -> None:
+        super().update()
         if self.wrap:
+            width, height = self.owner.world.size
             self.wrapping["Left"] = self.location[0] - self.range < 0
             self.wrapping["Bottom"] = self.location[1] - self.range < 0
-            self.wrapping["Right"] = self.location[0] + self.range > self.owner.world.width
-            self.wrapping["Top"] = self.location[1] + self.range > self.owner.world.height
-        super().update()
+            self.wrapping["Right"] = self.location[0] + self.range > width
+            self.wrapping["Top"] = self.location[1] + self.range > height
     
-    def _display(self) -> None:
-        glPushMatrix()
-        glTranslated(self.location[0], self.location[1], 0)
-        glRotated(self.orientation, 0.0, 0.0, 1.0)
+    def _display(self, offset: Vec2 = (0.0, 0.0)) -> None:
+        gl.glPushMatrix()
+        gl.glTranslated(self.location[0] + offset[0], self.location[1] + offset[1], 0)
+        gl.glRotated(self.orientation, 0.0, 0.0, 1.0)
         
         if self.draw_fixed:
             scale = self.draw_scale
         else:
             scale = self.draw_scale - self.output()
         
-        glScaled(scale, scale, 1.0)
-        glCallList(self._display_list)
-        glPopMatrix()
+        gl.glScaled(scale, scale, 1.0)
+        render_backend().call(self._display_list)
+        gl.glPopMatrix()
         
     def display(self) -> None:
         self._display()
         if not self.wrap:
             return
-        if self.wrapping["Left"]:
-            temp = self.location[0]
-            self.location[0] = temp + self.owner.world.width
-            self._display()
-            self.location[0] = temp
-        if self.wrapping["Bottom"]:
-            temp = self.location[1]
-            self.location[1] = temp + self.owner.world.height
-            self._display()
-            self.location[1] = temp
-        if self.wrapping["Right"]:
-            temp = self.location[0]
-            self.location[0] = temp - self.owner.world.width
-            self._display()
-            self.location[0] = temp
-        if self.wrapping["Top"]:
-            temp = self.location[1]
-            self.location[1] = temp - self.owner.world.height
-            self._display()
-            self.location[1] = temp
+        # The parts of the beam beyond an edge (or corner) show on the opposite side
+        for offset in image_offsets(self.location, self.range, self.owner.world.size):
+            self._display(offset)
+    
+    def display_state(self) -> tuple:
+        owner_colour = None if self.owner is None else np.asarray(self.owner.colour, np.float64).tobytes()
+        return super().display_state() + (self.scope, self.range, self._beam_quality, owner_colour)
     
     def draw(self) -> None:
-        glEnable(GL_BLEND)
+        gl.glEnable(gl.GL_BLEND)
         if self.scope == 0.0:
-            glBegin(GL_LINES)
-            glLineWidth(1.0)
-            glColor4f(self.owner.colour[0], self.owner.colour[1], self.owner.colour[2], BS.SENSOR_ALPHA)
-            glVertex2d(0.0, 0.0)
-            glColor4f(self.owner.colour[0], self.owner.colour[1], self.owner.colour[2], BS.SENSOR_ALPHA * 2.0)
-            glVertex2d(self.range, 0.0)
-            glEnd()
+            gl.glBegin(gl.GL_LINES)
+            gl.glLineWidth(1.0)
+            gl.glColor4f(self.owner.colour[0], self.owner.colour[1], self.owner.colour[2], BS.SENSOR_ALPHA)
+            gl.glVertex2d(0.0, 0.0)
+            gl.glColor4f(self.owner.colour[0], self.owner.colour[1], self.owner.colour[2], BS.SENSOR_ALPHA * 2.0)
+            gl.glVertex2d(self.range, 0.0)
+            gl.glEnd()
         else:
             num_arc_pts = int(self.scope * self.range * self._beam_quality)
             angles = np.linspace(
@@ -115,14 +105,14 @@ class BeamSensor(Sensor):
                 0.5 * self.scope,
                 num_arc_pts
             )
-            glBegin(GL_TRIANGLE_FAN)
-            glColor4f(self.colour[0], self.colour[1], self.colour[2], 0.0)
-            glVertex2d(0.0, 0.0)
-            glColor4f(self.colour[0], self.colour[1], self.colour[2], BS.SENSOR_ALPHA)
+            gl.glBegin(gl.GL_TRIANGLE_FAN)
+            gl.glColor4f(self.colour[0], self.colour[1], self.colour[2], 0.0)
+            gl.glVertex2d(0.0, 0.0)
+            gl.glColor4f(self.colour[0], self.colour[1], self.colour[2], BS.SENSOR_ALPHA)
             for angle in angles:
-                glVertex2d(self.range * np.cos(angle), self.range * np.sin(angle))
-            glEnd()
-        glDisable(GL_BLEND)
+                gl.glVertex2d(self.range * np.cos(angle), self.range * np.sin(angle))
+            gl.glEnd()
+        gl.glDisable(gl.GL_BLEND)
     
     def in_scope(self, vector: Vec2) -> bool:
         if self.scope == 2 * np.pi:
@@ -3,7 +3,22 @@ import numpy as np
 from core.sensor.base import EvaluateFunction
 from core.sensor.beam_sensor import BeamSensor
 from core.world.world_object import WorldObject
-from core.utils import Vec2, get_vector_angle, WORLD_DISPLAY_PARAMETERS
+from core.world.geometry import displacement, nearest_image
+from core.utils import Vec2, get_vector_angle
+
+def _world_size(obj: WorldObject) -> tuple[float, float]:
+    # Sensors are not added to the world themselves, their owners are
+    while obj.world is None and getattr(obj, "owner", None) is not None:
+        obj = obj.owner
+    return obj.world.size
+
+def _seen_from(owner: WorldObject, loc: Vec2) -> Vec2:
+    """
+    Where owner sees loc, the copy of it nearest to owner if owner senses across the wrap
+    """
+    if not getattr(owner, "wrap", False):
+        return loc
+    return nearest_image(owner.location, loc, _world_size(owner))
 
 class EvaluateNearest(EvaluateFunction):
     def __init__(
@@ -26,6 +41,7 @@ class EvaluateNearest(EvaluateFunction):
         self.nearest_so_far = self.range
     
     def __call__(self, obj: WorldObject, loc: Vec2):
+        loc = _seen_from(self.owner, loc)
         self.distance = np.linalg.norm(self.owner.location - loc)
         if self.distance < self.nearest_so_far:
             self.nearest_so_far = self.distance
@@ -46,37 +62,16 @@ class EvaluateNearestInScope(EvaluateNearest):
         super().__init__(owner, sensor_range)
     
     def __call__(self, obj: WorldObject, loc: Vec2):
+        loc = _seen_from(self.owner, loc)
         if self.scope == 2 * np.pi:
             super().__call__(obj, loc)
         elif self.owner.in_scope(loc):
             super().__call__(obj, loc)
 
 class EvaluateBeam(EvaluateNearestInScope):
-    def __call__(self, obj: WorldObject, loc: Vec2):
-        self.evaluate(obj)
-        self.owner: BeamSensor
-        if not self.owner.wrap:
-            return
-        if self.owner.wrapping["Left"]:
-            temp = self.owner.location[0]
-            self.owner.location[0] = temp + self.owner.world._display_params.width
-            self.evaluate(obj)
-            self.owner.location[0] = temp
-        if self.owner.wrapping["Bottom"]:
-            temp = self.owner.location[1]
-            self.owner.location[1] = temp + self.owner.world._display_params.height
-            self.evaluate(obj)
-            self.owner.location[0] = temp
-        if self.owner.wrapping["Right"]:
-            temp = self.owner.location[0]
-            self.owner.location[0] = temp - self.owner.world._display_params.width
-            self.evaluate(obj)
-            self.owner.location[0] = temp
-        if self.owner.wrapping["Top"]:
-            temp = self.owner.location[0]
-            self.owner.location[1] = temp - self.owner.world._display_params.width
-            self.evaluate(obj)
-            self.owner.location[1] = temp
+    """
+    Nearest in the beam's scope, seen across the wrap when the beam wraps
+    """
 
 class EvaluateNearestDistanceX(EvaluateNearest):
     """
@@ -86,11 +81,7 @@ class EvaluateNearestDistanceX(EvaluateNearest):
         if self.best_candidate_vector is None:
             return 0.0
         
-        delta = self.best_candidate_vector[0] - self.owner.location[0]
-        if abs(delta) > (WORLD_DISPLAY_PARAMETERS.width / 2):
-            score = abs(WORLD_DISPLAY_PARAMETERS.width - abs(delta))
-        else:
-            score = abs(delta)
+        score = abs(displacement(self.owner.location, self.best_candidate_vector, _world_size(self.owner))[0])
         
         if score > self.range:
             self.reset()
@@ -106,14 +97,11 @@ class EvaluateNearestDistanceY(EvaluateNearest):
         if self.best_candidate_vector is None:
             return 0.0
         
-        delta = self.best_candidate_vector[1] - self.owner.location[1]
-        if abs(delta) > (WORLD_DISPLAY_PARAMETERS.height / 2):
-            score = abs(WORLD_DISPLAY_PARAMETERS.height - abs(delta))
-        else:
-            score = abs(delta)
+        score = abs(displacement(self.owner.location, self.best_candidate_vector, _world_size(self.owner))[1])
         
         if score > self.range:
             self.reset()
+            return 0.0
         else:
             return score
 
@@ -167,7 +155,7 @@ class EvaluateProximity(EvaluateFunction):
         self.distances.clear()
     
     def __call__(self, obj: WorldObject, loc: Vec2):
-        distance = np.linalg.norm(self.owner.location - loc)
+        distance = np.linalg.norm(self.owner.location - _seen_from(self.owner, loc))
         if distance < self.range:
             self.distances.append(distance)
     
@@ -11,7 +11,8 @@ class ScaleCompose:
         self.functions = [first, second]
     
     def __call__(self, value: float) -> float:
-        return self.second(self.first(value))
+        first, second = self.functions
+        return second(first(value))
 
 class ScaleLinear(ScaleFunction):
     def __init__(
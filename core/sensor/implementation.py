@@ -49,12 +49,14 @@ def nearest_x_sensor(typing: type[WorldObject], sensor_range: float = 1000.0) ->
     s.match_function = MatchKind(typing)
     s.evaluate_function = EvaluateNearestDistanceX(s, sensor_range)
     s.scale_function = ScaleLinear(0, sensor_range, -1.0, 1.0)
+    return s
 
 def nearest_y_sensor(typing: type[WorldObject], sensor_range: float = 1000.0) -> Sensor:
     s = Sensor(np.array([0, 0], np.float32), 0.0)
     s.match_function = MatchKind(typing)
     s.evaluate_function = EvaluateNearestDistanceY(s, sensor_range)
     s.scale_function = ScaleLinear(0, sensor_range, -1.0, 1.0)
+    return s
 
 def density_sensor(
     typing: type[WorldObject],
@@ -17,9 +17,9 @@ class SelfSensor(Sensor):
         if self.owner is None:
             return 0.0
         if self.typing == "X":
-            return self.owner.location[0] / self.owner.world.width
+            return self.owner.location[0] / self.owner.world.size[0]
         elif self.typing == "Y":
-            return self.owner.location[1] / self.owner.world.height
+            return self.owner.location[1] / self.owner.world.size[1]
         elif self.typing == "Angle":
             return self.owner.orientation / (2 * np.pi)
         elif self.typing == "Control":
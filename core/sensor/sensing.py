@@ -0,0 +1,285 @@
+import numpy as np
+
+from core.sensor.base import Sensor
+from core.sensor.beam_sensor import BeamSensor
+from core.sensor.function.evaluate import EvaluateNearest, EvaluateNearestInScope, EvaluateCount, EvaluateProximity
+from core.sensor.function.match import MatchKind, MatchExact
+from core.world.geometry import displacement, nearest_image
+from core.world.static_index import StaticIndex
+from core.world.occupancy import OccupancyGrid
+from core.world.spatial_hash import SpatialHash
+from core.utils import BroadphaseSettings as BS, OccupancySettings as OS
+
+# Evaluate functions whose calls, one per matched object, sense() reproduces as array reductions
+NEAREST, NEAREST_IN_SCOPE, COUNT, PROXIMITY = range(4)
+_REDUCTIONS = {
+    EvaluateNearest.__call__: NEAREST,
+    EvaluateNearestInScope.__call__: NEAREST_IN_SCOPE,
+    EvaluateCount.__call__: COUNT,
+    EvaluateProximity.__call__: PROXIMITY
+}
+
+def reduction(sensor: Sensor) -> int | None:
+    """
+    How sense() handles this sensor, None if it has to interact object by object
+    """
+    if type(sensor).interact is not Sensor.interact:
+        return None
+    if type(sensor.match_function) not in (MatchKind, MatchExact):
+        return None
+    evaluate = sensor.evaluate_function
+    kind = _REDUCTIONS.get(type(evaluate).__call__)
+    if kind == NEAREST_IN_SCOPE:
+        owner = evaluate.owner
+        if not isinstance(owner, BeamSensor) or type(owner).in_scope is not BeamSensor.in_scope:
+            return None
+    return kind
+
+def _touches(agt, other) -> bool:
+    """
+    Agent.is_touching without keeping the contact point, which belongs to the interaction that follows
+    """
+    point, normal = agt._collision_point, agt._collision_normal
+    touching = agt.is_touching(other)
+    agt._collision_point, agt._collision_normal = point, normal
+    return touching
+
+def _pairs(hashing: SpatialHash, locations: np.ndarray, own: np.ndarray, reach: np.ndarray, size: tuple[float, float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (query, candidate) pairs with candidate within reach[query] of candidate own[query], other than itself
+    """
+    if size is None:
+        delta = locations[None, :, :] - locations[own][:, None, :]
+        query, found = np.nonzero(np.einsum("ijk,ijk->ij", delta, delta) <= (reach**2)[:, None].astype(np.float32))
+    else:
+        query, found = hashing.pairs(locations[own], reach)
+    keep = found != own[query]
+    return query[keep], found[keep]
+
+def _touching(
+    agents: list,
+    locations: np.ndarray,
+    radii: np.ndarray,
+    own: np.ndarray,
+    query: np.ndarray,
+    found: np.ndarray,
+    candidates: list,
+    size: tuple[float, float]
+) -> np.ndarray:
+    """
+    Whether agents[query] (candidate own[query]) touches candidate found of each pair, as Agent.is_touching decides
+    """
+    delta = displacement(locations[own[query]], locations[found], size)
+    contact = ((radii[own[query]] + radii[found])**2).astype(np.float32)
+    touching = np.einsum("ij,ij->i", delta, delta) <= contact
+    hits = np.flatnonzero(touching)
+    for k, j in zip(hits.tolist(), found[hits].tolist()):
+        if not candidates[j].circular:
+            touching[k] = _touches(agents[query[k]], candidates[j])
+    return touching
+
+def _from_index(index: StaticIndex, row: tuple, kind: int, size: tuple[float, float]) -> bool:
+    """
+    Fills a NEAREST or PROXIMITY sensor that only matches static classes from the static index, False if it can't
+    
+    The sensor's range has to keep it inside its owner's interaction range, so that nothing the owner
+    would have passed on is left out. Objects touching the owner are passed over, as Agent.interact
+    collides with them instead of sensing them.
+    """
+    _, agt, sensor = row
+    if kind not in (NEAREST, PROXIMITY):
+        return False
+    evaluate = sensor.evaluate_function
+    origin = np.asarray(evaluate.owner.location, np.float32)
+    offset = np.linalg.norm(displacement(agt.location, origin, size))
+    if evaluate.range + offset > agt._interaction_range:
+        return False
+    
+    wrap = size if getattr(evaluate.owner, "wrap", False) else None
+    typing = sensor.match_function.object_type
+    wanted = 1 if kind == NEAREST else evaluate.n_max
+    k = wanted
+    while True:
+        found = index.k_nearest(origin, typing, k, evaluate.range, wrap)
+        if not found:
+            break
+        objs = [agt] + [ obj for obj, _ in found ]
+        locations = np.array([ obj.location for obj in objs ], np.float32)
+        radii = np.array([ obj.radius for obj in objs ], np.float64)
+        others = np.arange(1, len(objs))
+        touching = _touching([agt], locations, radii, np.zeros(1, np.intp), np.zeros(len(found), np.intp), others, objs, size)
+        kept = [ f for f, t in zip(found, touching) if not t ]
+        if len(kept) >= wanted or len(found) < k:
+            found = kept[:wanted]
+            break
+        k += wanted - len(kept)
+    
+    if kind == NEAREST:
+        if found:
+            obj, distance = found[0]
+            evaluate.distance = evaluate.nearest_so_far = distance
+            evaluate.best_candidate = obj
+            evaluate.best_candidate_vector = obj.location if wrap is None else nearest_image(origin, obj.location, wrap)
+    else:
+        evaluate.distances.extend(d for _, d in found)
+    return True
+
+def sense(
+    agents: list,
+    objects: list,
+    sensing: list[bool] = None,
+    size: tuple[float, float] = None,
+    index: StaticIndex = None,
+    grid: OccupancyGrid = None,
+    hashing: SpatialHash = None
+) -> None:
+    """
+    Fills the evaluate state of every sensor reduction() accepts from arrays over the sensor and
+    candidate pairs, and flags those sensors so Agent.sensor_interact skips them
+    
+    Candidates are what Agent.interact would pass on, as often as it would: every object and every
+    other agent within the owner's interaction range, where other agents are sensed once more and
+    touching candidates once less, as they collide instead. sensing marks the agents whose sensors
+    may be filled (default all). Distances are measured across the wrap of a world of the given size,
+    for the interaction range and for sensors that wrap, and the candidates of each owner are found
+    with the spatial hash (a new one when not given). With the world's static index over objects,
+    nearest and proximity sensors that only match static classes query it instead of measuring
+    every candidate. With the world's occupancy grid and enough candidates, count sensors are answered
+    from it.
+    """
+    candidates = objects + agents
+    rows, kinds = [], []
+    for i, agt in enumerate(agents):
+        if sensing is not None and not sensing[i]:
+            continue
+        for sensor in agt.sensors.values():
+            kind = reduction(sensor)
+            sensor.batched = kind is not None
+            if sensor.batched:
+                rows.append((len(objects) + i, agt, sensor))
+                kinds.append(kind)
+    if not rows:
+        return
+    kinds = np.array(kinds)
+    
+    classes = {}
+    class_index = np.array([ classes.setdefault(type(c), len(classes)) for c in candidates ], np.intp)
+    
+    # Match functions only look at the candidate's type, so they are evaluated once per class
+    matches, keys = {}, []
+    for _, _, sensor in rows:
+        match = sensor.match_function
+        key = (type(match), match.object_type)
+        if key not in matches:
+            matches[key] = np.array([ issubclass(cls, match.object_type) for cls in classes ], bool)
+        keys.append(key)
+    matched = np.array([ matches[k] for k in keys ])
+    agent_classes = np.unique(class_index[len(objects):])
+    
+    if index is not None:
+        # Classes that may move by writing into location are not kept current in the index
+        moving = np.array([ not cls.static for cls in classes ], bool)
+        moving[agent_classes] = True
+        unbound = [ r for r, row in enumerate(rows) if matched[r, moving].any() or not _from_index(index, row, kinds[r], size) ]
+        rows, kinds, matched = [ rows[r] for r in unbound ], kinds[unbound], matched[unbound]
+        if not rows:
+            return
+    
+    locations = np.array([ c.location for c in candidates ], np.float32).reshape(-1, 2)
+    radii = np.array([ c.radius for c in candidates ], np.float64)
+    is_agent = np.arange(len(candidates)) >= len(objects)
+    if size is not None:
+        hashing = hashing if hashing is not None else SpatialHash(*size, BS.SENSING_CELL_SIZE)
+        hashing.resize(*size)
+        hashing.rebuild(locations)
+    
+    counted = np.flatnonzero(kinds == COUNT)
+    if grid is not None and size is not None and len(counted) and len(candidates) >= OS.MIN_CANDIDATES:
+        # A count is every matched candidate in the owner's interaction range, agents twice, less those touching it
+        grid.rebuild(locations, class_index, len(classes), *size)
+        own = np.array([ rows[r][0] for r in counted ], np.intp)
+        reach = np.array([ rows[r][1]._interaction_range for r in counted ], np.float64)
+        agent_matched = matched[counted] & np.isin(np.arange(len(classes)), agent_classes)
+        totals = grid.counts(locations[own], reach, matched[counted]) + grid.counts(locations[own], reach, agent_matched)
+        totals -= 2 * matched[counted, class_index[own]]
+        agents_of = [ rows[r][1] for r in counted ]
+        close = np.minimum(reach, radii[own] + radii.max())
+        query, found = _pairs(hashing, locations, own, close, size)
+        touching = _touching(agents_of, locations, radii, own, query, found, candidates, size)
+        touching &= matched[counted[query], class_index[found]]
+        totals -= np.bincount(query[touching], minlength=len(counted))
+        for r, total in zip(counted, totals):
+            rows[r][2].evaluate_function.count += int(total)
+        unbound = np.flatnonzero(kinds != COUNT)
+        rows, kinds, matched = [ rows[r] for r in unbound ], kinds[unbound], matched[unbound]
+        if not rows:
+            return
+    
+    # Pairs of an owner and a candidate it passes on, with how many times it senses the candidate
+    owners, row_owner = np.unique([ r[0] for r in rows ], return_inverse=True)
+    row_owner = row_owner.reshape(-1)
+    agents_of = [ candidates[o] for o in owners ]
+    reach = np.array([ agt._interaction_range for agt in agents_of ], np.float64)
+    query, found = _pairs(hashing, locations, owners, reach, size)
+    times = is_agent[found].astype(np.intp) + ~_touching(agents_of, locations, radii, owners, query, found, candidates, size)
+    
+    # Then one pair for every sensor of the owner that matches the candidate, grouped by sensor
+    sensors = np.bincount(row_owner, minlength=len(owners))
+    by_owner = np.argsort(row_owner, kind="stable")
+    first = np.cumsum(sensors) - sensors
+    repeat = sensors[query]
+    step = np.arange(repeat.sum()) - np.repeat(np.cumsum(repeat) - repeat, repeat)
+    pair_rows = by_owner[np.repeat(first[query], repeat) + step]
+    pair_columns = np.repeat(found, repeat)
+    repeats = np.repeat(times, repeat)
+    keep = matched[pair_rows, class_index[pair_columns]] & (repeats > 0)
+    order = np.argsort(pair_rows[keep], kind="stable")
+    pair_rows, pair_columns, repeats = pair_rows[keep][order], pair_columns[keep][order], repeats[keep][order]
+    if not len(pair_rows):
+        return
+    
+    evaluators = [ r[2].evaluate_function for r in rows ]
+    origins = np.array([ e.owner.location if kind != COUNT else (0.0, 0.0) for e, kind in zip(evaluators, kinds) ], np.float32)
+    delta = locations[pair_columns] - origins[pair_rows]
+    wraps = np.array([ kind != COUNT and getattr(e.owner, "wrap", False) for e, kind in zip(evaluators, kinds) ], bool)
+    if size is not None and wraps.any():
+        wrapped = wraps[pair_rows]
+        delta[wrapped] = displacement(origins[pair_rows[wrapped]], locations[pair_columns[wrapped]], size)
+    distance = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+    ranges = np.array([ getattr(e, "range", np.inf) for e in evaluators ], np.float64)
+    within = distance < ranges[pair_rows]
+    
+    # In scope when the angle to the target is at most half the scope, from the dot product with the heading
+    scoped = (kinds == NEAREST_IN_SCOPE)[pair_rows]
+    if scoped.any():
+        beams = { r: evaluators[r].owner for r in np.unique(pair_rows[scoped]) }
+        full = np.zeros(len(rows), bool)
+        heading = np.zeros(len(rows), np.float64)
+        half = np.zeros(len(rows), np.float64)
+        for r, b in beams.items():
+            full[r] = evaluators[r].scope == 2 * np.pi or b.scope == 2 * np.pi
+            heading[r], half[r] = b.orientation, np.cos(0.5 * b.scope)
+        pr = pair_rows[scoped]
+        along = delta[scoped, 0] * np.cos(heading[pr]) + delta[scoped, 1] * np.sin(heading[pr])
+        within[scoped] &= full[pr] | (along >= distance[scoped] * half[pr])
+    
+    # Nearest within range of each row, ties going to the first candidate as in the per-object order
+    order = np.lexsort((pair_columns, np.where(within, distance, np.inf), pair_rows))
+    first = order[np.r_[True, pair_rows[order][1:] != pair_rows[order][:-1]]]
+    nearest = dict(zip(pair_rows[first].tolist(), first.tolist()))
+    counts = np.bincount(pair_rows, weights=repeats, minlength=len(rows))
+    # Pairs come out grouped by row, in row order
+    bounds = np.searchsorted(pair_rows, np.arange(len(rows) + 1))
+    for r, (evaluate, kind) in enumerate(zip(evaluators, kinds)):
+        if kind == COUNT:
+            evaluate.count += int(counts[r])
+        elif kind == PROXIMITY:
+            found = slice(bounds[r], bounds[r + 1])
+            inside = within[found]
+            evaluate.distances.extend(np.repeat(distance[found][inside], repeats[found][inside]).tolist())
+        elif r in nearest and within[nearest[r]]:
+            p = nearest[r]
+            j = pair_columns[p]
+            evaluate.distance = evaluate.nearest_so_far = distance[p]
+            evaluate.best_candidate = candidates[j]
+            evaluate.best_candidate_vector = candidates[j].location if not wraps[r] else origins[r] + delta[p]
@@ -1,13 +1,23 @@
 import logging
+import random
 import sys
-import wx
 import time
+import numpy as np
 
 from abc import ABC
-from OpenGL.GL import glFinish
+from collections import Counter, deque
 from core.world.world import World
-from main import App
-from core.evolve.base import SimulationObject
+from core.world.world_batch import WorldBatch
+from core.evolve.base import SimulationObject, Genotype
+from core.evolve.population import Population
+from core.evolve.fitness_cache import FitnessCache
+from core.render.base import render_backend, set_render_backend, NullRenderBackend
+from core.parallel import ParallelEvaluator, SerialEvaluator, RunResults, run_independent
+from core.island import Migration, run_islands
+from core.utils import MIGRATION_TOPOLOGY
+from core.timing import PhaseTimer
+from core.snapshot import Snapshot
+from core.checkpoint import save_checkpoint, load_checkpoint
 
 class Simulation(ABC):
     def __init__(self, name):
@@ -19,12 +29,33 @@ class Simulation(ABC):
         self.timesteps: int = 1000
         self.time_increment: int = 1
         self.sleep_betwen_logs: float = 0.0
+        self.seed: int = None
+        self.results: RunResults = None
+        # Every checkpoint_every generations the run is saved to checkpoint_path (0 disables)
+        self.checkpoint_every: int = 0
+        self.checkpoint_path: str = None
+        # Steady-state runs replace the worst members with children as soon as any assessment finishes
+        self.steady_state: bool = False
+        self.steady_state_children: int = 2
+        # Headless runs assess a generation's assessments side by side in one WorldBatch
+        self.batch_assessments: bool = False
+        # Set on each island of an island model run, exchanges migrants before the GA generates
+        self.migration: Migration = None
+        
+        # Step timings, only recorded once enable_timing is called
+        self.timer: PhaseTimer = None
+        self.generation_timer: PhaseTimer = None
+        self.timing_record: list[PhaseTimer] = []
         
         self._timestep: int = 0
         self._complete: bool = False
         self._run: int = 0
         self._generation: int = 0
         self._assessment: int = 0
+        # Set when every population of an assessment has cached fitness, so no timesteps are run
+        self._skip_assessment: bool = False
+        # Random generator states to carry on from once an assessment run from its own scenario seed ends
+        self._stream: tuple = None
         
         self.log: logging.Logger = logging.getLogger(name)
         self._initialise_logger()
@@ -43,25 +74,438 @@ class Simulation(ABC):
         pass
     
     def run_simulation(self, render = False, parallel = False) -> None:
+        """
+        parallel: False, True (one worker per core) or a number of worker processes
+        """
         if render:
+            from core.render.gl import GLRenderBackend
+            from main import App
+            set_render_backend(GLRenderBackend())
             app = App(self)
             app.MainLoop()
         else:
-            self.run_simulation_no_render(parallel)
+            set_render_backend(NullRenderBackend())
+            self._run_simulation_no_render(parallel)
     
     def _run_simulation_no_render(self, parallel):
+        if self.steady_state:
+            self._run_simulation_steady_state(parallel)
+            return
+        if parallel:
+            self._run_simulation_parallel(None if parallel is True else int(parallel))
+            return
+        if self.batch_assessments:
+            self._run_simulation_batched()
+            return
+        
         self.initialise()
-        self.begin_simulation()
+        if self.loaded:
+            self.resume_simulation()
+        else:
+            self.begin_simulation()
         
         complete = False
         while not complete:
             complete = self.update()
     
-    def parallel_runs(self):
-        # TODO: perform runs in parallels
-        pass
+    def _seed(self) -> None:
+        if self.seed is not None:
+            np.random.seed(self.seed)
+            random.seed(self.seed)
+    
+    def _run_simulation_parallel(self, processes: int) -> None:
+        """
+        Generational loop where every assessment of a generation runs in a worker process
+        """
+        assert self.timesteps > 0, "Parallel assessment needs a finite number of timesteps"
+        self.initialise()
+        resumed = self.loaded
+        if resumed:
+            self.log_resume_simulation()
+        else:
+            self._seed()
+            self.log_begin_simulation()
+            self._run, self._generation = 0, 0
+        populations = { name: obj for name, obj in self.contents.items() if isinstance(obj, Population) }
+        
+        with ParallelEvaluator(type(self), processes, self._worker_settings()) as evaluator:
+            for self._run in range(self._run, self.runs):
+                first_generation = self._generation if resumed else 0
+                if self._run > 0 and not resumed:
+                    self.log_begin_run()
+                    for obj in self.contents.values():
+                        obj.begin_run()
+                resumed = False
+                
+                for self._generation in range(first_generation, self.generations):
+                    self.log_begin_generation()
+                    for obj in self.contents.values():
+                        obj.begin_generation()
+                    
+                    teams, cached, skipped, contexts, tasks = [], [], [], [], []
+                    for self._assessment in range(self.assessments):
+                        scenario = self._begin_scenario()
+                        for population in populations.values():
+                            population.begin_assessment()
+                        contexts.append(self._lookup_cached(populations.values(), scenario))
+                        team = { name: list(p.pool()) for name, p in populations.items() }
+                        teams.append(team)
+                        cached.append({ name: list(p._cached) for name, p in populations.items() })
+                        genotypes = { name: [ m.get_genotype() for m in members ] for name, members in team.items() }
+                        seed = scenario if scenario is not None else np.random.randint(2**31)
+                        skipped.append(self._all_cached(populations.values()))
+                        if not skipped[-1]:
+                            tasks.append((seed, genotypes))
+                    self._end_scenario()
+                    
+                    results = iter(evaluator.evaluate(tasks))
+                    for team, hits, skip, context in zip(teams, cached, skipped, contexts):
+                        fitness = {} if skip else next(results)
+                        for name, members in team.items():
+                            scores = fitness.get(name, [None] * len(members))
+                            populations[name].record_fitness(members, hits[name], scores, context)
+                        self.log_end_assessment()
+                    
+                    self.log_end_generation()
+                    self._migrate_if_due()
+                    for obj in self.contents.values():
+                        obj.end_generation()
+                    self._generation += 1
+                    self._checkpoint_if_due()
+                
+                self.log_end_run()
+                for obj in self.contents.values():
+                    obj.end_run()
+        
+        self.log_end_simulation()
+        self._complete = True
+    
+    def _run_simulation_steady_state(self, parallel) -> None:
+        """
+        Asynchronous loop with no generation barrier, each finished assessment is replaced at once by
+        one holding freshly bred children in place of the worst members not being assessed
+        
+        A run is generations * assessments assessments, as in the generational loop. Each generation's
+        worth of assessments adds one GA record, taken over the latest population sized window of
+        member assessments. parallel is as for run_simulation, False assesses one at a time in this
+        process. A new assessment waits while every assessed member of a population is in flight,
+        as when teams are the whole population, since its children would have nowhere to go.
+        """
+        assert self.timesteps > 0, "Parallel assessment needs a finite number of timesteps"
+        self.initialise()
+        self._seed()
+        self.log_begin_simulation()
+        populations = { name: obj for name, obj in self.contents.items() if isinstance(obj, Population) }
+        budget = self.generations * self.assessments
+        
+        if parallel:
+            evaluator = ParallelEvaluator(type(self), None if parallel is True else int(parallel), self._worker_settings())
+        else:
+            evaluator = SerialEvaluator(type(self), self._worker_settings())
+        
+        with evaluator:
+            for self._run in range(self.runs):
+                if self._run > 0:
+                    self.log_begin_run()
+                    for obj in self.contents.values():
+                        obj.begin_run()
+                for obj in self.contents.values():
+                    obj.begin_generation()
+                self._generation = 0
+                pending = Counter()
+                windows = { name: deque(maxlen=len(p.members)) for name, p in populations.items() }
+                
+                # The first population is assessed in full before any breeding
+                for self._assessment in range(self.assessments):
+                    team = {}
+                    for name, population in populations.items():
+                        population.begin_assessment()
+                        team[name] = list(population.pool())
+                    self._submit_steady_state(evaluator, team, pending)
+                submitted, completed = self.assessments, 0
+                
+                while evaluator.pending:
+                    team, fitness = evaluator.next_completed()
+                    for name, members in team.items():
+                        ga = populations[name]._genetic_algorithm
+                        for member, score in zip(members, fitness[name]):
+                            member.store_fitness(score)
+                            pending[id(member)] -= 1
+                            windows[name].append((ga.get_fitness(member), np.array(member.get_genotype())))
+                    completed += 1
+                    self.log_end_assessment()
+                    
+                    if completed % self.assessments == 0:
+                        for name, window in windows.items():
+                            populations[name]._genetic_algorithm.record_window(*map(list, zip(*window)))
+                        self.log_end_generation()
+                        self._generation += 1
+                    
+                    if completed < self.assessments:
+                        continue
+                    while evaluator.pending < evaluator.processes and submitted < budget:
+                        if evaluator.pending and not all(self._breedable(p, pending) for p in populations.values()):
+                            break
+                        team = { name: self._steady_state_team(p, pending) for name, p in populations.items() }
+                        self._submit_steady_state(evaluator, team, pending)
+                        submitted += 1
+                
+                self.log_end_run()
+                for obj in self.contents.values():
+                    obj.end_run()
+        
+        self.log_end_simulation()
+        self._complete = True
+    
+    def _run_simulation_batched(self) -> None:
+        """
+        Generational loop where the assessments of a generation each get a world and all worlds step together
+        """
+        self.initialise()
+        resumed = self.loaded
+        if resumed:
+            self.log_resume_simulation()
+        else:
+            self._seed()
+            self.log_begin_simulation()
+            self._run, self._generation = 0, 0
+        batch = WorldBatch(self, self.assessments, self.world._display_params)
+        
+        for self._run in range(self._run, self.runs):
+            first_generation = self._generation if resumed else 0
+            if self._run > 0 and not resumed:
+                self.log_begin_run()
+                for obj in self.contents.values():
+                    obj.begin_run()
+            resumed = False
+            
+            for self._generation in range(first_generation, self.generations):
+                self.log_begin_generation()
+                for obj in self.contents.values():
+                    obj.begin_generation()
+                self._assess_batch(batch)
+                
+                self.log_end_generation()
+                self._migrate_if_due()
+                for obj in self.contents.values():
+                    obj.end_generation()
+                self._generation += 1
+                self._checkpoint_if_due()
+            
+            self.log_end_run()
+            for obj in self.contents.values():
+                obj.end_run()
+        
+        self.log_end_simulation()
+        self._complete = True
+    
+    def _assess_batch(self, batch: WorldBatch) -> None:
+        populations = { name: obj for name, obj in self.contents.items() if isinstance(obj, Population) }
+        teams = []
+        for self._assessment, world in enumerate(batch):
+            self.log_begin_assessment()
+            scenario = self._begin_scenario()
+            for obj in self.contents.values():
+                obj.world = world
+                obj.begin_assessment()
+            context = self._lookup_cached(populations.values(), scenario)
+            for obj in self.contents.values():
+                obj.add_to_world()
+            teams.append({ name: (list(p.pool()), list(p._cached), context) for name, p in populations.items() })
+        for obj in self.contents.values():
+            obj.world = self.world
+        
+        placed = [ o for world in batch for o in world._agents + world._objects ]
+        if len(placed) != len({ id(o) for o in placed }):
+            batch.clean()
+            self._end_scenario()
+            raise ValueError("Batched assessments need different objects in every assessment, e.g. teams with "
+                             "team_size * assessments <= population size and no shared groups")
+        
+        batch.initialise()
+        for self._timestep in range(0, self.timesteps, self.time_increment):
+            batch.update()
+        
+        for self._assessment, team in enumerate(teams):
+            for name, (members, cached, context) in team.items():
+                populations[name].finish_assessment(members, cached, context)
+            for obj in self.contents.values():
+                if not isinstance(obj, Population):
+                    obj.end_assessment()
+            self.log_end_assessment()
+        batch.clean()
+        self._end_scenario()
+    
+    def _breedable(self, population: Population, pending: Counter) -> bool:
+        """
+        Whether an assessed member of population is free to be replaced by a child
+        """
+        return any(m._fitness_scores and not pending[id(m)] for m in population.members)
+    
+    def _steady_state_team(self, population: Population, pending: Counter) -> list:
+        """
+        Children bred into the worst assessed members that are free, filled up to a team with other members
+        """
+        ga = population._genetic_algorithm
+        members = population.members
+        size = population.team_size if population.team_size != -1 else len(members)
+        assessed = [ m for m in members if m._fitness_scores ]
+        free = sorted((m for m in assessed if not pending[id(m)]), key=ga.get_fitness)
+        children = free[:min(self.steady_state_children, size)] if len(assessed) >= 2 else []
+        if children:
+            for member, genome in zip(children, ga.breed(assessed, len(children))):
+                member.set_genotype(genome)
+                member._fitness_scores.clear()
+        
+        others = [ m for m in members if not any(m is c for c in children) ]
+        picks = np.random.choice(len(others), size - len(children), replace=False)
+        return children + [ others[i] for i in picks ]
+    
+    def _submit_steady_state(self, evaluator: ParallelEvaluator | SerialEvaluator, team: dict[str, list], pending: Counter) -> None:
+        for members in team.values():
+            pending.update(id(m) for m in members)
+        genotypes = { name: [ m.get_genotype() for m in members ] for name, members in team.items() }
+        evaluator.submit(team, (np.random.randint(2**31), genotypes))
+    
+    def _scenario_seed(self) -> int | None:
+        """
+        Seed of the current assessment's scenario, if the simulation is seeded and a population caches fitness
+        
+        It depends only on the simulation seed, the run and the assessment, so an assessment replays
+        the same scenario every generation and fitness cached for it stays valid.
+        """
+        caching = any(isinstance(obj, Population) and obj.fitness_cache is not None for obj in self.contents.values())
+        if self.seed is None or not caching:
+            return None
+        return int(np.random.SeedSequence([self.seed, self._run, self._assessment]).generate_state(1)[0] >> 1)
+    
+    def _begin_scenario(self) -> int | None:
+        """
+        Seeds the random generators with the current assessment's scenario seed and returns it,
+        keeping the simulation's own stream to carry on from in _end_scenario
+        """
+        scenario = self._scenario_seed()
+        if scenario is not None:
+            if self._stream is None:
+                self._stream = (np.random.get_state(), random.getstate())
+            np.random.seed(scenario)
+            random.seed(scenario)
+        return scenario
+    
+    def _end_scenario(self) -> None:
+        if self._stream is not None:
+            np.random.set_state(self._stream[0])
+            random.setstate(self._stream[1])
+            self._stream = None
+    
+    def _lookup_cached(self, populations, scenario: int | None) -> bytes | None:
+        """
+        Gives the populations the context of an assessment whose teams are all picked, which
+        caching populations look their members up in. Returns it, None if no population caches
+        
+        Fitness depends on everyone assessed together, so the context covers every team's genotypes.
+        """
+        populations = list(populations)
+        context = None
+        if any(p.fitness_cache is not None for p in populations):
+            context = FitnessCache.context(scenario, [ m.get_genotype() for p in populations for m in p.pool() ])
+        for p in populations:
+            p.lookup_cached(context)
+        return context
+    
+    def _all_cached(self, populations) -> bool:
+        populations = list(populations)
+        return bool(populations) and all(p.fully_cached for p in populations)
+    
+    def _worker_settings(self) -> dict:
+        return {
+            "timesteps": self.timesteps,
+            "time_increment": self.time_increment,
+            "sleep_betwen_logs": 0.0
+        }
+    
+    def assess(self, genotypes: dict[str, list[Genotype]], seed: int = None) -> dict[str, list[float]]:
+        """
+        Runs one headless assessment with the given team genotypes, returns each member's fitness
+        """
+        if seed is not None:
+            np.random.seed(seed)
+            random.seed(seed)
+        for name, team in genotypes.items():
+            self.contents[name].load_team(team)
+        
+        self.begin_assessment()
+        for self._timestep in range(0, self.timesteps, self.time_increment):
+            self.world.update()
+        
+        fitness = {}
+        for name in genotypes:
+            population = self.contents[name]
+            fitness[name] = [ m.get_fitness() for m in population.pool() ]
+        
+        for obj in self.contents.values():
+            obj.end_assessment()
+        self.world.clean()
+        return fitness
+    
+    def parallel_runs(self, processes: int = None) -> RunResults:
+        """
+        Executes self.runs headless runs concurrently, each with its own seed stream
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(self.runs)
+        settings = []
+        for seed in seeds:
+            run_settings = self._worker_settings()
+            run_settings.update({
+                "runs": 1,
+                "generations": self.generations,
+                "assessments": self.assessments,
+                "seed": int(seed.generate_state(1)[0])
+            })
+            settings.append(run_settings)
+        
+        self.log_begin_simulation()
+        self.results = run_independent(type(self), settings, processes)
+        self.log_end_simulation()
+        return self.results
+    
+    def island_runs(
+        self,
+        islands: int,
+        topology: int = MIGRATION_TOPOLOGY.RING,
+        every: int = 5,
+        migrants: int = 2
+    ) -> RunResults:
+        """
+        Island model, one headless run per island process with the best genotypes migrating every few generations
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(islands)
+        settings = []
+        for seed in seeds:
+            island_settings = self._worker_settings()
+            island_settings.update({
+                "runs": 1,
+                "generations": self.generations,
+                "assessments": self.assessments,
+                "seed": int(seed.generate_state(1)[0])
+            })
+            settings.append(island_settings)
+        
+        self.log_begin_simulation()
+        migration_seed = 0 if self.seed is None else self.seed
+        self.results = run_islands(type(self), settings, topology, every, migrants, migration_seed)
+        self.log_end_simulation()
+        return self.results
+    
+    def _migrate_if_due(self) -> None:
+        if self.migration is not None and self.migration.due(self._generation):
+            self.migration.exchange(self, self._generation)
     
     def clean(self) -> None:
+        # Headless runs never import wx, so there is no GUI to tear down
+        wx = sys.modules.get("wx")
+        if wx is None:
+            return
         app = wx.GetApp()
         if app:
             for window in wx.GetTopLevelWindows():
@@ -73,6 +517,15 @@ class Simulation(ABC):
             del app
             wx.GetApp().Destroy()
     
+    def enable_timing(self, enabled: bool = True) -> None:
+        """
+        Times every phase of the step, totals are kept per assessment, per generation and in timing_record
+        """
+        self.timer = PhaseTimer() if enabled else None
+        self.generation_timer = PhaseTimer() if enabled else None
+        self.timing_record = []
+        self.world.timer = self.timer
+    
     def add(self, name: str, obj: SimulationObject) -> None:
         self.contents[name] = obj
     
@@ -81,11 +534,19 @@ class Simulation(ABC):
             obj.world = self.world
     
     def display(self) -> None:
+        if self.timer:
+            self.timer.start()
         self.world.display()
-        glFinish()
+        render_backend().finish()
         self.swap_buffers()
+        if self.timer:
+            self.timer.lap("display")
     
     def update(self) -> bool:
+        if self._skip_assessment:
+            self._skip_assessment = False
+            self.end_assessment()
+            return self._complete
         self.world.update()
         self._timestep += self.time_increment
         
@@ -101,6 +562,7 @@ class Simulation(ABC):
         
         self._complete = False
         self._run = 0
+        self._seed()
         
         for obj in self.contents.values():
             obj.begin_generation()
@@ -108,8 +570,17 @@ class Simulation(ABC):
         self.begin_assessment()
     
     def resume_simulation(self) -> None:
+        """
+        Carries on from a loaded checkpoint, at the start of the generation it was taken before
+        """
         self.log_resume_simulation()
         time.sleep(self.sleep_betwen_logs)
+        
+        self._complete = False
+        if self._generation == self.generations:
+            self.end_run()
+        else:
+            self.begin_generation()
     
     def begin_run(self) -> None:
         self.log_begin_run()
@@ -136,9 +607,16 @@ class Simulation(ABC):
         time.sleep(self.sleep_betwen_logs)
         
         self._timestep = 0
+        scenario = self._begin_scenario()
         
         for obj in self.contents.values():
             obj.begin_assessment()
+        populations = [ obj for obj in self.contents.values() if isinstance(obj, Population) ]
+        self._lookup_cached(populations, scenario)
+        self._skip_assessment = self._all_cached(populations)
+        if self._skip_assessment:
+            return
+        for obj in self.contents.values():
             obj.add_to_world()
         
         self.world.initialise()
@@ -164,11 +642,14 @@ class Simulation(ABC):
     
     def end_generation(self) -> None:
         self.log_end_generation()
+        self._end_generation_timing()
         time.sleep(self.sleep_betwen_logs)
         
+        self._migrate_if_due()
         for obj in self.contents.values():
             obj.end_generation()
         self._generation += 1
+        self._checkpoint_if_due()
         
         if self._generation == self.generations:
             self.end_run()
@@ -178,8 +659,10 @@ class Simulation(ABC):
     def end_assessment(self) -> None:
         for obj in self.contents.values():
             obj.end_assessment()
+        self._end_scenario()
         
         self.log_end_assessment()
+        self._end_assessment_timing()
         time.sleep(self.sleep_betwen_logs)
         self.world.clean()
         self._assessment += 1
@@ -189,6 +672,44 @@ class Simulation(ABC):
         else:
             self.begin_assessment()
     
+    def _end_assessment_timing(self) -> None:
+        if self.timer:
+            self.log_timings("assessment", self.timer)
+            self.generation_timer.merge(self.timer)
+            self.timer.reset()
+    
+    def _end_generation_timing(self) -> None:
+        if self.timer:
+            self.log_timings("generation", self.generation_timer)
+            self.timing_record.append(self.generation_timer.copy())
+            self.generation_timer.reset()
+    
+    def save_checkpoint(self, path: str = None) -> None:
+        save_checkpoint(self, path or self.checkpoint_path)
+    
+    def load_checkpoint(self, path: str = None) -> None:
+        """
+        Loads a checkpoint into this (freshly constructed) simulation, run_simulation then resumes from it
+        """
+        load_checkpoint(self, path or self.checkpoint_path)
+        self.loaded = True
+    
+    def _checkpoint_if_due(self) -> None:
+        if self.checkpoint_every > 0 and self.checkpoint_path and self._generation % self.checkpoint_every == 0:
+            self.save_checkpoint()
+            self.log_checkpoint()
+    
+    def snapshot(self) -> Snapshot:
+        """
+        World snapshot plus the counters, populations and genetic algorithms of the simulation
+        """
+        snapshot = self.world.snapshot()
+        snapshot.capture(self, *self.contents.values())
+        return snapshot
+    
+    def restore(self, snapshot: Snapshot) -> None:
+        self.world.restore(snapshot)
+    
     def reset_run(self) -> None:
         self.world.clean()
         self._run -= 1
@@ -231,4 +752,13 @@ class Simulation(ABC):
         pass
     
     def log_update(self) -> None:
-        pass
\ No newline at end of file
+        pass
+    
+    def log_checkpoint(self) -> None:
+        self.log.info(f"Checkpoint saved: run {self._run}, generation {self._generation}")
+    
+    def log_timings(self, scope: str, timer: PhaseTimer) -> None:
+        """
+        Called with the "assessment" or "generation" totals when timing is enabled
+        """
+        self.log.info(f"{scope.capitalize()} timings: {timer.report()}")
\ No newline at end of file
@@ -0,0 +1,110 @@
+import random
+import numpy as np
+
+# Bookkeeping that belongs to the world or the renderer rather than to the object's simulation state
+_EXCLUDED = ("_kinematic_store", "_kinematic_slot", "_display_list", "_display_state")
+
+def _copy(value):
+    """
+    Copies containers and arrays, but keeps references to any other object
+    """
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return [ _copy(v) for v in value ]
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, dict):
+        return { k: _copy(v) for k, v in value.items() }
+    return value
+
+def capture_state(obj) -> dict:
+    return { k: _copy(v) for k, v in obj.__dict__.items() if k not in _EXCLUDED }
+
+def restore_state(obj, state: dict) -> None:
+    """
+    Puts back the captured attributes, attributes created since (caches, display lists) are left alone
+    """
+    attributes = obj.__dict__
+    for key, value in state.items():
+        attributes[key] = _copy(value)
+
+def _column(values: list) -> np.ndarray | None:
+    """
+    The values as one array if they are all Python numbers of one type or all arrays of one shape and dtype
+    """
+    first = values[0]
+    if isinstance(first, np.ndarray):
+        if first.dtype == object or not all(isinstance(v, np.ndarray) and v.shape == first.shape and v.dtype == first.dtype for v in values):
+            return None
+        return np.stack(values)
+    if type(first) not in (bool, int, float) or not all(type(v) is type(first) for v in values):
+        return None
+    try:
+        column = np.array(values)
+    except OverflowError:
+        return None
+    return column if column.dtype != object else None
+
+class _Block:
+    """
+    Captured state of objects of one class
+    
+    Attributes that every object holds as numbers of one type, or as arrays of one shape, are stacked
+    into one array per attribute. Everything else is kept per object.
+    """
+    def __init__(self, objects: list):
+        self.objects = objects
+        self.columns: dict[str, np.ndarray] = {}
+        self.scalars: set[str] = set()
+        attributes = [ obj.__dict__ for obj in objects ]
+        for key in [ k for k in attributes[0] if k not in _EXCLUDED and all(k in a for a in attributes) ]:
+            values = [ a[key] for a in attributes ]
+            column = _column(values)
+            if column is not None:
+                self.columns[key] = column
+                if not isinstance(values[0], np.ndarray):
+                    self.scalars.add(key)
+        self.rest = [ { k: _copy(v) for k, v in a.items() if k not in _EXCLUDED and k not in self.columns } for a in attributes ]
+    
+    def restore(self) -> None:
+        for key, column in self.columns.items():
+            values = column.tolist() if key in self.scalars else column
+            for obj, value in zip(self.objects, values):
+                obj.__dict__[key] = value if key in self.scalars else value.copy()
+        for obj, state in zip(self.objects, self.rest):
+            restore_state(obj, state)
+
+class Snapshot:
+    """
+    Simulation state of a World (or a whole Simulation), restored in place into the same objects
+    
+    A snapshot can be restored any number of times. Objects are never rebuilt, so their render
+    resources stay valid and anything holding a reference to them keeps working.
+    """
+    def __init__(self):
+        self._blocks: list[_Block] = []
+        self._captured: set[int] = set()
+        self.kinematics: tuple[list, dict[str, np.ndarray]] = None
+        self.random_state: tuple = (np.random.get_state(), random.getstate())
+    
+    def __len__(self):
+        return len(self._captured)
+    
+    def capture(self, *objects) -> None:
+        """
+        Adds the state of the objects and their state_objects(), stacked by class across all of them
+        """
+        parts = [ part for obj in objects for part in (obj.state_objects() if hasattr(obj, "state_objects") else [obj]) ]
+        classes: dict[type, list] = {}
+        for part in parts:
+            if id(part) not in self._captured:
+                self._captured.add(id(part))
+                classes.setdefault(type(part), []).append(part)
+        self._blocks.extend(_Block(objects) for objects in classes.values())
+    
+    def restore_objects(self) -> None:
+        for block in self._blocks:
+            block.restore()
+        np.random.set_state(self.random_state[0])
+        random.setstate(self.random_state[1])
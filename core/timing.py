@@ -0,0 +1,68 @@
+import time
+
+class PhaseTimer:
+    """
+    Wall time spent in each phase of the simulation step, summed over the steps since the last reset
+    
+    Code being timed calls start() once and lap(phase) after each phase, so each lap covers the time
+    since the previous call. Callers keep the timer as None when disabled and guard with `if timer:`
+    """
+    PHASES = (
+        "objects",
+        "control",
+        "kinematics",
+        "sensors",
+        "removal",
+        "sensing",
+        "interaction",
+        "collisions",
+        "queues",
+        "display"
+    )
+    
+    def __init__(self):
+        self.totals: dict[str, float] = dict.fromkeys(self.PHASES, 0.0)
+        self.steps: int = 0
+        self._last: float = 0.0
+    
+    def start(self) -> None:
+        self._last = time.perf_counter()
+    
+    def lap(self, phase: str) -> None:
+        now = time.perf_counter()
+        self.totals[phase] += now - self._last
+        self._last = now
+    
+    def reset(self) -> None:
+        for phase in self.totals:
+            self.totals[phase] = 0.0
+        self.steps = 0
+    
+    def merge(self, other: "PhaseTimer") -> None:
+        for phase, seconds in other.totals.items():
+            self.totals[phase] += seconds
+        self.steps += other.steps
+    
+    def copy(self) -> "PhaseTimer":
+        timer = PhaseTimer()
+        timer.merge(self)
+        return timer
+    
+    @property
+    def total(self) -> float:
+        return sum(self.totals.values())
+    
+    def per_step(self) -> dict[str, float]:
+        """
+        Mean seconds per step of each phase
+        """
+        steps = max(self.steps, 1)
+        return { phase: seconds / steps for phase, seconds in self.totals.items() }
+    
+    def report(self) -> str:
+        total = self.total
+        lines = [f"{self.steps} steps, {total:.3f} s"]
+        for phase, seconds in self.totals.items():
+            share = 100.0 * seconds / total if total > 0.0 else 0.0
+            lines.append(f"  {phase:<12} {seconds:9.4f} s {share:5.1f}% {1000.0 * seconds / max(self.steps, 1):8.3f} ms/step")
+        return "\n".join(lines)
@@ -50,6 +50,22 @@ class BeamSettings:
     SENSOR_ALPHA: float = 0.2
     BEAM_QUALITY: float = 0.1
 
+# Broadphase Settings
+class BroadphaseSettings:
+    CELL_SIZE: float = 100.0
+    SENSING_CELL_SIZE: float = 25.0 # The sensing pass gathers every pair in range, so it uses finer cells
+
+# Static Object Index Settings
+class StaticIndexSettings:
+    LEAF_SIZE: int = 16
+    OVERFLOW_FRACTION: float = 0.25 # Moved objects held outside the tree, as a fraction of it, before a rebuild
+    MIN_OBJECTS: int = 4096 # Below this many objects the sensing pass scans them all instead
+
+# Occupancy Grid Settings
+class OccupancySettings:
+    CELL_SIZE: float = 25.0
+    MIN_CANDIDATES: int = 1024 # Below this many candidates the sensing pass counts them all instead
+
 # Agent Settings
 class AgentSettings:
     RADIUS: float = 5.0
@@ -169,6 +185,18 @@ GA_FITNESS_FIX = SimpleNamespace(
     FIX = 2
 )
 
+FITNESS_CACHE_POLICY = SimpleNamespace(
+    REUSE = 0, # Cached fitness replaces the assessment
+    AVERAGE = 1, # Keep assessing, fitness is the mean of every sample so far, reused once enough are held
+    BYPASS = 2 # Never cache, for noisy fitness
+)
+
+MIGRATION_TOPOLOGY = SimpleNamespace(
+    RING = 0, # Island i sends to island i + 1
+    FULL = 1, # Every island sends to every other
+    RANDOM = 2 # Every island sends to one other, redrawn at each migration
+)
+
 GA_FLOAT_DEFAULT = SimpleNamespace(
     TOURNAMENT = 0.75,
     RANK_SPRESSURE = 1.5,
@@ -0,0 +1,75 @@
+import numpy as np
+
+from core.sensor.sensing import reduction
+from core.sensor.function.match import MatchKind, MatchExact
+from core.world.world_object import WorldObject
+
+class TypeBuckets:
+    """
+    A world's agents and objects grouped under every class in their MRO, and which class pairs can
+    affect each other when an agent interacts with another object
+    
+    Rebuilt from the world's lists whenever they change (dirty is set by the world).
+    """
+    def __init__(self):
+        self.dirty: bool = True
+        self.classes: list[type] = []
+        self.agent_classes = np.zeros(0, np.intp)
+        self.object_classes = np.zeros(0, np.intp)
+        # interest[a, b]: an agent of classes[a] has to interact with an object of classes[b]
+        self.interest = np.zeros((0, 0), bool)
+        # The interest rows spread over the world's objects and agents, by position
+        self.objects_wanted = np.zeros((0, 0), bool)
+        self.agents_wanted = np.zeros((0, 0), bool)
+        # Classes that only need pairs in contact, there is nothing left for their sensors to do
+        self.contact_only = np.zeros(0, bool)
+        self.max_radius: float = 0.0
+        self._buckets: dict[type, list[WorldObject]] = {}
+    
+    def bucket(self, typing: type) -> list[WorldObject]:
+        return self._buckets.get(typing, [])
+    
+    def rebuild(self, agents: list, objects: list, default_interact: callable, collisions_shown: bool) -> None:
+        index = {}
+        self._buckets = {}
+        for obj in objects + agents:
+            index.setdefault(type(obj), len(index))
+            for cls in type(obj).__mro__:
+                self._buckets.setdefault(cls, []).append(obj)
+        self.classes = list(index)
+        self.agent_classes = np.array([ index[type(a)] for a in agents ], np.intp)
+        self.object_classes = np.array([ index[type(o)] for o in objects ], np.intp)
+        
+        n = len(self.classes)
+        everything = np.zeros(n, bool)
+        solid = np.zeros(n, bool)
+        for obj in objects + agents:
+            solid[index[type(obj)]] |= bool(obj.solid)
+        # Overridden collision responses can do anything, so their pairs are always kept
+        responds = np.array([ cls.on_collision is not WorldObject.on_collision for cls in self.classes ], bool)
+        
+        targets = [ set() for _ in range(n) ]
+        for agt in agents:
+            a = index[type(agt)]
+            if not default_interact(agt):
+                everything[a] = True
+                continue
+            for sensor in agt.sensors.values():
+                if reduction(sensor) is not None:
+                    continue # Filled by the sensing pass
+                match = sensor.match_function
+                if type(match) in (MatchKind, MatchExact):
+                    targets[a].add(match.object_type)
+                else:
+                    everything[a] = True
+        
+        self.interest = np.zeros((n, n), bool)
+        for a in range(n):
+            sensed = np.array([ any(issubclass(cls, t) for t in targets[a]) for cls in self.classes ], bool)
+            # Drawn collisions make every contact count
+            self.interest[a] = everything[a] | collisions_shown | responds[a] | responds | (solid[a] & solid) | sensed
+        self.contact_only = ~everything & np.array([ not t for t in targets ], bool)
+        self.max_radius = max([ float(o.radius) for o in objects + agents ], default=0.0)
+        self.objects_wanted = self.interest[:, self.object_classes]
+        self.agents_wanted = self.interest[:, self.agent_classes]
+        self.dirty = False
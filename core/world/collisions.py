@@ -1,5 +1,4 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from core.render.lazy import gl, glu
 from core.world.drawable import Drawable
 from core.utils import Vec2, MAX_COLLISIONS
 
@@ -10,18 +9,18 @@ class Collision(Drawable):
     def display(self) -> None:
         if not self.visible:
             return
-        disk = gluNewQuadric()
-        gluQuadricDrawStyle(disk, GLU_FILL)
-        glColor4f(0.9, 0.9, 0.4, 0.2)
+        disk = glu.gluNewQuadric()
+        glu.gluQuadricDrawStyle(disk, glu.GLU_FILL)
+        gl.glColor4f(0.9, 0.9, 0.4, 0.2)
         
-        glEnable(GL_BLEND)
-        glPushMatrix()
-        glTranslated(self.location[0], self.location[1], 0)
-        gluDisk(disk, 0, 3, 10, 1)
-        glPopMatrix()
-        glDisable(GL_BLEND)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glPushMatrix()
+        gl.glTranslated(self.location[0], self.location[1], 0)
+        glu.gluDisk(disk, 0, 3, 10, 1)
+        gl.glPopMatrix()
+        gl.glDisable(gl.GL_BLEND)
         
-        gluDeleteQuadric(disk)
+        glu.gluDeleteQuadric(disk)
 
 class Collisions:
     def __init__(self):
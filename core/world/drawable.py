@@ -1,8 +1,9 @@
 import numpy as np
 
 from abc import ABC
-from OpenGL.GL import *
+from core.render.lazy import gl
 from core.utils import Vec2, DRAWABLE_RADIUS
+from core.render.base import render_backend
 
 class Drawable(ABC):
     def __init__(
@@ -17,6 +18,8 @@ class Drawable(ABC):
         self._start_location: Vec2 = location
         self._start_orientation: float = orientation
         self._display_list: int = 0
+        self._display_state: tuple = None
+        self.world = None
 
         self.location: Vec2 = location
         self.orientation: float = orientation
@@ -26,11 +29,10 @@ class Drawable(ABC):
         self.edges: list[Vec2] = edges
         
         self.circular = True if edges is None else False
-        self.world = None
     
     def __del__(self):
         if self._display_list != 0:
-            glDeleteLists(self._display_list, 1)
+            render_backend().delete(self._display_list)
     
     '''
     def _repr(self, **kwargs) -> str:
@@ -49,12 +51,14 @@ class Drawable(ABC):
     '''
     
     def initialise(self) -> None:
-        if self._display_list != 0:
-            glDeleteLists(self._display_list, 1)
-        self._display_list = glGenLists(1)
-        glNewList(self._display_list, GL_COMPILE)
-        self.draw()
-        glEndList()
+        # Reused objects keep their display list unless what it was drawn from has changed
+        state = self.display_state()
+        if self._display_list == 0 or state != self._display_state:
+            backend = render_backend()
+            if self._display_list != 0:
+                backend.delete(self._display_list)
+            self._display_list = backend.compile(self.draw)
+            self._display_state = state
         
         if not self.circular:
             for e in self.edges:
@@ -62,39 +66,71 @@ class Drawable(ABC):
                 if np.linalg.norm(e)**2 > self.radius**2:
                     self.radius = np.linalg.norm(e)
     
+    def display_state(self) -> tuple:
+        """
+        Everything draw() depends on, subclasses whose draw() uses more extend it
+        """
+        edges = None if self.edges is None else np.asarray(self.edges, np.float64).tobytes()
+        return (type(self).draw, float(self.radius), np.asarray(self.colour, np.float64).tobytes(), edges)
+    
     def display(self) -> None:
         if not self.visible or self.location is None:
             return
-        glPushMatrix()
-        glTranslated(self.location[0], self.location[1], 0.0)
-        glRotated(np.degrees(self.orientation), 0.0, 0.0, 1.0)
+        gl.glPushMatrix()
+        gl.glTranslated(self.location[0], self.location[1], 0.0)
+        gl.glRotated(np.degrees(self.orientation), 0.0, 0.0, 1.0)
         self.render()
-        glPopMatrix()
+        gl.glPopMatrix()
     
     def render(self) -> None:
         if self._display_list:
-            glCallList(self._display_list)
+            render_backend().call(self._display_list)
     
     def draw(self) -> None:
         sides = 15 if self.circular else len(self.edges)
-        glBegin(GL_POLYGON)
+        gl.glBegin(gl.GL_POLYGON)
         for f in range(sides):
             pos: float = f / sides
-            glColor4f(
+            gl.glColor4f(
                 self.colour[0] * (1 - pos**2),
                 self.colour[1] * (1 - pos**2),
                 self.colour[2] * (1 - pos**2),
                 self.colour[3]
             )
             if self.circular:
-                glVertex2d(
+                gl.glVertex2d(
                     self.radius * np.sin(pos * 2 * np.pi),
                     self.radius * np.cos(pos * 2 * np.pi)
                 )
             else:
-                glVertex2d(self.edges[f][0], self.edges[f][1])
+                gl.glVertex2d(self.edges[f][0], self.edges[f][1])
                 f += 1
-        glEnd()
+        gl.glEnd()
+    
+    @classmethod
+    def batch_geometry(cls, drawables: list["Drawable"]) -> list[tuple[int, float, np.ndarray, np.ndarray]]:
+        """
+        What draw() renders for same-shaped drawables, in local coordinates, as
+        (GL primitive, line width, (drawables, vertices, 2) vertices, (drawables, vertices, 4) colours)
+        """
+        first = drawables[0]
+        sides = 15 if first.circular else len(first.edges)
+        pos = np.arange(sides) / sides
+        if first.circular:
+            radius = np.array([ d.radius for d in drawables ], np.float32)
+            outline = np.stack((np.sin(pos * 2 * np.pi), np.cos(pos * 2 * np.pi)), axis=1)
+            vertices = radius[:, None, None] * outline
+        else:
+            vertices = np.array([ d.edges for d in drawables ], np.float32)
+        
+        colour = np.array([ d.colour for d in drawables ], np.float32)
+        colours = np.empty((len(drawables), sides, 4), np.float32)
+        colours[:, :, :3] = colour[:, None, :3] * (1 - pos**2)[None, :, None]
+        colours[:, :, 3] = colour[:, None, 3]
+        
+        # The polygon as a triangle fan around its first vertex
+        fan = np.stack((np.zeros(sides - 2, np.intp), np.arange(1, sides - 1), np.arange(2, sides)), axis=1).ravel()
+        return [(gl.GL_TRIANGLES, 1.0, vertices[:, fan], colours[:, fan])]
     
     def offset_orientation(self, angle: float) -> None:
         orientation = self.orientation + angle
@@ -102,6 +138,37 @@ class Drawable(ABC):
             orientation += 2 * np.pi
         orientation %= 2 * np.pi
         self.orientation = orientation
-
     
-    # TODO: Serialiase/Deserialise?
+    def serialise(self) -> dict[str, np.ndarray]:
+        # Unset locations and orientations are stored as NaN so drawables of one type stack into arrays
+        return {
+            "location": _vector(self.location),
+            "orientation": _scalar(self.orientation),
+            "start_location": _vector(self._start_location),
+            "start_orientation": _scalar(self._start_orientation),
+            "radius": np.array(self.radius, dtype=np.float64),
+            "colour": np.array(self.colour, dtype=np.float32)
+        }
+    
+    def unserialise(self, data: dict[str, np.ndarray]) -> None:
+        self.location = None if np.isnan(data["location"]).any() else data["location"].copy()
+        self.orientation = None if np.isnan(data["orientation"]) else float(data["orientation"])
+        self._start_location = None if np.isnan(data["start_location"]).any() else data["start_location"].copy()
+        self._start_orientation = None if np.isnan(data["start_orientation"]) else float(data["start_orientation"])
+        self.radius = float(data["radius"])
+        self.colour = data["colour"].tolist()
+
+def _vector(value: Vec2) -> np.ndarray:
+    return np.full(2, np.nan, np.float32) if value is None else np.array(value, dtype=np.float32)
+
+def _scalar(value: float) -> np.ndarray:
+    return np.array(np.nan if value is None else value, dtype=np.float64)
+
+def is_batchable(typing: type[Drawable]) -> bool:
+    """
+    Drawables can be batched when their draw() comes from a class that also describes it in batch_geometry()
+    """
+    for cls in typing.__mro__:
+        if "draw" in cls.__dict__:
+            return "batch_geometry" in cls.__dict__
+    return False
@@ -0,0 +1,45 @@
+import numpy as np
+
+from core.utils import Vec2
+
+def displacement(origin: np.ndarray, target: np.ndarray, size: tuple[float, float] = None) -> np.ndarray:
+    """
+    Shortest vectors from origin to target on a toroidal world of the given size (a plane when None)
+    
+    Broadcasts over the leading axes, so every pair of two sets of positions is one call.
+    """
+    delta = np.asarray(target) - np.asarray(origin)
+    if size is None:
+        return delta
+    if delta.ndim == 1:
+        # Single pairs come one at a time from Python, where scalar arithmetic is cheaper
+        dx, dy = delta.tolist()
+        shift = (size[0] * round(dx / size[0]), size[1] * round(dy / size[1]))
+        return delta - np.array(shift, delta.dtype) if shift[0] or shift[1] else delta
+    size = np.asarray(size, delta.dtype)
+    return delta - size * np.round(delta / size)
+
+def distance(origin: np.ndarray, target: np.ndarray, size: tuple[float, float] = None) -> np.ndarray:
+    delta = displacement(origin, target, size)
+    return np.sqrt(np.einsum("...k,...k->...", delta, delta))
+
+def nearest_image(origin: np.ndarray, target: np.ndarray, size: tuple[float, float] = None) -> np.ndarray:
+    """
+    The copy of target closest to origin
+    """
+    return np.asarray(origin) + displacement(origin, target, size)
+
+def image_offsets(location: Vec2, reach: float, size: tuple[float, float]) -> list[Vec2]:
+    """
+    Offsets of the copies of a shape within reach of location that show across the world's edges,
+    corners included
+    """
+    steps = []
+    for axis in range(2):
+        axis_steps = [0.0]
+        if location[axis] - reach < 0:
+            axis_steps.append(size[axis])
+        if location[axis] + reach > size[axis]:
+            axis_steps.append(-size[axis])
+        steps.append(axis_steps)
+    return [ np.array([x, y], np.float32) for x in steps[0] for y in steps[1] if x or y ]
@@ -0,0 +1,201 @@
+import numpy as np
+
+from core.utils import AgentSettings as AS
+
+class KinematicStore:
+    """
+    Contiguous per-agent kinematic state, integrated for every registered agent at once
+    """
+    # Column name: (width, dtype)
+    COLUMNS = {
+        "location": (2, np.float32),
+        "velocity": (2, np.float32),
+        "orientation": (1, np.float32),
+        "controls": (2, np.float32),
+        "min_speed": (1, np.float32),
+        "max_speed": (1, np.float32),
+        "max_rotate": (1, np.float32),
+        "timestep": (1, np.float32),
+        "distance_travelled": (1, np.float64),
+        "power_used": (1, np.float64),
+        # Index of the agent's world when several worlds share one store
+        "world": (1, np.int32)
+    }
+
+    def __init__(self, capacity: int = 64):
+        self.agents: list = []
+        self._capacity = 0
+        self._columns: dict[str, np.ndarray] = {}
+        self._allocate(capacity)
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name][:len(self.agents)]
+        raise AttributeError(name)
+
+    def _allocate(self, capacity: int) -> None:
+        columns = {}
+        for name, (width, dtype) in self.COLUMNS.items():
+            shape = (capacity, width) if width > 1 else (capacity,)
+            columns[name] = np.zeros(shape, dtype)
+            if name in self._columns:
+                columns[name][:len(self.agents)] = self._columns[name][:len(self.agents)]
+        self._columns = columns
+        self._capacity = capacity
+
+    def get(self, column: str, slot: int):
+        value = self._columns[column][slot]
+        return value if value.ndim else float(value)
+
+    def set(self, column: str, slot: int, value) -> None:
+        self._columns[column][slot] = 0.0 if value is None else value
+
+    def register(self, agent, world: int = 0) -> None:
+        if agent.__dict__.get("_kinematic_store") is self:
+            return
+        if len(self.agents) == self._capacity:
+            self._allocate(2 * self._capacity)
+
+        slot = len(self.agents)
+        self.agents.append(agent)
+        for name in self.COLUMNS:
+            self.set(name, slot, agent.__dict__.pop(f"_kinematic_{name}", None))
+        self.set("world", slot, world)
+        agent.__dict__["_kinematic_store"] = self
+        agent.__dict__["_kinematic_slot"] = slot
+
+    def unregister(self, agent) -> None:
+        if agent.__dict__.get("_kinematic_store") is not self:
+            return
+        slot = agent.__dict__.pop("_kinematic_slot")
+        del agent.__dict__["_kinematic_store"]
+        for name in self.COLUMNS:
+            value = self.get(name, slot)
+            agent.__dict__[f"_kinematic_{name}"] = value.copy() if isinstance(value, np.ndarray) else value
+
+        # Fill the hole with the last agent so the arrays stay contiguous
+        last = len(self.agents) - 1
+        if slot != last:
+            moved = self.agents[last]
+            for column in self._columns.values():
+                column[slot] = column[last]
+            self.agents[slot] = moved
+            moved.__dict__["_kinematic_slot"] = slot
+        self.agents.pop()
+
+    def clear(self) -> None:
+        for agent in reversed(self.agents[:]):
+            self.unregister(agent)
+
+    def snapshot(self) -> tuple[list, dict[str, np.ndarray]]:
+        n = len(self.agents)
+        return list(self.agents), { name: column[:n].copy() for name, column in self._columns.items() }
+
+    def restore(self, state: tuple[list, dict[str, np.ndarray]]) -> None:
+        """
+        Makes the registered agents and their values exactly those of the snapshot, without copying back
+        """
+        agents, columns = state
+        for agent in self.agents:
+            agent.__dict__.pop("_kinematic_store", None)
+            agent.__dict__.pop("_kinematic_slot", None)
+
+        if len(agents) > self._capacity:
+            self._allocate(max(len(agents), 2 * self._capacity))
+        self.agents = list(agents)
+        for name, column in columns.items():
+            self._columns[name][:len(agents)] = column
+        for slot, agent in enumerate(self.agents):
+            for name in self.COLUMNS:
+                agent.__dict__.pop(f"_kinematic_{name}", None)
+            agent.__dict__["_kinematic_store"] = self
+            agent.__dict__["_kinematic_slot"] = slot
+
+    def integrate(
+        self,
+        width: float | np.ndarray,
+        height: float | np.ndarray,
+        slots: np.ndarray | slice = slice(None)
+    ) -> np.ndarray:
+        """
+        Advance the given slots one timestep, returns which of them wrapped around the world
+        
+        width and height are either one world size or one per slot, for slots in worlds of different sizes
+        """
+        columns = {name: column[:len(self.agents)] for name, column in self._columns.items()}
+        dt = columns["timestep"][slots]
+        min_speed = columns["min_speed"][slots]
+        max_speed = columns["max_speed"][slots]
+        controls = columns["controls"][slots]
+        left, right = controls[:, 0], controls[:, 1]
+
+        orientation = columns["orientation"][slots] + columns["max_rotate"][slots] * (left - right) * dt
+        orientation = np.mod(orientation, 2 * np.pi).astype(np.float32)
+        columns["orientation"][slots] = orientation
+
+        velocity = columns["velocity"][slots]
+        speed = (max_speed - min_speed) * 0.5 * (left + right) + min_speed
+        velocity += speed[:, None] * np.stack((np.cos(orientation), np.sin(orientation)), axis=1)
+
+        drag = np.divide(AS.DRAG, max_speed, out=np.zeros_like(max_speed), where=max_speed > 0.0)
+        velocity -= velocity * drag[:, None]
+
+        speed = np.sqrt(np.einsum("ij,ij->i", velocity, velocity))
+        clamp = speed**2 > max_speed**2
+        if clamp.any():
+            direction = np.divide(velocity[clamp], speed[clamp, None], out=np.zeros_like(velocity[clamp]), where=speed[clamp, None] != 0)
+            direction[speed[clamp] == 0] = [0.0, 1.0]
+            velocity[clamp] = direction * max_speed[clamp, None]
+            speed[clamp] = np.abs(max_speed[clamp])
+        columns["velocity"][slots] = velocity
+
+        location = columns["location"][slots] + velocity * dt[:, None]
+        size = np.stack(np.broadcast_arrays(np.float32(width), np.float32(height)), axis=-1)
+        wrapped = ((location < 0) | (location >= size)).any(axis=1)
+        if wrapped.any():
+            location = np.mod(location, size)
+            location[location >= size] = 0.0
+        columns["location"][slots] = location
+
+        columns["distance_travelled"][slots] += speed * dt
+        columns["power_used"][slots] += ((max_speed - min_speed)[:, None] * np.abs(controls) + min_speed[:, None]).sum(axis=1)
+        return wrapped
+
+class KinematicField:
+    """
+    Agent attribute that lives in a KinematicStore column while the agent is registered
+    
+    Vectors are read as read-only copies: the store reallocates its columns as it grows and moves
+    agents between slots as others leave, so a view kept by the caller would go stale, and a
+    writable copy would drop writes into it silently. Assign to the attribute instead, as in
+    `agent.location = agent.location + offset`; writing into the array raises ValueError.
+    """
+    def __init__(self, column: str):
+        self.column = column
+        self.key = f"_kinematic_{column}"
+        self.vector = KinematicStore.COLUMNS[column][0] > 1
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        attributes = obj.__dict__
+        store = attributes.get("_kinematic_store")
+        if store is None:
+            return attributes.get(self.key)
+        value = store._columns[self.column][attributes["_kinematic_slot"]]
+        if not self.vector:
+            return float(value)
+        value = value.copy()
+        value.setflags(write=False)
+        return value
+
+    def __set__(self, obj, value) -> None:
+        store = obj.__dict__.get("_kinematic_store")
+        if store is None:
+            obj.__dict__[self.key] = value
+        else:
+            store.set(self.column, obj.__dict__["_kinematic_slot"], value)
@@ -0,0 +1,118 @@
+import numpy as np
+
+from core.utils import Vec2, OccupancySettings as OS
+
+class OccupancyGrid:
+    """
+    Per-class counts of positions in the cells of a grid over the toroidal world
+    
+    counts() answers how many positions lie within a disc: cells the disc covers completely are
+    taken whole from the counts, and only positions in the cells its edge passes through are
+    measured. Each query costs O(cells covered) rather than O(positions), and every query is
+    answered in the same set of array operations.
+    """
+    def __init__(self, cell_size: float = OS.CELL_SIZE):
+        self.cell_size = cell_size
+        self.width: float = 0.0
+        self.height: float = 0.0
+        self.columns: int = 1
+        self.rows: int = 1
+        
+        self._positions = np.zeros((0, 2), np.float32)
+        self._classes = np.zeros(0, np.intp)
+        self._order = np.zeros(0, np.intp)
+        self._starts = np.zeros(2, np.intp)
+        self._counts = np.zeros((0, 1), np.int64)
+    
+    def rebuild(self, positions: np.ndarray, classes: np.ndarray, class_count: int, width: float, height: float) -> None:
+        self.width, self.height = width, height
+        self.columns = max(1, int(width // self.cell_size))
+        self.rows = max(1, int(height // self.cell_size))
+        self._cell_width = width / self.columns
+        self._cell_height = height / self.rows
+        
+        self._positions = np.asarray(positions, np.float32).reshape(-1, 2)
+        self._classes = np.asarray(classes, np.intp)
+        cx = np.floor(self._positions[:, 0] / self._cell_width).astype(np.intp) % self.columns
+        cy = np.floor(self._positions[:, 1] / self._cell_height).astype(np.intp) % self.rows
+        keys = cy * self.columns + cx
+        # Counting sort, as in SpatialHash: members of cell c are self._order[starts[c]:starts[c + 1]]
+        self._order = np.argsort(keys, kind="stable")
+        cells = self.columns * self.rows
+        self._starts = np.zeros(cells + 1, np.intp)
+        np.cumsum(np.bincount(keys, minlength=cells), out=self._starts[1:])
+        self._counts = np.bincount(self._classes * cells + keys, minlength=class_count * cells).reshape(class_count, cells)
+    
+    def counts(self, points: np.ndarray, radii: np.ndarray, matched: np.ndarray) -> np.ndarray:
+        """
+        For each query, how many positions of the classes it matches (a row of masks over class ids)
+        lie within its radius of its point, measured across the wrap
+        """
+        points = np.asarray(points, np.float32).reshape(-1, 2)
+        radii = np.asarray(radii, np.float64)
+        matched = np.asarray(matched, bool).reshape(len(points), -1)
+        totals = np.zeros(len(points), np.int64)
+        if not len(points):
+            return totals
+        
+        masks, mask_index = np.unique(matched, axis=0, return_inverse=True)
+        combined = masks.astype(np.int64) @ self._counts
+        for radius in np.unique(radii):
+            group = np.flatnonzero(radii == radius)
+            totals[group] = self._disc_counts(points[group], radius, combined, mask_index.reshape(-1)[group], matched[group])
+        return totals
+    
+    def _disc_counts(self, points: np.ndarray, radius: float, combined: np.ndarray, masks: np.ndarray, matched: np.ndarray) -> np.ndarray:
+        if not np.isfinite(radius):
+            return combined[masks].sum(axis=1)
+        half_columns = int(np.ceil(radius / self._cell_width)) + 1
+        half_rows = int(np.ceil(radius / self._cell_height)) + 1
+        if 2 * half_columns + 1 > self.columns or 2 * half_rows + 1 > self.rows:
+            # The disc overlaps itself around the wrap, cells can't be taken whole
+            everything = np.arange(len(self._positions))
+            return np.array([ self._measure(everything, p, radius, m) for p, m in zip(points, matched) ], np.int64)
+        
+        x = points[:, 0].astype(np.float64) % self.width
+        y = points[:, 1].astype(np.float64) % self.height
+        cx = np.floor(x / self._cell_width).astype(np.intp)
+        cy = np.floor(y / self._cell_height).astype(np.intp)
+        columns = cx[:, None] + np.arange(-half_columns, half_columns + 1)
+        rows = cy[:, None] + np.arange(-half_rows, half_rows + 1)
+        near_x, far_x = self._extent(columns * self._cell_width - x[:, None], self._cell_width)
+        near_y, far_y = self._extent(rows * self._cell_height - y[:, None], self._cell_height)
+        near = near_y[:, :, None]**2 + near_x[:, None, :]**2
+        far = far_y[:, :, None]**2 + far_x[:, None, :]**2
+        
+        # Cells count whole only when their far corner is inside with room to spare for rounding
+        whole = far <= (radius * (1.0 - 1e-5))**2
+        edge = (near <= radius * radius) & ~whole
+        cells = (rows % self.rows)[:, :, None] * self.columns + (columns % self.columns)[:, None, :]
+        totals = (combined[masks[:, None, None], cells] * whole).sum(axis=(1, 2))
+        
+        query, flat = np.nonzero(edge.reshape(len(points), -1))
+        edge_cells = cells.reshape(len(points), -1)[query, flat]
+        starts = self._starts[edge_cells]
+        lengths = self._starts[edge_cells + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        members = self._order[offsets + np.arange(lengths.sum())]
+        query = np.repeat(query, lengths)
+        keep = matched[query, self._classes[members]]
+        query, members = query[keep], members[keep]
+        inside = self._distances(self._positions[members] - points[query]) <= np.float64(radius)**2
+        return totals + np.bincount(query[inside], minlength=len(points))
+    
+    def _extent(self, start: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray]:
+        # Nearest and furthest distance from 0 to each interval [start, start + cell]
+        end = start + cell
+        return np.maximum(0.0, np.maximum(start, -end)), np.maximum(np.abs(start), np.abs(end))
+    
+    def _distances(self, delta: np.ndarray) -> np.ndarray:
+        # Same arithmetic as the sensing pass, so edge cases land on the same side
+        size = np.array([self.width, self.height], np.float32)
+        delta -= size * np.round(delta / size)
+        return np.einsum("ij,ij->i", delta, delta)
+    
+    def _measure(self, candidates: np.ndarray, point: Vec2, radius: float, matched: np.ndarray) -> int:
+        candidates = candidates[matched[self._classes[candidates]]]
+        delta = self._positions[candidates] - np.asarray(point, np.float32)
+        return int(np.count_nonzero(self._distances(delta) <= np.float64(radius)**2))
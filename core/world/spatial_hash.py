@@ -0,0 +1,129 @@
+import numpy as np
+
+from core.utils import Vec2, BroadphaseSettings as BS
+
+class SpatialHash:
+    """
+    Uniform grid over the toroidal world, rebuilt from positions every timestep
+    """
+    def __init__(self, width: float, height: float, cell_size: float = BS.CELL_SIZE):
+        self.cell_size = cell_size
+        self.width: float = 0.0
+        self.height: float = 0.0
+        self.columns: int = 1
+        self.rows: int = 1
+
+        self._positions = np.zeros((0, 2), np.float32)
+        self._order = np.zeros(0, np.intp)
+        self._starts = np.zeros(2, np.intp)
+        self.resize(width, height)
+
+    def __len__(self):
+        return len(self._positions)
+
+    def resize(self, width: float, height: float) -> None:
+        self.width, self.height = width, height
+        self.columns = max(1, int(width // self.cell_size))
+        self.rows = max(1, int(height // self.cell_size))
+        self._cell_width = width / self.columns
+        self._cell_height = height / self.rows
+
+    def _cells(self, positions: np.ndarray) -> np.ndarray:
+        cx = np.floor(positions[:, 0] / self._cell_width).astype(np.intp) % self.columns
+        cy = np.floor(positions[:, 1] / self._cell_height).astype(np.intp) % self.rows
+        return cy * self.columns + cx
+
+    def rebuild(self, positions: np.ndarray) -> None:
+        self._positions = np.asarray(positions, np.float32).reshape(-1, 2)
+        keys = self._cells(self._positions)
+        # Counting sort: members of cell c are self._order[starts[c]:starts[c + 1]]
+        self._order = np.argsort(keys, kind="stable")
+        counts = np.bincount(keys, minlength=self.columns * self.rows)
+        self._starts = np.zeros(len(counts) + 1, np.intp)
+        np.cumsum(counts, out=self._starts[1:])
+
+    def _span(self, centre: float, radius: float, size: float, cells: int) -> np.ndarray:
+        first = int(np.floor((centre - radius) / size))
+        last = int(np.floor((centre + radius) / size))
+        return (first + np.arange(min(last - first + 1, cells))) % cells
+
+    def query(self, point: Vec2, radius: float) -> list[int]:
+        """
+        Indices (ascending) of every position within radius of point, measured across the wrap
+        """
+        if len(self._positions) == 0:
+            return []
+        if not np.isfinite(radius):
+            return list(range(len(self._positions)))
+
+        columns = self._span(point[0], radius, self._cell_width, self.columns)
+        rows = self._span(point[1], radius, self._cell_height, self.rows)
+        if len(columns) == self.columns and len(rows) == self.rows:
+            candidates = np.arange(len(self._positions))
+        else:
+            # Gather the contiguous runs of every covered cell without a Python loop
+            cells = (rows[:, None] * self.columns + columns[None, :]).ravel()
+            starts = self._starts[cells]
+            lengths = self._starts[cells + 1] - starts
+            total = lengths.sum()
+            if total == 0:
+                return []
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            candidates = self._order[offsets + np.arange(total)]
+
+        delta = self._positions[candidates] - np.asarray(point, np.float32)
+        delta[:, 0] -= self.width * np.round(delta[:, 0] / self.width)
+        delta[:, 1] -= self.height * np.round(delta[:, 1] / self.height)
+        inside = np.einsum("ij,ij->i", delta, delta) <= radius * radius
+        return np.sort(candidates[inside]).tolist()
+
+    def pairs(self, points: np.ndarray, radii: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Every (query, index) pair with position index within radii[query] of points[query], as query()
+        finds them but for all the queries at once, ordered by query and then index
+        """
+        points = np.asarray(points, np.float32).reshape(-1, 2)
+        radii = np.asarray(radii, np.float64).reshape(-1)
+        queries, members = [np.zeros(0, np.intp)], [np.zeros(0, np.intp)]
+        count = len(self._positions)
+        for radius in np.unique(radii) if count else []:
+            group = np.flatnonzero(radii == radius)
+            # Cells a little wider than the disc, so rounding never leaves out a position the distance test keeps
+            reach = radius + 1e-3 + 1e-6 * radius
+            if np.isfinite(radius):
+                half_columns = int(np.ceil(reach / self._cell_width))
+                half_rows = int(np.ceil(reach / self._cell_height))
+            if not np.isfinite(radius) or 2 * half_columns + 1 > self.columns or 2 * half_rows + 1 > self.rows:
+                # The window would cover a cell twice around the wrap, so measure everything
+                query = np.repeat(group, count)
+                found = np.tile(np.arange(count), len(group))
+            else:
+                x, y = points[group, 0].astype(np.float64), points[group, 1].astype(np.float64)
+                cx = np.floor(x / self._cell_width).astype(np.intp)
+                cy = np.floor(y / self._cell_height).astype(np.intp)
+                columns = cx[:, None] + np.arange(-half_columns, half_columns + 1)
+                rows = cy[:, None] + np.arange(-half_rows, half_rows + 1)
+                # Only the cells each disc spans, the window is sized for the widest
+                spanned = (
+                    (rows >= np.floor((y - reach) / self._cell_height)[:, None])
+                    & (rows <= np.floor((y + reach) / self._cell_height)[:, None])
+                )[:, :, None] & (
+                    (columns >= np.floor((x - reach) / self._cell_width)[:, None])
+                    & (columns <= np.floor((x + reach) / self._cell_width)[:, None])
+                )[:, None, :]
+                cells = ((rows % self.rows)[:, :, None] * self.columns + (columns % self.columns)[:, None, :]).reshape(len(group), -1)
+                starts = self._starts[cells].ravel()
+                lengths = (self._starts[cells + 1].ravel() - starts) * spanned.ravel()
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                found = self._order[offsets + np.arange(lengths.sum())]
+                query = np.repeat(np.repeat(group, cells.shape[1]), lengths)
+
+            delta = self._positions[found] - points[query]
+            delta[:, 0] -= self.width * np.round(delta[:, 0] / self.width)
+            delta[:, 1] -= self.height * np.round(delta[:, 1] / self.height)
+            inside = np.einsum("ij,ij->i", delta, delta) <= np.float32(radius * radius)
+            queries.append(query[inside])
+            members.append(found[inside])
+        query, found = np.concatenate(queries), np.concatenate(members)
+        order = np.argsort(query * count + found)
+        return query[order], found[order]
@@ -0,0 +1,191 @@
+import heapq
+import numpy as np
+
+from core.utils import Vec2, StaticIndexSettings as SIS
+
+class _Tree:
+    """
+    k-d tree over the objects of one class, with leaves of up to leaf_size points
+    
+    Moved objects leave the tree for an overflow list that queries scan, until it outgrows
+    OVERFLOW_FRACTION of the tree and the whole tree is rebuilt. A class that is not static gets
+    no nodes: every object stays in the overflow list and its position is read at each query.
+    """
+    def __init__(self, objects: list, ranks: list[int], leaf_size: int, static: bool = True):
+        self.objects = objects
+        self.static = static
+        # Where each object comes in the world's list, to break ties the way a scan of it would
+        self.ranks = np.array(ranks, np.intp)
+        self.positions = np.array([ o.location for o in objects ], np.float32).reshape(-1, 2)
+        self.leaf_size = leaf_size
+        self.build()
+    
+    def build(self) -> None:
+        self.order = np.arange(len(self.objects))
+        self.in_tree = np.ones(len(self.objects), bool)
+        self.overflow: list[int] = []
+        # Per node: split axis (-1 for leaves), split value, children, run of order, bounding box
+        self.nodes: list[tuple] = []
+        if not self.static:
+            self.in_tree[:] = False
+            self.overflow = list(range(len(self.objects)))
+        elif len(self.objects):
+            self._build(0, len(self.objects))
+        self.sorted = self.positions[self.order]
+    
+    def _build(self, start: int, end: int) -> int:
+        node = len(self.nodes)
+        self.nodes.append(None)
+        points = self.positions[self.order[start:end]]
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        box = (float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1]))
+        if end - start <= self.leaf_size:
+            self.nodes[node] = (-1, start, end, box)
+            return node
+        axis = int(np.argmax(hi - lo))
+        middle = (end - start) // 2
+        part = np.argpartition(points[:, axis], middle)
+        self.order[start:end] = self.order[start:end][part]
+        left = self._build(start, start + middle)
+        right = self._build(start + middle, end)
+        self.nodes[node] = (axis, left, right, box)
+        return node
+    
+    def move(self, slot: int, location: Vec2) -> None:
+        self.positions[slot] = location
+        if self.in_tree[slot]:
+            self.in_tree[slot] = False
+            self.overflow.append(slot)
+            if len(self.overflow) > max(self.leaf_size, SIS.OVERFLOW_FRACTION * len(self.objects)):
+                self.build()
+
+def _gap(c: float, lo: float, hi: float, size: float) -> float:
+    """
+    Distance along one axis from c to the interval [lo, hi], around the wrap when size is given
+    """
+    if size is None:
+        return max(lo - c, c - hi, 0.0)
+    along = (c - lo) % size
+    if along <= hi - lo:
+        return 0.0
+    return min(along - (hi - lo), size - along)
+
+class StaticIndex:
+    """
+    Nearest and k-nearest queries over a world's objects (not agents), per class
+    
+    Built from the object list whenever it changes (dirty is set by the world). Only classes that
+    set WorldObject.static get a tree: their relocated objects are passed to relocate(), which is
+    O(log n) amortised. Other classes may write into location in place, so queries scan their
+    current positions instead. covers() tells whether a query is answered from trees alone.
+    Distances are float32, the same as the world's sensing pass, and measured across the wrap
+    when a world size is given.
+    """
+    def __init__(self, leaf_size: int = SIS.LEAF_SIZE):
+        self.leaf_size = leaf_size
+        self.dirty: bool = True
+        self._trees: dict[type, _Tree] = {}
+        self._slots: dict[int, tuple[_Tree, int]] = {}
+    
+    def __len__(self):
+        return len(self._slots)
+    
+    def rebuild(self, objects: list) -> None:
+        by_class = {}
+        for rank, obj in enumerate(objects):
+            objs, ranks = by_class.setdefault(type(obj), ([], []))
+            objs.append(obj)
+            ranks.append(rank)
+        self._trees = { cls: _Tree(objs, ranks, self.leaf_size, cls.static) for cls, (objs, ranks) in by_class.items() }
+        self._slots = { id(o): (tree, slot) for tree in self._trees.values() if tree.static for slot, o in enumerate(tree.objects) }
+        self.dirty = False
+    
+    def covers(self, typing: type) -> bool:
+        """
+        Whether every indexed instance of typing belongs to a static class, so queries need no scan
+        """
+        return all(tree.static for cls, tree in self._trees.items() if issubclass(cls, typing))
+    
+    def relocate(self, obj) -> None:
+        entry = self._slots.get(id(obj))
+        if entry is not None:
+            entry[0].move(entry[1], obj.location)
+    
+    def nearest(self, point: Vec2, typing: type, max_range: float = np.inf, size: tuple[float, float] = None) -> tuple[object, float]:
+        """
+        The nearest instance of typing closer than max_range and its distance, (None, max_range) if none
+        """
+        found = self.k_nearest(point, typing, 1, max_range, size)
+        return found[0] if found else (None, max_range)
+    
+    def k_nearest(self, point: Vec2, typing: type, k: int, max_range: float = np.inf, size: tuple[float, float] = None) -> list[tuple[object, float]]:
+        """
+        Up to k instances of typing closer than max_range with their distances, nearest first
+        
+        Equal distances go to the object added to the world first.
+        """
+        point = np.asarray(point, np.float32)
+        # Max-heap of the best k so far, as (-distance, -rank, slot, tree)
+        best = []
+        for cls, tree in self._trees.items():
+            if issubclass(cls, typing) and len(tree.objects):
+                self._search(tree, point, k, max_range, size, best)
+        found = sorted((-d, -rank, slot, tree) for d, rank, slot, tree in best)
+        return [ (tree.objects[slot], d) for d, _, slot, tree in found ]
+    
+    def _search(self, tree: _Tree, point: np.ndarray, k: int, limit: float, size: tuple[float, float], best: list) -> None:
+        wrap = None if size is None else np.asarray(size, np.float32)
+        x, y = float(point[0]), float(point[1])
+        width, height = (None, None) if size is None else size
+        
+        def bound(box: tuple) -> float:
+            dx = _gap(x, box[0], box[2], width)
+            dy = _gap(y, box[1], box[3], height)
+            return np.sqrt(dx * dx + dy * dy)
+        
+        def worst() -> float:
+            return -best[0][0] if len(best) == k else limit
+        
+        def offer(distance: np.ndarray, slots: np.ndarray) -> None:
+            # Equal to the worst kept can still win on rank
+            closer = np.flatnonzero((distance < limit) & (distance <= worst()))
+            ranks = tree.ranks[slots[closer]]
+            # Only the best k of them can make it in, ties keep the object that comes first in the world's list
+            for i in closer[np.lexsort((ranks, distance[closer]))[:k]]:
+                slot = int(slots[i])
+                entry = (-distance[i], -int(tree.ranks[slot]), slot, tree)
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry[:2] > best[0][:2]:
+                    heapq.heapreplace(best, entry)
+        
+        if not tree.static:
+            tree.positions = np.array([ o.location for o in tree.objects ], np.float32).reshape(-1, 2)
+        if tree.overflow:
+            slots = np.array(tree.overflow, np.intp)
+            offer(self._distances(tree.positions[slots], point, wrap), slots)
+        
+        stack = [(0.0, 0)] if tree.nodes else []
+        while stack:
+            lower, node = stack.pop()
+            # Bounds are float64 and distances float32, the slack keeps boxes at a tie
+            if lower * (1.0 - 1e-6) > worst():
+                continue
+            entry = tree.nodes[node]
+            if entry[0] < 0:
+                _, start, end, _ = entry
+                slots = tree.order[start:end]
+                distance = self._distances(tree.sorted[start:end], point, wrap)
+                distance[~tree.in_tree[slots]] = np.inf
+                offer(distance, slots)
+            else:
+                near, far = sorted((bound(tree.nodes[c][-1]), c) for c in entry[1:3])
+                # The nearer child goes on top so it is searched first
+                stack.append(far)
+                stack.append(near)
+    
+    def _distances(self, positions: np.ndarray, point: np.ndarray, wrap: np.ndarray) -> np.ndarray:
+        delta = positions - point
+        if wrap is not None:
+            delta -= wrap * np.round(delta / wrap)
+        return np.sqrt(np.einsum("ij,ij->i", delta, delta))
@@ -1,7 +1,12 @@
-from OpenGL.GL import *
+import numpy as np
+
+from core.render.lazy import gl
 from core.utils import Vec2
 
 class Trail():
+    """
+    The last `length` locations of an agent, kept in a preallocated circular buffer
+    """
     def __init__(
         self,
         visible: bool = True,
@@ -11,30 +16,87 @@ class Trail():
     ):
         self.colour = colour
         self.width = width
-        self.length = length
         self.visible = visible
-        self.points: list[Vec2] = []
-        
+        self._buffer = np.zeros((0, 2), np.float32)
+        self._start: int = 0
+        self._count: int = 0
+        self.length = length
+    
+    def __len__(self):
+        return self._count
+    
+    @property
+    def length(self) -> int:
+        return len(self._buffer)
+    
+    @length.setter
+    def length(self, length: int) -> None:
+        points = self.points[-length:] if length > 0 else self._buffer[:0]
+        self._buffer = np.zeros((length, 2), np.float32)
+        self._buffer[:len(points)] = points
+        self._start, self._count = 0, len(points)
+    
+    @property
+    def points(self) -> np.ndarray:
+        """
+        Oldest to newest, as a (points, 2) copy
+        """
+        end = self._start + self._count
+        if end <= len(self._buffer):
+            return self._buffer[self._start:end].copy()
+        return np.concatenate((self._buffer[self._start:], self._buffer[:end - len(self._buffer)]))
+    
     def display(self) -> None:
-        if not self.visible or len(self.points) == 0:
-            return
-        glLineWidth(self.width)
-        glEnable(GL_BLEND)
-        glBegin(GL_LINE_STRIP)
-        for i, pt in enumerate(self.points):
-            glColor4f(self.colour[0], self.colour[1], self.colour[2], i / len(self.points))
-            glVertex2d(pt[0], pt[1])
-        glEnd()
-        glDisable(GL_BLEND)
-        glLineWidth(1.0)
+        display_trails([self])
     
     def append(self, location: Vec2) -> None:
-        self.points.append(location)
+        size = len(self._buffer)
+        if size == 0:
+            return
+        self._buffer[(self._start + self._count) % size] = location
+        if self._count < size:
+            self._count += 1
+        else:
+            self._start = (self._start + 1) % size
     
     def update(self) -> None:
-        while len(self.points) > self.length:
-            self.points.pop(0)
+        # The buffer never holds more than length points, kept for subclasses that extend it
+        pass
     
     def clear(self):
-        self.points.clear()
-    
\ No newline at end of file
+        self._start = 0
+        self._count = 0
+
+def display_trails(trails: list[Trail]) -> None:
+    """
+    Draws every visible trail as vertex/colour arrays, one draw call per line width
+    """
+    widths: dict[float, list[Trail]] = {}
+    for trail in trails:
+        if trail.visible and trail._count > 1:
+            widths.setdefault(trail.width, []).append(trail)
+    if not widths:
+        return
+    
+    gl.glEnable(gl.GL_BLEND)
+    gl.glEnableClientState(gl.GL_VERTEX_ARRAY)
+    gl.glEnableClientState(gl.GL_COLOR_ARRAY)
+    for width, group in widths.items():
+        counts = np.array([ trail._count for trail in group ], np.int32)
+        firsts = np.zeros(len(group), np.int32)
+        np.cumsum(counts[:-1], out=firsts[1:])
+        
+        vertices = np.concatenate([ trail.points for trail in group ])
+        colours = np.empty((len(vertices), 4), np.float32)
+        colours[:, :3] = np.repeat([ trail.colour[:3] for trail in group ], counts, axis=0)
+        # Each trail fades in from fully transparent at its oldest point
+        colours[:, 3] = (np.arange(len(vertices)) - np.repeat(firsts, counts)) / np.repeat(counts, counts)
+        
+        gl.glLineWidth(width)
+        gl.glVertexPointer(2, gl.GL_FLOAT, 0, vertices)
+        gl.glColorPointer(4, gl.GL_FLOAT, 0, colours)
+        gl.glMultiDrawArrays(gl.GL_LINE_STRIP, firsts, counts, len(group))
+    gl.glDisableClientState(gl.GL_COLOR_ARRAY)
+    gl.glDisableClientState(gl.GL_VERTEX_ARRAY)
+    gl.glDisable(gl.GL_BLEND)
+    gl.glLineWidth(1.0)
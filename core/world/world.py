@@ -1,26 +1,64 @@
 import numpy as np
 
-from OpenGL.GL import *
-from OpenGL.GLU import *
+from copy import deepcopy
+from types import SimpleNamespace
+from core.render.lazy import gl, glu
 from core.world.collisions import Collisions, Collision
-from core.utils import Vec2, Vec3, WORLD_DISPLAY_PARAMETERS, WORLD_DISPLAY_TYPE, ColourPalette, BACKGROUND_COLOUR
+from core.world.trail import display_trails
+from core.world.drawable import Drawable, is_batchable
+from core.world.spatial_hash import SpatialHash
+from core.world.buckets import TypeBuckets
+from core.world.static_index import StaticIndex
+from core.world.occupancy import OccupancyGrid
+from core.world.kinematics import KinematicStore
+from core.sensor.sensing import sense
+from core.network.brain_batch import BrainBatch
+from core.render.base import render_backend
+from core.render.batch import display_batched
+from core.timing import PhaseTimer
+from core.snapshot import Snapshot
+from core.utils import Vec2, Vec3, BroadphaseSettings as BS, StaticIndexSettings as SIS, WORLD_DISPLAY_PARAMETERS, WORLD_DISPLAY_TYPE, ColourPalette, BACKGROUND_COLOUR
 from core.agent.agent import Agent
 from core.world.world_object import WorldObject
 
 class World:
-    def __init__(self, simulation):
+    def __init__(
+        self,
+        simulation,
+        display_params: SimpleNamespace = None,
+        kinematics: KinematicStore = None,
+        brains: BrainBatch = None,
+        index: int = 0
+    ):
+        """
+        kinematics and brains are given when this world is one of several sharing them, see WorldBatch
+        """
         self._simulation = simulation
         self._agents: list[Agent] = []
         self._agent_queue: list[Agent] = []
         self._objects: list[WorldObject] = []
         self._object_queue: list[WorldObject] = []
         self._collisions = Collisions()
+        self._kinematics = KinematicStore() if kinematics is None else kinematics
+        self._brains = BrainBatch() if brains is None else brains
+        self.index = index
+        # Set by Simulation.enable_timing, None keeps the step free of timing calls
+        self.timer: PhaseTimer = None
         
         self._colour = None
         self._update_in_progress: bool = False
+        self._record_trails: bool = False
         
         self._display_type = WORLD_DISPLAY_TYPE
-        self._display_params = WORLD_DISPLAY_PARAMETERS
+        # Each world's own copy, so worlds can differ in size and display settings
+        self._display_params = deepcopy(WORLD_DISPLAY_PARAMETERS if display_params is None else display_params)
+        
+        self._object_hash = SpatialHash(self._display_params.width, self._display_params.height)
+        self._agent_hash = SpatialHash(self._display_params.width, self._display_params.height)
+        self._types = TypeBuckets()
+        self._static = StaticIndex()
+        self._occupancy = OccupancyGrid()
+        self._sensing_hash = SpatialHash(self._display_params.width, self._display_params.height, BS.SENSING_CELL_SIZE)
         
         # TODO: Mouse compatibility? self.mouse
         # TODO: Keyboard compatibilit? self.keys
@@ -42,38 +80,40 @@ class World:
             obj.initialise()
         for agt in self._agents:
             agt.initialise()
+        # Sensors may have changed since the objects were added
+        self._contents_changed()
     
     def _initialise_gl(self) -> None:
-        glHint(GL_PERSPECTIVE_CORRECTION_HINT, GL_NICEST)
-        glEnable(GL_COLOR_MATERIAL)
+        gl.glHint(gl.GL_PERSPECTIVE_CORRECTION_HINT, gl.GL_NICEST)
+        gl.glEnable(gl.GL_COLOR_MATERIAL)
         
         global_ambient = [0.3, 0.3, 0.3, 1.0]
         diffuse = [1.0, 1.0, 1.0, 1.0]
         specular = [1.0, 1.0, 1.0, 1.0]
         
-        glLightModelfv(GL_LIGHT_MODEL_AMBIENT, global_ambient)
+        gl.glLightModelfv(gl.GL_LIGHT_MODEL_AMBIENT, global_ambient)
         position = [
             0.0, 
             0.5 * self._display_params.height, 
             0.5 * self._display_params.width, 
             1.0
         ]
-        glLightfv(GL_LIGHT0, GL_POSITION, position)
-        glLightfv(GL_LIGHT0, GL_DIFFUSE, diffuse)
-        glLightfv(GL_LIGHT0, GL_SPECULAR, specular)
-        glEnable(GL_LIGHT0)
+        gl.glLightfv(gl.GL_LIGHT0, gl.GL_POSITION, position)
+        gl.glLightfv(gl.GL_LIGHT0, gl.GL_DIFFUSE, diffuse)
+        gl.glLightfv(gl.GL_LIGHT0, gl.GL_SPECULAR, specular)
+        gl.glEnable(gl.GL_LIGHT0)
         
-        glShadeModel(GL_SMOOTH)
-        glClearColor(
+        gl.glShadeModel(gl.GL_SMOOTH)
+        gl.glClearColor(
             self._display_params.colour[0],
             self._display_params.colour[1],
             self._display_params.colour[2],
             1.0
         )
-        glMatrixMode(GL_PROJECTION)
-        gluOrtho2D(0, self._display_params.width, 0, self._display_params.height)
-        glMatrixMode(GL_MODELVIEW)
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE)
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        glu.gluOrtho2D(0, self._display_params.width, 0, self._display_params.height)
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE)
     
     def add_object(self, obj: list[WorldObject | Agent] | WorldObject | Agent) -> None:
         if isinstance(obj, list):
@@ -82,6 +122,7 @@ class World:
         elif isinstance(obj, Agent):
             if not self._update_in_progress:
                 self._agents.append(obj)
+                self._kinematics.register(obj, self.index)
             else:
                 self._agent_queue.append(obj)
         elif isinstance(obj, WorldObject):
@@ -89,9 +130,13 @@ class World:
                 self._objects.append(obj)
             else:
                 self._object_queue.append(obj)
+        self._contents_changed()
         obj.world = self
     
     def add_collision(self, vector: Vec2):
+        # Collisions are only kept to be drawn
+        if not render_backend().enabled:
+            return
         c = Collision(vector, bool(self._display_type.DISPLAY_COLLISIONS))
         self._collisions.append(c)
     
@@ -109,78 +154,221 @@ class World:
         for agt in reversed(self._agents[:]):
             if isinstance(agt, typing):
                 self._agents.remove(agt)
+                self._kinematics.unregister(agt)
                 self._agent_queue.append(agt)
         
+        self._contents_changed()
         # TODO: Monitor update?
         return removed_objects + removed_agents
     
     def display(self) -> None:
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        glLoadIdentity()
+        if not render_backend().enabled:
+            return
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+        gl.glLoadIdentity()
         self._colour = ColourPalette[BACKGROUND_COLOUR][:3]
-        glClearColor(self._colour[0], self._colour[1], self._colour[2], 1.0)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        gl.glClearColor(self._colour[0], self._colour[1], self._colour[2], 1.0)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
         
+        # Objects with their own display() or draw() are drawn one by one, the rest in batches
         if self._display_params.config & self._display_type.DISPLAY_WORLDOBJECTS != 0:
+            batched = []
             for obj in self._objects:
-                obj.display()
+                if type(obj).display is Drawable.display and is_batchable(type(obj)):
+                    batched.append(obj)
+                else:
+                    obj.display()
+            display_batched(batched)
         if self._display_params.config & self._display_type.DISPLAY_AGENTS != 0:
+            if self._display_params.config & self._display_type.DISPLAY_TRAILS != 0:
+                display_trails([ agt.trail for agt in self._agents ])
+            batched = []
             for agt in self._agents:
-                agt.display()
+                if type(agt).display is Agent.display and is_batchable(type(agt)):
+                    agt.display_sensors()
+                    batched.append(agt)
+                else:
+                    agt.display()
+            display_batched(batched)
         if self._display_params.config & self._display_type.DISPLAY_COLLISIONS != 0:
             self._collisions.display()
     
     def draw_objects(self) -> None:
         if self._display_params.config & self._display_type.DISPLAY_WORLDOBJECTS != 0:
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-            glMatrixMode(GL_MODELVIEW)
-            glLoadIdentity()
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+            gl.glMatrixMode(gl.GL_MODELVIEW)
+            gl.glLoadIdentity()
             # TODO: does this work?
-            gluLookAt(*self.eye, *self.look, *self.up)
+            glu.gluLookAt(*self.eye, *self.look, *self.up)
             for i in range(1, len(self._objects) + 1):
-                glLoadName(i)
+                gl.glLoadName(i)
                 self._objects[i - 1].display()
-            glFlush()
+            gl.glFlush()
     
     def update(self) -> None:
+        timer = self.timer
+        if timer:
+            timer.start()
+        self._begin_step()
+        if timer:
+            timer.lap("objects")
+        step_agents([self], self._agents, self._kinematics, self._brains, timer)
+        self._end_step(timer)
+    
+    def _begin_step(self) -> None:
         self._update_in_progress = True
+        self._record_trails = (
+            render_backend().enabled
+            and self._display_params.config & self._display_type.DISPLAY_TRAILS != 0
+        )
         # TODO: Mouse update?
         
         for obj in self._objects:
             obj.update()
-        for agt in self._agents:
-            agt.update()
-        
+    
+    def _end_step(self, timer: PhaseTimer = None) -> None:
         for obj in reversed(self._objects[:]):
             if obj.dead:
                 self._objects.remove(obj)
+                self._contents_changed()
         for agt in reversed(self._agents[:]):
             if agt.dead:
                 self._agents.remove(agt)
+                self._kinematics.unregister(agt)
+                self._contents_changed()
+        if timer:
+            timer.lap("removal")
+        
+        # Agents with their own interact() sense object by object
+        index = self._static_index() if len(self._objects) >= SIS.MIN_OBJECTS else None
+        sense(self._agents, self._objects, [ self._default_interact(agt) for agt in self._agents ], self.size, index, self._occupancy, self._sensing_hash)
+        if timer:
+            timer.lap("sensing")
         
         if self._agents:
-            for obj in self._objects:
-                for agt in self._agents:
-                    agt.interact(obj)
-            for i, agt1 in enumerate(self._agents):
-                for j, agt2 in enumerate(self._agents):
-                    if i != j:
-                        agt1.interact(agt2)
+            self._interact()
+        if timer:
+            timer.lap("interaction")
         
         self._collisions.update()
+        if timer:
+            timer.lap("collisions")
+        
         self._update_in_progress = False
         self._update_queues()
+        if timer:
+            timer.lap("queues")
+            timer.steps += 1
+    
+    def _default_interact(self, agt: Agent) -> bool:
+        return type(agt).interact is Agent.interact and type(agt).sensor_interact is Agent.sensor_interact
+    
+    def objects_of(self, typing: type[WorldObject | Agent]) -> list[WorldObject | Agent]:
+        """
+        Agents and objects in the world that are instances of typing
+        """
+        self._refresh_types()
+        return list(self._types.bucket(typing))
+    
+    def _refresh_types(self) -> None:
+        if self._types.dirty:
+            self._types.rebuild(self._agents, self._objects, self._default_interact, render_backend().enabled)
+    
+    def nearest(self, point: Vec2, typing: type[WorldObject], max_range: float = np.inf) -> tuple[WorldObject, float]:
+        """
+        Nearest object (not agent) of typing to point across the wrap and its distance, (None, max_range) if none
+        """
+        return self._static_index().nearest(point, typing, max_range, self.size)
+    
+    def k_nearest(self, point: Vec2, typing: type[WorldObject], k: int, max_range: float = np.inf) -> list[tuple[WorldObject, float]]:
+        """
+        Up to k objects (not agents) of typing nearest to point across the wrap, with their distances
+        """
+        return self._static_index().k_nearest(point, typing, k, max_range, self.size)
+    
+    def _static_index(self) -> StaticIndex:
+        if self._static.dirty:
+            self._static.rebuild(self._objects)
+        return self._static
+    
+    def _relocated(self, obj: WorldObject) -> None:
+        if not self._static.dirty:
+            self._static.relocate(obj)
+    
+    def _contents_changed(self) -> None:
+        self._types.dirty = True
+        self._static.dirty = True
+    
+    def _positions(self, objs: list[WorldObject]) -> np.ndarray:
+        return np.array([ o.location for o in objs ], np.float32).reshape(-1, 2)
+    
+    def _interact(self) -> None:
+        """
+        Broadphase: each agent only interacts with what lies inside its interaction range
+        """
+        for hashing in [self._object_hash, self._agent_hash]:
+            hashing.resize(self._display_params.width, self._display_params.height)
+        self._object_hash.rebuild(self._positions(self._objects))
+        self._agent_hash.rebuild(self._positions(self._agents))
+        
+        # Pairs whose classes can't affect each other are dropped before interact() is called
+        self._refresh_types()
+        types = self._types
+        # Agents whose sensors were all filled by the sensing pass only need what they can touch
+        reach = [
+            min(agt._interaction_range, agt.radius + types.max_radius) if types.contact_only[c] else agt._interaction_range
+            for agt, c in zip(self._agents, types.agent_classes)
+        ]
+        for i, agt in enumerate(self._agents):
+            wanted = types.objects_wanted[types.agent_classes[i]]
+            if wanted.any():
+                for j in self._object_hash.query(agt.location, reach[i]):
+                    if wanted[j]:
+                        agt.interact(self._objects[j])
+        for i, agt1 in enumerate(self._agents):
+            wanted = types.agents_wanted[types.agent_classes[i]]
+            if wanted.any():
+                for j in self._agent_hash.query(agt1.location, reach[i]):
+                    if i != j and wanted[j]:
+                        agt1.interact(self._agents[j])
     
     def _update_queues(self) -> None:
+        if self._agent_queue or self._object_queue:
+            self._contents_changed()
+        for agt in self._agent_queue:
+            self._kinematics.register(agt, self.index)
         self._agents.extend(self._agent_queue)
         self._agent_queue.clear()
         self._objects.extend(self._object_queue)
         self._object_queue.clear()
     
+    def snapshot(self) -> Snapshot:
+        """
+        Captures poses, controls, sensor, brain and trail state of everything in the world plus the RNGs
+        """
+        snapshot = Snapshot()
+        snapshot.kinematics = self._kinematics.snapshot()
+        snapshot.capture(self, *self._objects, *self._agents, *self._object_queue, *self._agent_queue)
+        return snapshot
+    
+    def restore(self, snapshot: Snapshot) -> None:
+        """
+        Puts the world back to a snapshot in place, objects added since are dropped from the world
+        """
+        self._kinematics.restore(snapshot.kinematics)
+        snapshot.restore_objects()
+        self._collisions.clear()
+        self._contents_changed()
+    
     def clean(self) -> None:
+        # Only this world's agents, the store may be shared with other worlds
+        for agt in reversed(self._agents):
+            self._kinematics.unregister(agt)
+        self._brains.clear()
         self._agents.clear()
         self._objects.clear()
         self._collisions.clear()
+        self._contents_changed()
     
     def centre(self) -> Vec2:
         return np.array([
@@ -188,6 +376,10 @@ class World:
             0.5 * self._display_params.height
         ], np.float32)
     
+    @property
+    def size(self) -> tuple[float, float]:
+        return self._display_params.width, self._display_params.height
+    
     def random_location(self) -> Vec2:
         return np.array([
             self._display_params.width * np.random.rand(),
@@ -199,4 +391,43 @@ class World:
             x / self._display_params.window_width * self._display_params.width,
             ((self._display_params.window_height - y) / self._display_params.window_height) * self._display_params.height
         ], np.float32)
-    
\ No newline at end of file
+    
+def step_agents(
+    worlds: list[World],
+    agents: list[Agent],
+    kinematics: KinematicStore,
+    brains: BrainBatch,
+    timer: PhaseTimer = None
+) -> None:
+    """
+    Controllers run per agent, kinematics are integrated for all agents of all the worlds in one pass
+    """
+    batched, custom = [], []
+    for agt in agents:
+        (batched if type(agt).update is Agent.update else custom).append(agt)
+    
+    brains.fire(batched)
+    for agt in batched:
+        agt.begin_update()
+    if timer:
+        timer.lap("control")
+    
+    slots = np.array([ agt._kinematic_slot for agt in batched ], np.intp)
+    # World sizes by world index, looked up for every slot through the store's world column
+    sizes = np.zeros((max(w.index for w in worlds) + 1, 2), np.float32)
+    for w in worlds:
+        sizes[w.index] = (w._display_params.width, w._display_params.height)
+    sizes = sizes[kinematics.world[slots]]
+    wrapped = kinematics.integrate(sizes[:, 0], sizes[:, 1], slots)
+    for agt, wrap in zip(batched, wrapped):
+        agt.end_update(bool(wrap))
+    # Overridden updates cannot be split into phases, their whole update counts as kinematics
+    for agt in custom:
+        agt.update()
+    if timer:
+        timer.lap("kinematics")
+    
+    for agt in batched:
+        agt.update_sensors()
+    if timer:
+        timer.lap("sensors")
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+from core.world.world import World, step_agents
+from core.world.kinematics import KinematicStore
+from core.network.brain_batch import BrainBatch
+
+class WorldBatch:
+    """
+    Independent worlds advanced together, every agent of every world lives in one KinematicStore
+    (indexed by world) and fires through one BrainBatch
+    """
+    def __init__(self, simulation, count: int, display_params: list[SimpleNamespace] | SimpleNamespace = None):
+        self._kinematics = KinematicStore()
+        self._brains = BrainBatch()
+        if not isinstance(display_params, list):
+            display_params = [display_params] * count
+        assert len(display_params) == count, "One set of display parameters per world"
+        self.worlds = [
+            World(simulation, params, self._kinematics, self._brains, index)
+            for index, params in enumerate(display_params)
+        ]
+    
+    def __len__(self):
+        return len(self.worlds)
+    
+    def __iter__(self):
+        return iter(self.worlds)
+    
+    def __getitem__(self, index: int) -> World:
+        return self.worlds[index]
+    
+    def initialise(self) -> None:
+        for world in self.worlds:
+            world.initialise()
+    
+    def update(self) -> None:
+        for world in self.worlds:
+            world._begin_step()
+        agents = [ agt for world in self.worlds for agt in world._agents ]
+        step_agents(self.worlds, agents, self._kinematics, self._brains)
+        for world in self.worlds:
+            world._end_step()
+    
+    def clean(self) -> None:
+        for world in self.worlds:
+            world.clean()
+        self._brains.clear()
@@ -5,6 +5,8 @@ from core.utils import Vec2, DRAWABLE_RADIUS, get_vector_angle, normalise_vector
 
 class WorldObject(Drawable):
     _amount = 0 # Amount of World Objects
+    # Set by classes whose instances only move by assigning location, which lets the world keep them in its static index
+    static: bool = False
     
     def __init__(
         self,
@@ -35,6 +37,17 @@ class WorldObject(Drawable):
         WorldObject._amount -= 1
         super().__del__()
     
+    @property
+    def location(self) -> Vec2:
+        return self._location
+    
+    @location.setter
+    def location(self, location: Vec2) -> None:
+        # Assigning (not writing into the array) keeps the world's static index current for static classes
+        self._location = location
+        if self.world is not None:
+            self.world._relocated(self)
+    
     def initialise(self) -> None:
         if self._start_location is None:
             if self.world is not None:
@@ -71,6 +84,12 @@ class WorldObject(Drawable):
     def update(self):
         pass
     
+    def state_objects(self) -> list:
+        """
+        Every object whose attributes make up this one's simulation state, for snapshots
+        """
+        return [self]
+    
     def on_collision(self, other) -> None:
         pass
 
@@ -10,7 +10,20 @@ IS_DEMO = True
 DEMO_NAME = "Braitenberg"
 CLASS_NAME = "BraitenbergSimulation"
 
+DOT_POSITIONS = [(150.0, 100.0), (200.0, 100.0), (250.0, 100.0), (300.0, 100.0),
+                 (350.0, 100.0), (350.0, 150.0), (350.0, 200.0),
+                 (350.0, 250.0), (350, 300.0), (350.0, 350.0),
+                 (300.0, 350.0), (250.0, 350.0), (200.0, 350.0), (200.0, 400.0),
+                 (200.0, 450.0), (200.0, 500.0), (200.0, 550.0), (250.0, 550.0),
+                 (300.0, 550.0), (350.0, 550.0), (400.0, 550.0), (450.0, 550.0),
+                 (500.0, 550.0), (550.0, 550.0), (600.0, 550.0), (600.0, 500.0),
+                 (600.0, 450.0), (600.0, 400.0), (600.0, 350.0), (550.0, 350.0),
+                 (500.0, 350.0), (500.0, 300.0), (500.0, 250.0), (500.0, 200.0),
+                 (500.0, 150.0), (500.0, 100.0), (500.0, 50.0)]
+
 class Dot(WorldObject):
+    static = True
+    
     def __init__(self, l):
         super().__init__(l, 0.0, 12.5)
         self.colour = ColourPalette[ColourType.YELLOW]
@@ -64,18 +77,7 @@ class BraitenbergSimulation(Simulation):
         self.world.add_object(Braitenberg2a())
         self.world.add_object(Braitenberg2b())
         
-        positions = [(150.0, 100.0), (200.0, 100.0), (250.0, 100.0), (300.0, 100.0),
-                     (350.0, 100.0), (350.0, 150.0), (350.0, 200.0),
-                     (350.0, 250.0), (350, 300.0), (350.0, 350.0),
-                     (300.0, 350.0), (250.0, 350.0), (200.0, 350.0), (200.0, 400.0),
-                     (200.0, 450.0), (200.0, 500.0), (200.0, 550.0), (250.0, 550.0),
-                     (300.0, 550.0), (350.0, 550.0), (400.0, 550.0), (450.0, 550.0),
-                     (500.0, 550.0), (550.0, 550.0), (600.0, 550.0), (600.0, 500.0),
-                     (600.0, 450.0), (600.0, 400.0), (600.0, 350.0), (550.0, 350.0),
-                     (500.0, 350.0), (500.0, 300.0), (500.0, 250.0), (500.0, 200.0),
-                     (500.0, 150.0), (500.0, 100.0), (500.0, 50.0)]
-        
-        for pos in positions:
+        for pos in DOT_POSITIONS:
             self.world.add_object(Dot(pos))
         
         super().begin_assessment()
\ No newline at end of file
@@ -12,6 +12,8 @@ DEMO_NAME = "Evo Mouse"
 CLASS_NAME = "EvoMouseSimulation"
 
 class Cheese(WorldObject):
+    static = True
+    
     def __init__(self):
         super().__init__()
         self.radius = 5.0
@@ -10,6 +10,8 @@ DEMO_NAME = "Mouse"
 CLASS_NAME = "MouseSimulation"
 
 class Cheese(WorldObject):
+    static = True
+    
     def __init__(self):
         super().__init__()
         self.radius = 5.0
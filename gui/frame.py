@@ -4,7 +4,6 @@ import sys
 import time
 import threading
 
-from copy import deepcopy
 from pathlib import Path
 # from core.simulation import Simulation
 from gui.utils import AppIdentifiers as ID
@@ -35,7 +34,9 @@ class Frame(wx.Frame):
         self.current_simulation_id: int = -1
         self.fps = 60
         self.started, self.paused = False, False
-        self.initial_simulation_copy = None
+        # Taken once the simulation has begun, Reset restores it in place
+        self.initial_snapshot = None
+        self.simulation_lock = threading.Lock()
         
         self.create_menu_bar()
         #self.create_log_window()
@@ -152,11 +153,15 @@ class Frame(wx.Frame):
                       """, "PyBEAST++", wx.ICON_INFORMATION)
     
     def on_reset(self, event) -> None:
-        if self.initial_simulation_copy is not None:
-            self.start_simulation(self.initial_simulation_copy)
+        if self.initial_snapshot is None or self.current_simulation is None:
+            return
+        with self.simulation_lock:
+            self.current_simulation.restore(self.initial_snapshot)
+        if not self.current_thread.is_alive():
+            self.start_thread(resume=True)
     
     def start_simulation(self, simulation) -> None:
-        self.initial_simulation_copy = deepcopy(simulation)
+        self.initial_snapshot = None
         
         if self.current_thread is not None:
             self.kill_simulation()
@@ -167,13 +172,15 @@ class Frame(wx.Frame):
         self.create_world_canvas(self.current_simulation.world)
         #self.current_simulation.log.addHandler(self.log_window.handler)
         #self.log_window.log_ctrl.Clear()
-        
+        self.start_thread()
+    
+    def start_thread(self, resume: bool = False) -> None:
         self.pause_event = threading.Event()
         self.render_simulation = threading.Event()
         self.kill_thread = threading.Event()
         self.current_thread = threading.Thread(
             target=self.run_simulation,
-            args=(self.pause_event, self.render_simulation, self.kill_thread)
+            args=(self.pause_event, self.render_simulation, self.kill_thread, resume)
         )
         self.current_thread.daemon = True
         self.current_thread.start()
@@ -195,18 +202,28 @@ class Frame(wx.Frame):
         self.current_simulation = None
         self.current_thread = None
         
+    def display_world(self) -> None:
+        # Drawn between steps, never while a step or a reset is changing the world
+        with self.simulation_lock:
+            if self.world_canvas is not None:
+                self.world_canvas.display()
+    
     def run_simulation(
         self,
         pause_event: threading.Event,
         render_simulation: threading.Event,
-        kill_thread: threading.Event
+        kill_thread: threading.Event,
+        resume: bool = False
     ) -> None:
         self.world_canvas.SetCurrent(self.world_canvas.context)
         time.sleep(0.2)
-        if not self.current_simulation.loaded:
+        if not self.current_simulation.loaded and not resume:
             self.current_simulation.begin_simulation()
         else:
             self.current_simulation.resume_simulation()
+        # Loaded simulations reset to where they were loaded, a reset keeps the first snapshot
+        if self.initial_snapshot is None:
+            self.initial_snapshot = self.current_simulation.snapshot()
         pause_event.set()
         render_simulation.set()
         
@@ -216,9 +233,10 @@ class Frame(wx.Frame):
             if kill_thread.is_set():
                 break
             start_time = time.time()
-            complete = self.current_simulation.update()
+            with self.simulation_lock:
+                complete = self.current_simulation.update()
             if render_simulation.is_set():
-                wx.CallAfter(self.world_canvas.display)
+                wx.CallAfter(self.display_world)
                 sleep_for = max(0, 1.0 / self.fps - (time.time() - start_time))
                 time.sleep(sleep_for)
             if complete:
@@ -0,0 +1,111 @@
+import numpy as np
+
+from core.evolve.evolver import Evolver
+from core.evolve.fitness_cache import FitnessCache
+from core.evolve.genetic_algorithm import GeneticAlgorithm
+from core.evolve.population import Population
+from core.utils import FITNESS_CACHE_POLICY
+from demos.evo_mouse import EvoMouseSimulation
+
+class Member(Evolver):
+    def __init__(self):
+        super().__init__()
+        self.genotype = [0.5, 0.25]
+        self.scored = self.resets = 0
+    
+    def set_genotype(self, genotype):
+        self.genotype = list(genotype)
+    
+    def get_genotype(self):
+        return self.genotype
+    
+    def get_fitness(self):
+        self.scored += 1
+        return 2.0
+    
+    def reset(self):
+        self.resets += 1
+
+def test_entries_are_kept_per_context():
+    cache = FitnessCache()
+    first, second = FitnessCache.context(1, [[1.0, 2.0]]), FitnessCache.context(2, [[1.0, 2.0]])
+    cache.store([1.0, 2.0], 3.0, first)
+    assert cache.lookup([1.0, 2.0], first) == 3.0
+    assert cache.lookup([1.0, 2.0], second) is None
+    assert cache.lookup([1.0, 2.0]) is None
+
+def test_context_depends_on_the_company():
+    alone = FitnessCache.context(1, [[1.0, 2.0]])
+    assert FitnessCache.context(1, [[1.0, 2.0]]) == alone
+    assert FitnessCache.context(1, [[1.0, 2.0], [0.0]]) != alone
+    assert FitnessCache.context(1, [[1.0], [2.0]]) != alone
+    assert FitnessCache.context(1, [[0.0], [1.0, 2.0]]) != FitnessCache.context(1, [[1.0, 2.0], [0.0]])
+
+def test_average_policy_waits_for_samples():
+    cache = FitnessCache(policy = FITNESS_CACHE_POLICY.AVERAGE, samples = 2)
+    context = FitnessCache.context(5, [[1.0]])
+    assert cache.store([1.0], 1.0, context) == 1.0
+    assert cache.lookup([1.0], context) is None
+    assert cache.store([1.0], 3.0, context) == 2.0
+    assert cache.lookup([1.0], context) == 2.0
+
+def _population(cache: FitnessCache, genotypes: list) -> Population:
+    population = Population(len(genotypes), Member, GeneticAlgorithm(), fitness_cache = cache)
+    for member, genotype in zip(population.members, genotypes):
+        member.set_genotype(genotype)
+    return population
+
+def test_skipped_assessment_leaves_members_alone():
+    cache = FitnessCache()
+    context = FitnessCache.context(3, [[0.5, 0.25]] * 4)
+    cache.store([0.5, 0.25], 7.0, context)
+    population = _population(cache, [[0.5, 0.25]] * 4)
+    population.begin_assessment()
+    population.lookup_cached(context)
+    assert population.fully_cached
+    population.end_assessment()
+    for m in population.members:
+        assert (m.scored, m.resets, m._fitness_scores) == (0, 0, [7.0])
+
+def test_placed_assessment_scores_only_uncached_members():
+    cache = FitnessCache()
+    cache.store([0.5, 0.25], 7.0, b"context")
+    population = _population(cache, [[0.5, 0.25], [1.0, 1.0]])
+    population.begin_assessment()
+    population.lookup_cached(b"context")
+    population._placed = True
+    population.end_assessment()
+    cached, assessed = population.members
+    assert (cached.scored, cached.resets, cached._fitness_scores) == (0, 1, [7.0])
+    assert (assessed.scored, assessed.resets, assessed._fitness_scores) == (1, 1, [2.0])
+    assert cache.lookup([1.0, 1.0], b"context") == 2.0
+
+def test_fitness_is_not_reused_with_other_teammates():
+    simulation = EvoMouseSimulation()
+    simulation.seed = 11
+    cache = simulation.contents["mice"].fitness_cache = FitnessCache()
+    population = simulation.contents["mice"]
+    population.begin_assessment()
+    context = simulation._lookup_cached([population], 0)
+    for m in population.members:
+        cache.store(m.get_genotype(), 1.0, context)
+    population.begin_assessment()
+    assert simulation._lookup_cached([population], 0) == context
+    assert population.fully_cached
+    population.members[-1].set_genotype(np.zeros(len(population.members[-1].get_genotype())))
+    population.begin_assessment()
+    simulation._lookup_cached([population], 0)
+    assert not any(hit is not None for hit in population._cached)
+
+def test_scenario_seed_depends_on_assessment_not_generation():
+    simulation = EvoMouseSimulation()
+    simulation.seed = 11
+    assert simulation._scenario_seed() is None
+    simulation.contents["mice"].fitness_cache = FitnessCache()
+    seeds = []
+    for simulation._generation in range(2):
+        seeds.append([])
+        for simulation._assessment in range(3):
+            seeds[-1].append(simulation._scenario_seed())
+    assert seeds[0] == seeds[1]
+    assert len(set(seeds[0])) == 3
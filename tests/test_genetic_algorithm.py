@@ -0,0 +1,65 @@
+import random
+import numpy as np
+import pytest
+
+from types import SimpleNamespace
+from core.evolve.base import MutationOperator, NormalMutator
+from core.evolve.genetic_algorithm import GeneticAlgorithm
+from core.utils import GA_SELECTION_TYPE
+
+class ScalarMutator(MutationOperator):
+    def __call__(self, t: float) -> float:
+        return t + random.gauss(0.0, 1.0)
+
+def test_scalar_mutator_is_applied_per_gene():
+    ga = GeneticAlgorithm(mutation = 1.0, mutator = ScalarMutator())
+    genomes = np.zeros((4, 16))
+    mutated = ga.mutate_population(genomes)
+    assert mutated.shape == genomes.shape
+    assert len(np.unique(mutated)) == mutated.size
+
+def test_plain_function_mutator():
+    ga = GeneticAlgorithm(mutation = 1.0, mutator = lambda t: t + 1.0)
+    assert np.array_equal(ga.mutate_population(np.zeros((2, 3))), np.ones((2, 3)))
+
+def test_vectorised_mutator_respects_rate():
+    np.random.seed(0)
+    ga = GeneticAlgorithm(mutation = 0.0, mutator = NormalMutator())
+    genomes = np.arange(12, dtype=np.float64).reshape(3, 4)
+    assert np.array_equal(ga.mutate_population(genomes), genomes)
+    ga.mutation = 1.0
+    assert len(np.unique(ga.mutate_population(genomes) - genomes)) == genomes.size
+
+class Scored:
+    def __init__(self, i: int):
+        self.genotype = [float(i)] * 3
+        self._probability = self._fixed_fitness = float(i)
+    
+    def get_genotype(self):
+        return self.genotype
+
+def _with_members(selection: int) -> GeneticAlgorithm:
+    ga = GeneticAlgorithm(selection = selection)
+    ga.population = SimpleNamespace(members = [ Scored(i) for i in range(4) ])
+    return ga
+
+def test_single_parent_selection_returns_member_genotypes():
+    np.random.seed(1)
+    for selection in (GA_SELECTION_TYPE.ROULETTE, GA_SELECTION_TYPE.TOURNAMENT):
+        ga = _with_members(selection)
+        genotypes = [ m.genotype for m in ga.population.members ]
+        assert ga.select_parent_genotype() in genotypes
+        assert ga.select_probability() in genotypes
+        assert ga.select_tournament() in genotypes
+    # Members with no probability are never picked
+    assert all(_with_members(GA_SELECTION_TYPE.RANK).select_probability() != [0.0] * 3 for _ in range(20))
+
+def test_crossover_genotypes_swaps_tails():
+    ga = GeneticAlgorithm()
+    first, second = ga.crossover_genotypes(np.zeros(6), np.ones(6))
+    assert np.array_equal(first + second, np.ones(6))
+    assert np.all(np.diff(first) >= 0)
+
+def test_unknown_selection_raises():
+    with pytest.raises(ValueError):
+        _with_members(-1).select_parents(2)
@@ -0,0 +1,11 @@
+import subprocess
+import sys
+
+from benchmarks.import_budget import ROOT
+
+def test_headless_import_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.import_budget"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from core.agent.agent import Agent
+from core.world.kinematics import KinematicStore
+
+def registered(count: int, store: KinematicStore) -> list[Agent]:
+    agents = []
+    for i in range(count):
+        agent = Agent(location = np.array([i, i], np.float32))
+        store.register(agent)
+        agents.append(agent)
+    return agents
+
+def test_location_survives_growth():
+    store = KinematicStore(capacity = 2)
+    first = registered(1, store)[0]
+    held = first.location
+    registered(8, store)
+    store.set("location", 0, (50.0, 60.0))
+    assert np.array_equal(held, [0.0, 0.0])
+    assert np.array_equal(first.location, [50.0, 60.0])
+
+def test_location_survives_unregister():
+    store = KinematicStore()
+    agents = registered(3, store)
+    held = agents[0].location
+    store.unregister(agents[0])
+    assert np.array_equal(held, [0.0, 0.0])
+    assert np.array_equal(agents[2].location, [2.0, 2.0])
+    assert np.array_equal(agents[0].location, [0.0, 0.0])
+
+def test_assignment_writes_back():
+    store = KinematicStore()
+    agent = registered(1, store)[0]
+    agent.location = agent.location + np.array([1.0, 2.0], np.float32)
+    assert np.array_equal(store.location[0], [1.0, 2.0])
+
+def test_writing_into_a_vector_raises():
+    store = KinematicStore()
+    agent = registered(1, store)[0]
+    with pytest.raises(ValueError):
+        agent.location[0] = 9.0
+    with pytest.raises(ValueError):
+        agent.velocity[:] = (1.0, 1.0)
+    with pytest.raises(ValueError):
+        agent.location += 1.0
+    assert np.array_equal(store.location[0], [0.0, 0.0])
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from core.world.occupancy import OccupancyGrid
+
+def _brute(positions, classes, points, radii, matched, size):
+    delta = positions[None, :, :] - points[:, None, :]
+    delta -= np.array(size, np.float32) * np.round(delta / np.array(size, np.float32))
+    inside = np.einsum("ijk,ijk->ij", delta, delta) <= (radii**2)[:, None]
+    return (inside & matched[:, classes]).sum(axis=1)
+
+@pytest.mark.parametrize("size", [(400.0, 300.0), (410.0, 290.0)])
+def test_counts_match_measuring_every_position(size):
+    rng = np.random.default_rng(7)
+    width, height = size
+    positions = rng.uniform(0, size, (2000, 2)).astype(np.float32)
+    # Crowd the edges and corners, where discs reach around the wrap
+    positions[:400] = rng.choice([0.0, 1.0, 12.0], (400, 2)) * rng.uniform(0, 1, (400, 2)) * np.array(size) % np.array(size)
+    positions[400:500, 0] = rng.choice([0.0, width - 1e-3], 100)
+    classes = rng.integers(0, 3, len(positions))
+    points = np.concatenate([
+        rng.uniform(0, size, (60, 2)),
+        [[0.0, 0.0], [width - 1e-3, height - 1e-3], [0.0, height / 2], [width / 2, height - 0.5]] * 5
+    ]).astype(np.float32)
+    # Small discs, discs wider than the grid (measured position by position) and unbounded ones
+    radii = rng.choice([5.0, 25.0, 60.0, 100.0, 140.0, 260.0, 1e4, np.inf], len(points))
+    matched = rng.integers(0, 2, (len(points), 3)).astype(bool)
+    matched[0] = True
+    grid = OccupancyGrid()
+    grid.rebuild(positions, classes, 3, width, height)
+    counts = grid.counts(points, radii, matched)
+    assert np.array_equal(counts, _brute(positions, classes, points, radii, matched, size))
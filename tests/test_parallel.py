@@ -0,0 +1,31 @@
+import numpy as np
+
+from core.parallel import _run_independent
+from demos.evo_mouse import EvoMouseSimulation
+
+class Recorded(EvoMouseSimulation):
+    """
+    Keeps the genomes its population started from
+    """
+    def initialise(self):
+        super().initialise()
+        if not hasattr(self, "initial"):
+            self.initial = [ np.array(m.get_genotype()) for m in self.contents["mice"].members ]
+    
+    def run_simulation(self, *args, **kwargs):
+        super().run_simulation(*args, **kwargs)
+        type(self).last = self.initial
+
+def _initial(seed: int) -> list[np.ndarray]:
+    settings = { "runs": 1, "generations": 1, "assessments": 1, "timesteps": 1, "sleep_betwen_logs": 0.0, "seed": seed }
+    _run_independent((Recorded, settings, 0))
+    return Recorded.last
+
+def test_runs_start_from_their_own_seeded_population():
+    np.random.seed(0)
+    first = _initial(5)
+    np.random.seed(1)
+    again = _initial(5)
+    other = _initial(6)
+    assert all(np.array_equal(a, b) for a, b in zip(first, again))
+    assert not all(np.array_equal(a, b) for a, b in zip(first, other))
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from core.agent.agent import Agent
+from core.sensor.implementation import density_sensor
+from core.sensor.sensing import sense
+from core.world.geometry import displacement
+from core.world.spatial_hash import SpatialHash
+from demos.chase import ChaseSimulation
+from demos.evo_mouse import EvoMouseSimulation
+
+def test_pairs_match_query():
+    rng = np.random.default_rng(3)
+    hashing = SpatialHash(400.0, 300.0, 25.0)
+    hashing.rebuild(rng.uniform(0, [400.0, 300.0], (300, 2)))
+    points = rng.uniform(0, [400.0, 300.0], (40, 2)).astype(np.float32)
+    radii = np.array([0.0, 10.0, 60.0, 250.0, np.inf] * 8)
+    query, found = hashing.pairs(points, radii)
+    for i, (point, radius) in enumerate(zip(points, radii)):
+        assert found[query == i].tolist() == hashing.query(point, radius)
+
+def _outputs(agents):
+    return [ [ (s.output(), getattr(s.evaluate_function, "count", None)) for s in a.sensors.values() ] for a in agents ]
+
+def _reset(agents, batched):
+    for a in agents:
+        for s in a.sensors.values():
+            s.evaluate_function.reset()
+            s.batched = batched
+
+@pytest.mark.parametrize("simulation", [EvoMouseSimulation, ChaseSimulation])
+def test_batched_sensing_matches_interact(simulation):
+    np.random.seed(0)
+    random.seed(0)
+    sim = simulation()
+    sim.timesteps, sim.sleep_betwen_logs = 1000, 0
+    sim.log.setLevel(40)
+    sim.initialise()
+    sim.begin_simulation()
+    world = sim.world
+    kinds = { type(o) for o in world._objects } | { type(a) for a in world._agents } | { Agent }
+    for i, a in enumerate(world._agents):
+        for j, kind in enumerate(kinds):
+            a.sensors[f"count {j}"] = density_sensor(kind, np.pi / 2, 100.0, 0.0)
+        if i % 3 == 0:
+            a._interaction_range = [25.0, 80.0, np.inf][i % 9 // 3]
+    touching = 0
+    for _ in range(5):
+        for a in world._agents:
+            a.location = a.location + np.float32(10.0)
+        agents, objects = world._agents, world._objects
+        # Drop objects onto agents so that touching pairs come up
+        for a, o in zip(agents[::3], objects[::7]):
+            o.location = a.location + np.array([a.radius * 0.5, 0.0], np.float32)
+        _reset(agents, True)
+        sense(agents, objects, None, world.size, None, world._occupancy, world._sensing_hash)
+        batched = _outputs(agents)
+        _reset(agents, False)
+        # Agent.interact: agents are sensed once more unless touching, other objects only when not touching
+        for a in agents:
+            for o in objects + [ b for b in agents if b is not a ]:
+                vec = displacement(a.location, o.location, world.size)
+                if vec @ vec <= a._interaction_range**2:
+                    if isinstance(o, Agent):
+                        a.sensor_interact(o)
+                    if not a.is_touching(o, vec):
+                        a.sensor_interact(o)
+                    else:
+                        touching += 1
+        for fast, slow in zip(batched, _outputs(agents)):
+            for (x, count), (y, expected) in zip(fast, slow):
+                assert count == expected
+                assert np.isclose(x, y, rtol = 1e-5, atol = 1e-5)
+    assert touching > 0
@@ -0,0 +1,52 @@
+import numpy as np
+
+from core.snapshot import Snapshot
+
+class Body:
+    def __init__(self, i: int):
+        self.step = i
+        self.energy = float(i)
+        self.alive = True
+        self.pose = np.array([i, -i], np.float32)
+        self.label = f"body {i}"
+        self.history = [i]
+
+def test_restores_captured_values_in_place():
+    bodies = [ Body(i) for i in range(5) ]
+    pose = bodies[0].pose
+    snapshot = Snapshot()
+    snapshot.capture(*bodies)
+    for b in bodies:
+        b.step, b.energy, b.alive, b.label = 99, -1.0, False, "moved"
+        b.pose += 10
+        b.history.append(99)
+    snapshot.restore_objects()
+    for i, b in enumerate(bodies):
+        assert (b.step, b.energy, b.alive, b.label, b.history) == (i, float(i), True, f"body {i}", [i])
+        assert type(b.step) is int and type(b.energy) is float and type(b.alive) is bool
+        assert b.pose.dtype == np.float32 and np.array_equal(b.pose, [i, -i])
+    assert pose is not bodies[0].pose
+
+def test_stacks_shared_numeric_attributes():
+    snapshot = Snapshot()
+    snapshot.capture(*[ Body(i) for i in range(3) ])
+    block, = snapshot._blocks
+    assert set(block.columns) == { "step", "energy", "alive", "pose" }
+    assert block.columns["pose"].shape == (3, 2)
+
+def test_keeps_attributes_created_later():
+    body = Body(1)
+    snapshot = Snapshot()
+    snapshot.capture(body)
+    body._cache = "built lazily"
+    snapshot.restore_objects()
+    assert body._cache == "built lazily"
+
+def test_mixed_types_stay_per_object():
+    bodies = [ Body(0), Body(1) ]
+    bodies[1].energy = 3
+    snapshot = Snapshot()
+    snapshot.capture(*bodies)
+    bodies[1].energy = 0.5
+    snapshot.restore_objects()
+    assert type(bodies[0].energy) is float and type(bodies[1].energy) is int
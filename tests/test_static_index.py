@@ -0,0 +1,66 @@
+import numpy as np
+
+from core.sensor.implementation import nearest_angle_sensor
+from core.sensor.sensing import sense
+from core.world.geometry import displacement
+from core.world.world import World
+from core.world.world_object import WorldObject
+from demos.mouse import Cheese, Mouse
+
+class Crumb(WorldObject):
+    """
+    Moves by writing into its location, so the index can't be told
+    """
+    def __init__(self):
+        super().__init__()
+        self.radius = 2.0
+
+class CrumbMouse(Mouse):
+    def __init__(self):
+        super().__init__()
+        self.add_sensor("crumb", nearest_angle_sensor(Crumb, 250))
+
+def _world(mice: int, cheese: int, crumbs: int) -> World:
+    np.random.seed(1)
+    world = World(None)
+    for obj in [ CrumbMouse() for _ in range(mice) ] + [ Cheese() for _ in range(cheese) ] + [ Crumb() for _ in range(crumbs) ]:
+        world.add_object(obj)
+        obj.initialise()
+    return world
+
+def _scan(world: World, point: np.ndarray, typing: type, k: int) -> list[tuple[WorldObject, float]]:
+    objs = [ o for o in world._objects if isinstance(o, typing) ]
+    delta = displacement(point, np.array([ o.location for o in objs ], np.float32), world.size).astype(np.float32)
+    distance = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+    order = np.lexsort((np.arange(len(objs)), distance))[:k]
+    return [ (objs[i], distance[i]) for i in order ]
+
+def _moves(world: World) -> None:
+    for i, obj in enumerate(world._objects):
+        if isinstance(obj, Cheese) and i % 3 == 0:
+            obj.location = world.random_location()
+        elif isinstance(obj, Crumb):
+            obj.location[:] = world.random_location()
+
+def test_k_nearest_matches_scan_after_moves():
+    world = _world(0, 300, 100)
+    index = world._static_index()
+    assert index.covers(Cheese) and not index.covers(WorldObject)
+    for _ in range(4):
+        _moves(world)
+        for point in np.random.uniform(0, world.size, (20, 2)).astype(np.float32):
+            for typing in (Cheese, Crumb, WorldObject):
+                found = world.k_nearest(point, typing, 5)
+                expected = _scan(world, point, typing, 5)
+                assert [ o for o, _ in found ] == [ o for o, _ in expected ]
+                assert np.allclose([ d for _, d in found ], [ d for _, d in expected ])
+
+def test_sensing_from_index_matches_scan():
+    world = _world(20, 300, 100)
+    for _ in range(4):
+        _moves(world)
+        readings = []
+        for index in (world._static_index(), None):
+            sense(world._agents, world._objects, None, world.size, index)
+            readings.append([ [ s.output() for s in a.sensors.values() ] for a in world._agents ])
+        assert np.allclose(*readings)
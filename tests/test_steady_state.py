@@ -0,0 +1,25 @@
+import core.parallel
+from core.evolve.genetic_algorithm import GeneticAlgorithm
+from demos.evo_mouse import EvoMouseSimulation
+
+def _run(monkeypatch, parallel) -> int:
+    bred = []
+    breed = GeneticAlgorithm.breed
+    monkeypatch.setattr(GeneticAlgorithm, "breed", lambda self, *args: bred.append(1) or breed(self, *args))
+    simulation = EvoMouseSimulation()
+    simulation.steady_state = True
+    simulation.seed = 3
+    simulation.generations, simulation.assessments, simulation.timesteps = 3, 2, 10
+    simulation.log.setLevel(40)
+    simulation.run_simulation(parallel = parallel)
+    return len(bred)
+
+def test_serial_run_starts_no_pool(monkeypatch):
+    def pool(*args, **kwargs):
+        raise AssertionError("parallel=False started a pool")
+    monkeypatch.setattr(core.parallel.multiprocessing, "Pool", pool)
+    # Every assessment after the first population's breeds children
+    assert _run(monkeypatch, False) == 4
+
+def test_whole_population_teams_breed_every_assessment(monkeypatch):
+    assert _run(monkeypatch, 2) == 4
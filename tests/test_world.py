@@ -0,0 +1,38 @@
+from core.timing import PhaseTimer
+from core.world.world import World
+from core.world.world_object import WorldObject
+from demos.mouse import Cheese, Mouse
+
+class Spawner(WorldObject):
+    def __init__(self):
+        super().__init__()
+        self.spawned = None
+    
+    def update(self):
+        super().update()
+        if self.spawned is None:
+            self.spawned = Mouse()
+            self.world.add_object(self.spawned)
+            self.spawned.initialise()
+
+def test_agent_added_during_update_joins_the_next_step():
+    world = World(None)
+    for obj in (Mouse(), Cheese(), Spawner()):
+        world.add_object(obj)
+        obj.initialise()
+    for _ in range(3):
+        world.update()
+    assert len(world.objects_of(Mouse)) == 2
+
+def test_every_step_phase_is_timed_separately():
+    world = World(None)
+    world.timer = PhaseTimer()
+    for obj in (Mouse(), Cheese()):
+        world.add_object(obj)
+        obj.initialise()
+    laps = []
+    lap = world.timer.lap
+    world.timer.lap = lambda phase: laps.append(phase) or lap(phase)
+    world.update()
+    assert len(laps) == len(set(laps))
+    assert { "removal", "sensing", "queues", "sensors" } <= set(laps)